@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Absence, AbsenceType, AbsenceConflict
+from .models import Absence, AbsenceType, AbsenceConflict, VacationBalance
 
 
 @admin.register(AbsenceType)
@@ -189,3 +189,12 @@ class AbsenceConflictAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} Konflikte wurden als gelöst markiert.')
     mark_as_resolved.short_description = 'Als gelöst markieren'
 
+
+
+@admin.register(VacationBalance)
+class VacationBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'year', 'used_days', 'updated_at')
+    list_filter = ('year',)
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
+    readonly_fields = ('user', 'year', 'used_days', 'updated_at')
+    ordering = ('user__username', '-year')
@@ -0,0 +1,205 @@
+"""
+Feiertags-Kalender
+
+Gesetzliche Feiertage werden pro Region und Jahr berechnet (memoisiert) statt
+als Absence-Zeilen pro User gespeichert. Listen-Responses der Abwesenheiten
+bekommen die Feiertage virtuell als Einträge vom Typ PUBLIC_HOLIDAY
+zugemischt (merge_holiday_absences), damit das Frontend unverändert bleibt.
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+
+# Aktuell nur Hamburg - weitere Bundesländer über HOLIDAY_REGIONS ergänzen
+DEFAULT_HOLIDAY_REGION = 'HH'
+
+# Ohne year-Parameter: Feiertage für Vorjahr bis Folgejahr zumischen
+DEFAULT_HOLIDAY_YEARS_BACK = 1
+DEFAULT_HOLIDAY_YEARS_AHEAD = 1
+
+
+def calculate_easter(year):
+    """Berechnet Ostersonntag nach Gauß'scher Osterformel"""
+    a = year % 19
+    b = year // 100
+    c = year % 100
+    d = b // 4
+    e = b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i = c // 4
+    k = c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = ((h + l - 7 * m + 114) % 31) + 1
+
+    return date(year, month, day)
+
+
+def get_german_holidays(year):
+    """
+    Berechnet deutsche Feiertage für Hamburg
+    Returns: List of (date, name) tuples
+    """
+    holidays = []
+
+    # Feste Feiertage
+    holidays.append((date(year, 1, 1), 'Neujahr'))
+    holidays.append((date(year, 5, 1), 'Tag der Arbeit'))
+    holidays.append((date(year, 10, 3), 'Tag der Deutschen Einheit'))
+    holidays.append((date(year, 10, 31), 'Reformationstag'))
+    holidays.append((date(year, 12, 25), '1. Weihnachtstag'))
+    holidays.append((date(year, 12, 26), '2. Weihnachtstag'))
+
+    # Bewegliche Feiertage (basierend auf Ostern)
+    easter = calculate_easter(year)
+
+    # Karfreitag (2 Tage vor Ostern)
+    holidays.append((easter - timedelta(days=2), 'Karfreitag'))
+
+    # Ostermontag (1 Tag nach Ostern)
+    holidays.append((easter + timedelta(days=1), 'Ostermontag'))
+
+    # Christi Himmelfahrt (39 Tage nach Ostern)
+    holidays.append((easter + timedelta(days=39), 'Christi Himmelfahrt'))
+
+    # Pfingstmontag (50 Tage nach Ostern)
+    holidays.append((easter + timedelta(days=50), 'Pfingstmontag'))
+
+    return sorted(holidays)
+
+
+HOLIDAY_REGIONS = {
+    'HH': get_german_holidays,
+}
+
+
+@lru_cache(maxsize=256)
+def get_holidays(year, region=DEFAULT_HOLIDAY_REGION):
+    """Feiertage einer Region für ein Jahr → tuple((date, name), ...), memoisiert"""
+    try:
+        calculate = HOLIDAY_REGIONS[region]
+    except KeyError:
+        raise ValueError(f'Unbekannte Feiertags-Region: {region}')
+    return tuple(calculate(year))
+
+
+def get_holidays_between(start, end, region=DEFAULT_HOLIDAY_REGION):
+    """Feiertage im Zeitraum [start, end] → list((date, name))"""
+    return [
+        (holiday_date, name)
+        for year in range(start.year, end.year + 1)
+        for holiday_date, name in get_holidays(year, region)
+        if start <= holiday_date <= end
+    ]
+
+
+def is_public_holiday(day, region=DEFAULT_HOLIDAY_REGION):
+    return any(holiday_date == day for holiday_date, _ in get_holidays(day.year, region))
+
+
+def count_weekdays(start, end):
+    """Anzahl Mo-Fr im Zeitraum [start, end] (geschlossene Formel statt Tagesschleife)"""
+    if end < start:
+        return 0
+    full_weeks, rest = divmod((end - start).days + 1, 7)
+    # Rest-Tage ab dem Wochentag von start: Mo-Fr zählen (Wochentage 0-4, zyklisch)
+    first = start.weekday()
+    rest_weekdays = max(0, min(first + rest, 5) - first) + max(0, first + rest - 7)
+    return full_weeks * 5 + rest_weekdays
+
+
+def count_workdays(start, end, region=DEFAULT_HOLIDAY_REGION):
+    """Arbeitstage im Zeitraum: Mo-Fr abzüglich Feiertage, die auf Mo-Fr fallen"""
+    if end < start:
+        return 0
+    holidays_on_weekdays = sum(
+        1 for holiday_date, _ in get_holidays_between(start, end, region)
+        if holiday_date.weekday() < 5
+    )
+    return count_weekdays(start, end) - holidays_on_weekdays
+
+
+def get_holiday_years(year=None):
+    """Jahre, deren Feiertage zugemischt werden (year-Parameter oder Standard-Fenster)"""
+    if year is not None:
+        return [year]
+    from django.utils import timezone
+    current_year = timezone.now().year
+    return list(range(current_year - DEFAULT_HOLIDAY_YEARS_BACK, current_year + DEFAULT_HOLIDAY_YEARS_AHEAD + 1))
+
+
+def holiday_absences(users_data, years, region=DEFAULT_HOLIDAY_REGION):
+    """
+    Virtuelle Feiertags-Einträge im Format des AbsenceSerializer
+
+    Args:
+        users_data: serialisierte User (UserMiniSerializer) - je User ein Satz Feiertage
+
+    Die Einträge haben keine Datenbank-ID (id = 'holiday-<user_id>-<datum>')
+    und sind über is_virtual erkennbar.
+    """
+    from .models import Absence, AbsenceType
+    from .serializers import AbsenceTypeSerializer
+
+    holiday_type = AbsenceType.objects.filter(name=AbsenceType.PUBLIC_HOLIDAY).first()
+    if holiday_type is None:
+        return []
+
+    absence_type_data = AbsenceTypeSerializer(holiday_type).data
+    status_display = dict(Absence.STATUS_CHOICES)[Absence.APPROVED]
+    holidays = [holiday for year in years for holiday in get_holidays(year, region)]
+
+    entries = []
+    for user_data in users_data:
+        for holiday_date, name in holidays:
+            entries.append({
+                'id': f'holiday-{user_data["id"]}-{holiday_date.isoformat()}',
+                'is_virtual': True,
+                'user': user_data,
+                'absence_type': absence_type_data,
+                'start_date': holiday_date.isoformat(),
+                'end_date': holiday_date.isoformat(),
+                'manual_duration_days': 0,
+                'reason': name,
+                'status': Absence.APPROVED,
+                'status_display': status_display,
+                'approved_by': None, 'approved_at': None, 'approval_comment': None,
+                'rejected_by': None, 'rejected_at': None, 'rejection_reason': None,
+                'representative': None, 'representative_confirmed': True, 'representative_confirmed_at': None,
+                'hr_notified': True, 'hr_notified_at': None, 'hr_comment': None,
+                'hr_processed': False, 'hr_processed_by': None, 'hr_processed_at': None,
+                'is_revision': False, 'revision_of': None, 'revision_reason': None,
+                'certificate': None, 'additional_documents': None,
+                'created_at': None, 'updated_at': None,
+                'conflicts': [], 'comments': [],
+                'duration_days': 1,
+                'workday_duration': 1 if holiday_date.weekday() < 5 else 0,
+                'is_pending': False,
+                'is_approved': True,
+                'is_rejected': False,
+                'approved': True,
+            })
+    return entries
+
+
+def merge_holiday_absences(absences_data, user, years, region=DEFAULT_HOLIDAY_REGION):
+    """
+    Mischt die Feiertage in serialisierte Abwesenheiten
+
+    Feiertage bekommen der anfragende User und jeder User, der in der Liste
+    vorkommt (Team-Ansicht von Vorgesetzten/HR - wie früher die Feiertags-Zeilen
+    pro Mitarbeiter). Sortierung wie Absence.Meta.ordering (-start_date).
+    """
+    from .serializers import UserMiniSerializer
+
+    users_data = {user.pk: UserMiniSerializer(user).data}
+    for absence in absences_data:
+        absence_user = absence.get('user')
+        if absence_user and absence_user['id'] not in users_data:
+            users_data[absence_user['id']] = absence_user
+
+    merged = list(absences_data) + holiday_absences(list(users_data.values()), years, region)
+    merged.sort(key=lambda absence: str(absence['start_date']), reverse=True)
+    return merged
@@ -15,7 +15,7 @@ class PublicHolidaysView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        from .signals import get_german_holidays
+        from .holiday_calendar import get_holidays
         
         year = request.query_params.get('year')
         if year:
@@ -26,7 +26,7 @@ class PublicHolidaysView(APIView):
         else:
             year = timezone.now().year
         
-        holidays = get_german_holidays(year)
+        holidays = get_holidays(year)
         
         # Konvertiere zu JSON-serialisierbarem Format
         holidays_data = [
@@ -0,0 +1,65 @@
+"""
+Management Command: Rechnet die Urlaubskonten (VacationBalance) neu
+
+Verwendung:
+    python manage.py rebuild_vacation_ledger [--year JAHR ...] [--user USERNAME ...]
+
+Beispiele:
+    # Aktuelles Jahr für alle aktiven Benutzer
+    python manage.py rebuild_vacation_ledger
+    
+    # Mehrere Jahre
+    python manage.py rebuild_vacation_ledger --year 2025 --year 2026
+    
+    # Nur bestimmte Benutzer
+    python manage.py rebuild_vacation_ledger --user mmustermann
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from absences.vacation_ledger import rebuild_balances
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rechnet die Urlaubskonten (genommene Urlaubstage pro User und Jahr) neu'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            action='append',
+            help='Jahr (mehrfach möglich, Standard: aktuelles Jahr)',
+        )
+        parser.add_argument(
+            '--user',
+            action='append',
+            help='Nur für diese Benutzer (Username, mehrfach möglich)',
+        )
+
+    def handle(self, *args, **options):
+        years = options['year'] or [timezone.now().year]
+        
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'id'))
+            unknown = set(options['user']) - users.keys()
+            if unknown:
+                raise CommandError(f"Unbekannte Benutzer: {', '.join(sorted(unknown))}")
+            user_ids = set(users.values())
+        
+        start = time.perf_counter()
+        with transaction.atomic():
+            written = rebuild_balances(years, user_ids=user_ids)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {written} Urlaubskonten für {', '.join(map(str, sorted(years)))} neu berechnet "
+                f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+            )
+        )
@@ -0,0 +1,99 @@
+"""
+Management Command: Urlaubs-Jahreswechsel (Übertrag bzw. Verfall) manuell ausführen
+
+Verwendung:
+    python manage.py vacation_year_end [--year JAHR] [--expire] [--dry-run] [--force]
+
+Ohne --dry-run muss das Jahr explizit angegeben werden. Der Übertrag läuft
+frühestens am 31.12. des Jahres, der Verfall frühestens am 31.03. - vorher
+nur mit --force (der Übertrag setzt vacation_year unumkehrbar weiter).
+
+Beispiele:
+    # Vorschau: Übertrag des aktuellen Jahres ins Folgejahr
+    python manage.py vacation_year_end --dry-run
+
+    # Übertrag für 2026 ausführen (idempotent, mehrfach ausführbar)
+    python manage.py vacation_year_end --year 2026
+
+    # Resturlaub im Urlaubsjahr 2027 verfallen lassen
+    python manage.py vacation_year_end --year 2027 --expire
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from absences.vacation_year_end import apply_carryover, apply_expiry
+
+
+class Command(BaseCommand):
+    help = 'Überträgt Resturlaub ins Folgejahr oder lässt ihn verfallen (set-basiert, idempotent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Urlaubsjahr (Pflicht ohne --dry-run; Vorschau-Standard: aktuelles Jahr)',
+        )
+        parser.add_argument(
+            '--expire',
+            action='store_true',
+            help='Übertrag verfallen lassen statt Resturlaub übertragen',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Testmodus - nur Änderungen anzeigen',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Auch vor dem Stichtag (31.12. bzw. 31.03.) ausführen',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if options['year'] is None and not dry_run:
+            raise CommandError('--year ist Pflicht (oder --dry-run für eine Vorschau)')
+        year = options['year'] if options['year'] is not None else timezone.now().year
+        if year < 1:
+            raise CommandError(f'Ungültiges Jahr: {year}')
+
+        # Stichtag wie bei den geplanten Tasks
+        cutoff = date(year, 3, 31) if options['expire'] else date(year, 12, 31)
+        if not dry_run and not options['force'] and timezone.now().date() < cutoff:
+            action = 'Verfall' if options['expire'] else 'Übertrag'
+            raise CommandError(
+                f"{action} für {year} erst ab {cutoff:%d.%m.%Y} - vorher nur mit --force"
+            )
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("⚠️  DRY RUN Modus - Keine Änderungen werden gespeichert!\n"))
+
+        start = time.perf_counter()
+        if options['expire']:
+            changes = apply_expiry(year, dry_run=dry_run)
+            for change in changes:
+                self.stdout.write(f"  {change['username']:20} | Verfall: {change['expired_days']:2} Tage")
+            summary = (
+                f"{len(changes)} Benutzer, "
+                f"{sum(change['expired_days'] for change in changes)} Tage verfallen"
+            )
+        else:
+            changes = apply_carryover(year, dry_run=dry_run)
+            for change in changes:
+                self.stdout.write(
+                    f"  {change['username']:20} | "
+                    f"Jahr: {change['old_vacation_year']} → {change['vacation_year']} | "
+                    f"Genommen: {change['taken']:2} | "
+                    f"Übertrag: {change['old_carryover']:2} → {change['carryover']:2} Tage"
+                )
+            summary = (
+                f"{len(changes)} Benutzer, "
+                f"{sum(change['carryover'] for change in changes)} Tage Übertrag"
+            )
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        style = self.style.NOTICE if dry_run else self.style.SUCCESS
+        self.stdout.write(style(f"✅ {year}: {summary} ({duration_ms:.0f} ms){' - DRY RUN' if dry_run else ''}"))
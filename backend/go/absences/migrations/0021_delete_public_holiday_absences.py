@@ -0,0 +1,30 @@
+# Generated by Django 5.0.9 on 2026-10-17 09:00
+
+from django.db import migrations
+
+
+def delete_public_holiday_absences(apps, schema_editor):
+    """
+    Entfernt die gespeicherten Feiertags-Abwesenheiten (eine Zeile pro User,
+    Jahr und Feiertag). Feiertage werden jetzt berechnet und in die
+    Abwesenheits-Listen zugemischt (absences.holiday_calendar).
+    """
+    Absence = apps.get_model('absences', 'Absence')
+    
+    deleted, _ = Absence.objects.filter(
+        absence_type__name='public_holiday'
+    ).delete()
+    
+    if deleted:
+        print(f"\n✓ {deleted} gespeicherte Feiertags-Einträge entfernt")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('absences', '0020_alter_absence_representative'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_public_holiday_absences, migrations.RunPython.noop),
+    ]
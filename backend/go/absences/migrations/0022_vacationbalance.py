@@ -0,0 +1,32 @@
+# Generated by Django 5.0.9 on 2026-10-17 04:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('absences', '0021_delete_public_holiday_absences'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacationBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Jahr')),
+                ('used_days', models.PositiveIntegerField(default=0, verbose_name='Genommene Urlaubstage')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vacation_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Urlaubskonto',
+                'verbose_name_plural': 'Urlaubskonten',
+                'ordering': ['user', '-year'],
+                'unique_together': {('user', 'year')},
+            },
+        ),
+    ]
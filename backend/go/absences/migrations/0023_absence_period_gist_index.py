@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-17 10:00
+
+from django.db import migrations
+
+
+INDEX_NAME = 'absences_absence_period_gist'
+
+
+def create_period_index(apps, schema_editor):
+    """
+    GiST-Index auf daterange(start_date, end_date, '[]') für die
+    Überschneidungs-Suche (absences.team_overlap.filter_overlapping).
+    Nur PostgreSQL - andere Datenbanken nutzen den B-Tree auf (start_date, end_date).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON absences_absence "
+        f"USING gist (daterange(start_date, end_date, '[]'))"
+    )
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('absences', '0022_vacationbalance'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_period_index, drop_period_index),
+    ]
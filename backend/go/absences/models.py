@@ -216,25 +216,12 @@ class Absence(models.Model):
         return 0
     
     def get_workday_count(self):
-        """Berechnet nur Werktage (Montag-Freitag)"""
+        """Berechnet Arbeitstage (Montag-Freitag ohne gesetzliche Feiertage)"""
         if not self.start_date or not self.end_date:
             return 0
-            
-        from datetime import date, timedelta
-        
-        start = self.start_date
-        end = self.end_date
-        workdays = 0
         
-        current_date = start
-        while current_date <= end:
-            # Montag = 0, Sonntag = 6
-            # Montag-Freitag = 0-4
-            if current_date.weekday() < 5:  # 0-4 = Mo-Fr
-                workdays += 1
-            current_date += timedelta(days=1)
-            
-        return workdays
+        from .holiday_calendar import count_workdays
+        return count_workdays(self.start_date, self.end_date)
     
     @property
     def workday_duration(self):
@@ -389,3 +376,26 @@ class AbsenceComment(models.Model):
     
     def __str__(self):
         return f"{self.author.get_full_name() or self.author.username}: {self.content[:50]}..."
+
+
+class VacationBalance(models.Model):
+    """
+    Urlaubskonto pro User und Jahr (materialisierte Summe)
+    
+    used_days = genommene Urlaubs-Arbeitstage (genehmigt/HR-bearbeitet) im Jahr.
+    Wird von den Absence-Signals gepflegt (absences.vacation_ledger) und kann
+    mit `manage.py rebuild_vacation_ledger` neu berechnet werden.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='vacation_balances')
+    year = models.PositiveIntegerField('Jahr')
+    used_days = models.PositiveIntegerField('Genommene Urlaubstage', default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Urlaubskonto'
+        verbose_name_plural = 'Urlaubskonten'
+        unique_together = [['user', 'year']]
+        ordering = ['user', '-year']
+    
+    def __str__(self):
+        return f"{self.user.username} {self.year}: {self.used_days} Tage"
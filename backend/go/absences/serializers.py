@@ -49,11 +49,21 @@ class UserMiniSerializer(serializers.ModelSerializer):
     def get_vacation_year(self, obj):
         return obj.profile.vacation_year if hasattr(obj, 'profile') and obj.profile else timezone.now().year
     
+    def _used_vacation_days(self, obj):
+        """Genommene Tage im aktuellen Jahr - aus vorgeladenen Konten (Listen) oder dem Konto"""
+        balances = self.context.get('vacation_balances')
+        if balances is not None and obj.id in balances:
+            return balances[obj.id]
+        used = obj.get_used_vacation_days()
+        if balances is not None:
+            balances[obj.id] = used
+        return used
+    
     def get_remaining_vacation_days(self, obj):
-        return obj.get_remaining_vacation_days()
+        return obj.get_remaining_vacation_days(used_days=self._used_vacation_days(obj))
     
     def get_used_vacation_days(self, obj):
-        return obj.get_used_vacation_days()
+        return self._used_vacation_days(obj)
 
 
 class AbsenceConflictSerializer(serializers.ModelSerializer):
@@ -87,6 +97,30 @@ class AbsenceCommentSerializer(serializers.ModelSerializer):
         return obj.author.get_full_name() or obj.author.username
 
 
+class AbsenceListSerializer(serializers.ListSerializer):
+    """
+    Lädt für Listen die Urlaubskonten aller vorkommenden User in einer Query
+    vor (context['vacation_balances']), statt pro UserMiniSerializer einzeln
+    """
+    USER_FIELDS = ('user_id', 'approved_by_id', 'rejected_by_id', 'representative_id', 'hr_processed_by_id')
+    
+    def to_representation(self, data):
+        from .vacation_ledger import get_used_days_bulk
+        
+        absences = list(data.all() if hasattr(data, 'all') else data)
+        if 'vacation_balances' not in self.context:
+            user_ids = {
+                getattr(absence, field)
+                for absence in absences
+                for field in self.USER_FIELDS
+                if getattr(absence, field, None)
+            }
+            self.context['vacation_balances'] = (
+                get_used_days_bulk(user_ids, timezone.now().year) if user_ids else {}
+            )
+        return super().to_representation(absences)
+
+
 class AbsenceSerializer(serializers.ModelSerializer):
     """Erweiterter Serializer für Abwesenheiten"""
     user = UserMiniSerializer(read_only=True)
@@ -126,6 +160,7 @@ class AbsenceSerializer(serializers.ModelSerializer):
             # Legacy field für Rückwärtskompatibilität
             'approved'
         ]
+        list_serializer_class = AbsenceListSerializer
         read_only_fields = [
             'id', 'user', 'status', 'approved_by', 'approved_at', 'approval_comment',
             'rejected_by', 'rejected_at', 'rejection_reason',
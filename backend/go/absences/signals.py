@@ -1,76 +1,14 @@
 """
-Signals für automatische Feiertags-Verwaltung und Chat-Integration
+Signals für den Feiertags-Typ und Chat-Integration
 """
-from django.db.models.signals import post_save, post_migrate
+from django.db.models.signals import post_delete, post_save, post_migrate, pre_save
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
-from django.utils import timezone
 from absences.models import AbsenceType, Absence
-from datetime import date, datetime
 import logging
 
-User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-def get_german_holidays(year):
-    """
-    Berechnet deutsche Feiertage für Hamburg
-    Returns: List of (date, name) tuples
-    """
-    holidays = []
-    
-    # Feste Feiertage
-    holidays.append((date(year, 1, 1), 'Neujahr'))
-    holidays.append((date(year, 5, 1), 'Tag der Arbeit'))
-    holidays.append((date(year, 10, 3), 'Tag der Deutschen Einheit'))
-    holidays.append((date(year, 10, 31), 'Reformationstag'))
-    holidays.append((date(year, 12, 25), '1. Weihnachtstag'))
-    holidays.append((date(year, 12, 26), '2. Weihnachtstag'))
-    
-    # Bewegliche Feiertage (basierend auf Ostern)
-    easter = calculate_easter(year)
-    
-    # Karfreitag (2 Tage vor Ostern)
-    from datetime import timedelta
-    good_friday = easter - timedelta(days=2)
-    holidays.append((good_friday, 'Karfreitag'))
-    
-    # Ostermontag (1 Tag nach Ostern)
-    easter_monday = easter + timedelta(days=1)
-    holidays.append((easter_monday, 'Ostermontag'))
-    
-    # Christi Himmelfahrt (39 Tage nach Ostern)
-    ascension = easter + timedelta(days=39)
-    holidays.append((ascension, 'Christi Himmelfahrt'))
-    
-    # Pfingstmontag (50 Tage nach Ostern)
-    whit_monday = easter + timedelta(days=50)
-    holidays.append((whit_monday, 'Pfingstmontag'))
-    
-    return sorted(holidays)
-
-
-def calculate_easter(year):
-    """Berechnet Ostersonntag nach Gauß'scher Osterformel"""
-    a = year % 19
-    b = year // 100
-    c = year % 100
-    d = b // 4
-    e = b % 4
-    f = (b + 8) // 25
-    g = (b - f + 1) // 3
-    h = (19 * a + b - d - g + 15) % 30
-    i = c // 4
-    k = c % 4
-    l = (32 + 2 * e + 2 * i - h - k) % 7
-    m = (a + 11 * h + 22 * l) // 451
-    month = (h + l - 7 * m + 114) // 31
-    day = ((h + l - 7 * m + 114) % 31) + 1
-    
-    return date(year, month, day)
-
-
 def ensure_public_holiday_type():
     """Stellt sicher, dass der PUBLIC_HOLIDAY AbsenceType existiert"""
     public_holiday_type, created = AbsenceType.objects.get_or_create(
@@ -88,86 +26,135 @@ def ensure_public_holiday_type():
     return public_holiday_type
 
 
-def create_holidays_for_user(user, years=None):
+@receiver(post_migrate)
+def ensure_holiday_type_after_migrate(sender, **kwargs):
     """
-    Erstellt Feiertage für einen bestimmten Benutzer
-    
-    Args:
-        user: User-Objekt
-        years: Liste von Jahren (default: aktuelles Jahr ± 5 Jahre)
+    Signal: Stellt nach der Migration sicher, dass der Feiertags-Typ existiert
+    Feiertage selbst werden berechnet (holiday_calendar), nicht gespeichert.
     """
-    if not user.is_active:
+    # Nur für die absences app ausführen
+    if sender.name != 'absences':
         return
     
-    if years is None:
-        current_year = timezone.now().year
-        # Erstelle Feiertage für aktuelles Jahr ± 5 Jahre
-        years = list(range(current_year - 5, current_year + 6))
+    ensure_public_holiday_type()
+
+
+# ============================================================================
+# URLAUBSKONTO (VacationBalance)
+# ============================================================================
+
+def _ledger_years(user_id, absence_type_name, status, start_date, end_date):
+    """(user_id, Jahre) einer zählenden Urlaubs-Abwesenheit, sonst None"""
+    from absences.vacation_ledger import COUNTED_STATUSES
     
-    public_holiday_type = ensure_public_holiday_type()
-    created_count = 0
+    if absence_type_name != AbsenceType.VACATION or status not in COUNTED_STATUSES:
+        return None
+    if not start_date or not end_date:
+        return None
+    return user_id, set(range(start_date.year, end_date.year + 1))
+
+
+def _ledger_state(absence):
+    return (
+        absence.user_id, absence.absence_type.name, absence.status,
+        absence.start_date, absence.end_date
+    )
+
+
+@receiver(pre_save, sender=Absence)
+def remember_vacation_ledger_state(sender, instance, **kwargs):
+    """Signal: Merkt sich den gespeicherten Zustand für Konto- und Badge-Abgleich"""
+    instance._vacation_ledger_previous = None
+    if instance.pk is None:
+        return
     
-    for year in years:
-        holidays = get_german_holidays(year)
-        
-        for holiday_date, holiday_name in holidays:
-            # Prüfe ob Abwesenheit bereits existiert
-            _, created = Absence.objects.get_or_create(
-                user=user,
-                absence_type=public_holiday_type,
-                start_date=holiday_date,
-                end_date=holiday_date,
-                defaults={
-                    'status': Absence.APPROVED,
-                    'reason': holiday_name,
-                    'manual_duration_days': 0,
-                    'hr_notified': True,
-                    'representative_confirmed': True,
-                }
-            )
-            if created:
-                created_count += 1
+    instance._vacation_ledger_previous = Absence.objects.filter(pk=instance.pk).values_list(
+        'user_id', 'absence_type__name', 'status', 'start_date', 'end_date'
+    ).first()
+
+
+def _update_vacation_ledger(*entries):
+    from absences.vacation_ledger import recalculate
     
-    return created_count
+    years_by_user = {}
+    for entry in entries:
+        if entry:
+            user_id, years = entry
+            years_by_user.setdefault(user_id, set()).update(years)
+    
+    for user_id, years in years_by_user.items():
+        try:
+            recalculate(user_id, years)
+        except Exception as e:
+            logger.error(f"❌ Urlaubskonto für User {user_id} konnte nicht aktualisiert werden: {e}")
 
 
-@receiver(post_save, sender=User)
-def create_holidays_for_new_user(sender, instance, created, **kwargs):
+@receiver(post_save, sender=Absence)
+def update_vacation_ledger_on_save(sender, instance, **kwargs):
     """
-    Signal: Erstellt automatisch Feiertage für neu angelegte Benutzer
+    Signal: Rechnet das Urlaubskonto neu, wenn ein Urlaub zählt oder gezählt hat
+    (Genehmigung, Ablehnung, Storno, geänderter Zeitraum/Typ)
     """
-    if created and instance.is_active:
-        # Erstelle Feiertage für aktuelles und nächstes Jahr
-        create_holidays_for_user(instance)
-        print(f"✓ Feiertage für Benutzer {instance.username} erstellt")
+    current = _ledger_state(instance)
+    previous = getattr(instance, '_vacation_ledger_previous', None)
+    if previous == current:
+        return
+    
+    _update_vacation_ledger(
+        _ledger_years(*previous) if previous else None,
+        _ledger_years(*current)
+    )
 
 
-@receiver(post_migrate)
-def ensure_all_users_have_holidays(sender, **kwargs):
+@receiver(post_delete, sender=Absence)
+def update_vacation_ledger_on_delete(sender, instance, **kwargs):
+    """Signal: Gelöschter Urlaub → Urlaubskonto neu rechnen"""
+    _update_vacation_ledger(_ledger_years(*_ledger_state(instance)))
+
+
+# ============================================================================
+# BADGE-ZÄHLER (ausstehende Anträge)
+# ============================================================================
+
+def _update_approval_badges(*entries):
     """
-    Signal: Stellt sicher, dass alle aktiven Benutzer Feiertage haben
-    Wird nach jeder Migration ausgeführt
+    Passt den Absence-Badge (ausstehende Anträge) der Vorgesetzten an
+    entries: (user_id, delta) - user_id ist der Antragsteller
     """
-    # Nur für die absences app ausführen
-    if sender.name != 'absences':
+    from auth_user.badge_helpers import adjust_badge_counter
+    from auth_user.models import UserProfile
+
+    for user_id, delta in entries:
+        supervisor_id = UserProfile.objects.filter(user_id=user_id).values_list(
+            'direct_supervisor_id', flat=True
+        ).first()
+        adjust_badge_counter([supervisor_id], 'absences', delta)
+
+
+@receiver(post_save, sender=Absence)
+def update_approval_badges_on_save(sender, instance, **kwargs):
+    """Signal: Antrag gestellt oder entschieden → Badge des Vorgesetzten"""
+    previous = getattr(instance, '_vacation_ledger_previous', None)
+    previous_user_id = previous[0] if previous else None
+    was_pending = bool(previous) and previous[2] == Absence.PENDING
+    is_pending = instance.status == Absence.PENDING
+
+    if was_pending and is_pending and previous_user_id == instance.user_id:
         return
-    
-    ensure_public_holiday_type()
-    
-    current_year = timezone.now().year
-    # Erstelle Feiertage für aktuelles Jahr ± 5 Jahre
-    years = list(range(current_year - 5, current_year + 6))
-    
-    # Hole alle aktiven Benutzer
-    users = User.objects.filter(is_active=True)
-    
-    total_created = 0
-    for user in users:
-        created = create_holidays_for_user(user, years=years)
-        total_created += created
-    
-    if total_created > 0:
-        print(f"✓ {total_created} Feiertags-Einträge für {users.count()} Benutzer erstellt/aktualisiert")
+
+    entries = []
+    if was_pending:
+        entries.append((previous_user_id, -1))
+    if is_pending:
+        entries.append((instance.user_id, 1))
+    _update_approval_badges(*entries)
+
+
+@receiver(post_delete, sender=Absence)
+def update_approval_badges_on_delete(sender, instance, **kwargs):
+    """Signal: Gelöschter offener Antrag → Badge des Vorgesetzten"""
+    if instance.status == Absence.PENDING:
+        _update_approval_badges((instance.user_id, -1))
 
 
 @receiver(post_save, sender=Absence)
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -220,168 +221,51 @@ def cleanup_old_absences():
 
 
 @shared_task
-def create_public_holidays_for_year(year=None):
-    """
-    Erstellt automatisch Feiertage für alle aktiven Benutzer für ein bestimmtes Jahr
-    Läuft automatisch am Jahresanfang
-    """
-    from django.contrib.auth import get_user_model
-    from .signals import create_holidays_for_user, ensure_public_holiday_type
-    
-    User = get_user_model()
-    
-    if year is None:
-        year = timezone.now().year
-    
-    try:
-        ensure_public_holiday_type()
-        
-        users = User.objects.filter(is_active=True)
-        total_created = 0
-        
-        for user in users:
-            created = create_holidays_for_user(user, years=[year])
-            total_created += created
-        
-        logger.info(f"✅ Created {total_created} public holiday entries for {users.count()} users for year {year}")
-        return {
-            'year': year,
-            'users': users.count(),
-            'created_entries': total_created
-        }
-        
-    except Exception as exc:
-        logger.error(f"❌ Public holiday creation failed: {exc}")
-        raise
-
-
-@shared_task
-def ensure_next_year_holidays():
-    """
-    Stellt sicher, dass Feiertage für das nächste Jahr existieren
-    Läuft automatisch täglich, erstellt aber nur im Dezember Feiertage fürs Folgejahr
-    """
-    current_month = timezone.now().month
-    
-    # Nur im Dezember ausführen
-    if current_month != 12:
-        logger.info("⏭️  Skipping next year holiday creation (not December)")
-        return {'skipped': True, 'reason': 'Not December'}
-    
-    next_year = timezone.now().year + 1
-    logger.info(f"🎄 Creating holidays for next year ({next_year}) - December detected")
-    return create_public_holidays_for_year(next_year)
-
-
-@shared_task
-def calculate_carryover_vacation():
+def calculate_carryover_vacation(year=None, dry_run=False):
     """
     🆕 Phase 2: Berechnet Resturlaub zum Jahresende (31.12.)
     
     Läuft automatisch täglich, aber führt nur am 31. Dezember aus
+    (mit year-Parameter sofort, z.B. für einen Nachlauf).
     
-    Logik:
-    1. Für jeden aktiven User:
-       - Aktuelles vacation_entitlement (z.B. 30 Tage)
-       - Genommene Urlaubstage im aktuellen Jahr (affects_vacation_balance=True)
-       - Resturlaub = vacation_entitlement - genommene_tage
-    2. Übertrag ins nächste Jahr (max. gesetzliche Grenze, z.B. 20 Tage)
-    3. UserProfile.carryover_vacation aktualisieren
-    4. UserProfile.vacation_year auf nächstes Jahr setzen
+    Logik (set-basiert, siehe vacation_year_end.apply_carryover):
+    1. Für alle aktiven User, die noch nicht ins Folgejahr gewechselt sind:
+       - Resturlaub = Anspruch (+ Übertrag) - genommene Urlaubstage
+    2. Übertrag ins nächste Jahr (max. MAX_CARRYOVER Tage)
+    3. UserProfile.carryover_vacation und vacation_year per bulk_update
+    
+    dry_run: Nur Diff zurückgeben, nichts speichern
     """
-    from django.contrib.auth import get_user_model
-    from auth_user.models import UserProfile
-    from .models import Absence, AbsenceType
-    from django.db.models import Q, Sum
-    from datetime import date
+    from .vacation_year_end import apply_carryover
     
-    User = get_user_model()
     today = timezone.now().date()
     
-    # Nur am 31. Dezember ausführen
-    if today.month != 12 or today.day != 31:
-        logger.info(f"⏭️  Skipping carryover calculation (today is {today}, not December 31st)")
-        return {'skipped': True, 'reason': 'Not December 31st', 'date': str(today)}
-    
-    current_year = today.year
-    next_year = current_year + 1
-    
-    # Maximaler Übertrag (gesetzliche Regelung)
-    MAX_CARRYOVER = 20
+    if year is None:
+        # Nur am 31. Dezember ausführen
+        if today.month != 12 or today.day != 31:
+            logger.info(f"⏭️  Skipping carryover calculation (today is {today}, not December 31st)")
+            return {'skipped': True, 'reason': 'Not December 31st', 'date': str(today)}
+        year = today.year
     
     try:
-        users = User.objects.filter(is_active=True).select_related('profile')
-        results = {
-            'processed': 0,
-            'errors': [],
-            'details': []
-        }
-        
-        for user in users:
-            try:
-                profile = getattr(user, 'profile', None)
-                if not profile:
-                    logger.warning(f"⚠️  User {user.username} hat kein Profil - überspringe")
-                    continue
-                
-                # Jahresurlaubsanspruch
-                vacation_entitlement = profile.vacation_entitlement or 30
-                
-                # Genommene Urlaubstage im aktuellen Jahr
-                # Nur genehmigte Abwesenheiten mit affects_vacation_balance=True
-                taken_vacation_days = Absence.objects.filter(
-                    user=user,
-                    start_date__year=current_year,
-                    status='approved',
-                    absence_type__affects_vacation_balance=True
-                ).aggregate(
-                    total_days=Sum(
-                        models.F('end_date') - models.F('start_date') + timedelta(days=1)
-                    )
-                )['total_days'] or 0
-                
-                # Resturlaub berechnen
-                remaining_vacation = vacation_entitlement - taken_vacation_days
-                
-                # Übertrag berechnen (max. MAX_CARRYOVER)
-                carryover = max(0, min(remaining_vacation, MAX_CARRYOVER))
-                
-                # UserProfile aktualisieren
-                old_carryover = profile.carryover_vacation
-                profile.carryover_vacation = carryover
-                profile.vacation_year = next_year
-                profile.save(update_fields=['carryover_vacation', 'vacation_year'])
-                
-                results['processed'] += 1
-                results['details'].append({
-                    'user': user.username,
-                    'entitlement': vacation_entitlement,
-                    'taken': taken_vacation_days,
-                    'remaining': remaining_vacation,
-                    'carryover': carryover,
-                    'old_carryover': old_carryover
-                })
-                
-                logger.info(
-                    f"✅ {user.username}: "
-                    f"Anspruch={vacation_entitlement}, "
-                    f"Genommen={taken_vacation_days}, "
-                    f"Rest={remaining_vacation}, "
-                    f"Übertrag={carryover}"
-                )
-                
-            except Exception as user_exc:
-                error_msg = f"User {user.username}: {str(user_exc)}"
-                logger.error(f"❌ {error_msg}")
-                results['errors'].append(error_msg)
+        start = time.perf_counter()
+        changes = apply_carryover(year, dry_run=dry_run)
+        duration_ms = round((time.perf_counter() - start) * 1000)
         
         logger.info(
-            f"🎉 Resturlaub-Berechnung abgeschlossen: "
-            f"{results['processed']} User verarbeitet, "
-            f"{len(results['errors'])} Fehler"
+            f"🎉 Resturlaub-Berechnung {year}{' (dry run)' if dry_run else ''} abgeschlossen: "
+            f"{len(changes)} User, "
+            f"{sum(change['carryover'] for change in changes)} Tage Übertrag "
+            f"({duration_ms} ms)"
         )
         
-        return results
+        return {
+            'year': year,
+            'dry_run': dry_run,
+            'processed': len(changes),
+            'details': changes,
+            'duration_ms': duration_ms
+        }
         
     except Exception as exc:
         logger.error(f"❌ calculate_carryover_vacation failed: {exc}")
@@ -389,69 +273,51 @@ def calculate_carryover_vacation():
 
 
 @shared_task
-def expire_carryover_vacation():
+def expire_carryover_vacation(year=None, dry_run=False):
     """
     🆕 Phase 2: Lässt Resturlaub verfallen (31.03.)
     
     Läuft automatisch täglich, aber führt nur am 31. März aus
+    (mit year-Parameter sofort).
     
     Logik:
-    1. Für jeden aktiven User:
-       - carryover_vacation auf 0 setzen
+    1. carryover_vacation aller aktiven User im Urlaubsjahr auf 0 (ein UPDATE)
     2. Gesetzliche Regelung: Resturlaub verfällt spätestens am 31.03.
+    
+    dry_run: Nur Diff zurückgeben, nichts speichern
     """
-    from django.contrib.auth import get_user_model
-    from auth_user.models import UserProfile
+    from .vacation_year_end import apply_expiry
     
-    User = get_user_model()
     today = timezone.now().date()
     
-    # Nur am 31. März ausführen
-    if today.month != 3 or today.day != 31:
-        logger.info(f"⏭️  Skipping carryover expiry (today is {today}, not March 31st)")
-        return {'skipped': True, 'reason': 'Not March 31st', 'date': str(today)}
-    
-    current_year = today.year
+    if year is None:
+        # Nur am 31. März ausführen
+        if today.month != 3 or today.day != 31:
+            logger.info(f"⏭️  Skipping carryover expiry (today is {today}, not March 31st)")
+            return {'skipped': True, 'reason': 'Not March 31st', 'date': str(today)}
+        year = today.year
     
     try:
-        users = User.objects.filter(is_active=True).select_related('profile')
-        results = {
-            'processed': 0,
-            'total_expired_days': 0,
-            'errors': []
-        }
-        
-        for user in users:
-            try:
-                profile = getattr(user, 'profile', None)
-                if not profile:
-                    logger.warning(f"⚠️  User {user.username} hat kein Profil - überspringe")
-                    continue
-                
-                expired_days = profile.carryover_vacation
-                
-                if expired_days > 0:
-                    profile.carryover_vacation = 0
-                    profile.save(update_fields=['carryover_vacation'])
-                    
-                    results['total_expired_days'] += expired_days
-                    logger.info(f"⏰ {user.username}: {expired_days} Resturlaub-Tage verfallen")
-                
-                results['processed'] += 1
-                
-            except Exception as user_exc:
-                error_msg = f"User {user.username}: {str(user_exc)}"
-                logger.error(f"❌ {error_msg}")
-                results['errors'].append(error_msg)
+        start = time.perf_counter()
+        changes = apply_expiry(year, dry_run=dry_run)
+        duration_ms = round((time.perf_counter() - start) * 1000)
+        total_expired_days = sum(change['expired_days'] for change in changes)
         
         logger.info(
-            f"🗓️  Resturlaub-Verfall abgeschlossen: "
-            f"{results['processed']} User verarbeitet, "
-            f"{results['total_expired_days']} Tage insgesamt verfallen, "
-            f"{len(results['errors'])} Fehler"
+            f"🗓️  Resturlaub-Verfall {year}{' (dry run)' if dry_run else ''} abgeschlossen: "
+            f"{len(changes)} User, "
+            f"{total_expired_days} Tage insgesamt verfallen "
+            f"({duration_ms} ms)"
         )
         
-        return results
+        return {
+            'year': year,
+            'dry_run': dry_run,
+            'processed': len(changes),
+            'total_expired_days': total_expired_days,
+            'details': changes,
+            'duration_ms': duration_ms
+        }
         
     except Exception as exc:
         logger.error(f"❌ expire_carryover_vacation failed: {exc}")
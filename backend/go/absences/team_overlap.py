@@ -0,0 +1,196 @@
+"""
+Team-Überschneidungen und Team-Besetzung
+
+Teamkollegen sind die aktiven User, die mit dem Antragsteller in einem aktiven
+Team sind (Team.members oder Team.lead). Überlappende Abwesenheiten werden in
+einer Query gesucht:
+- PostgreSQL: daterange(start_date, end_date, '[]') && Zeitraum, gestützt vom
+  GiST-Index absences_absence_period_gist (Migration 0023)
+- andere Datenbanken: start_date <= Ende AND end_date >= Start
+
+Konflikte werden per bulk_create geschrieben; team_coverage() liefert die
+tägliche Besetzung eines Teams für einen Monat.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, Func, Q, Value
+
+# Abwesenheiten in diesen Status erzeugen Konflikte
+CONFLICT_STATUSES = ('pending', 'approved', 'hr_processed')
+
+# In der Besetzung zählen diese Status als abwesend, pending separat
+COVERAGE_ABSENT_STATUSES = ('approved', 'hr_processed')
+
+
+def filter_overlapping(queryset, start, end):
+    """Abwesenheiten, die [start, end] (inklusive) berühren"""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.fields import DateRangeField
+        from django.db.backends.postgresql.psycopg_any import DateRange
+
+        # Gleicher Ausdruck wie im GiST-Index, damit der Planner ihn nutzt
+        period = Func(
+            F('start_date'), F('end_date'), Value('[]'),
+            function='daterange', output_field=DateRangeField()
+        )
+        return queryset.annotate(period=period).filter(period__overlap=DateRange(start, end, '[]'))
+    return queryset.filter(start_date__lte=end, end_date__gte=start)
+
+
+def team_member_ids(teams):
+    """Subquery: IDs der aktiven Mitglieder und Leads der Teams"""
+    return get_user_model().objects.filter(
+        Q(teams__in=teams) | Q(led_teams__in=teams),
+        is_active=True
+    ).values('pk')
+
+
+def teammate_ids(user_id):
+    """Subquery: Teamkollegen des Users aus allen seinen aktiven Teams"""
+    from auth_user.models import Team
+
+    teams = Team.objects.filter(
+        Q(members=user_id) | Q(lead_id=user_id),
+        is_active=True
+    ).values('pk')
+    return team_member_ids(teams).exclude(pk=user_id)
+
+
+def detect_conflicts(absence):
+    """
+    Ermittelt Team- und Vertretungskonflikte einer Abwesenheit
+
+    Offene Konflikte dieser Typen werden ersetzt, damit ein erneuter Aufruf
+    (z.B. nach Datumsänderung) keine Duplikate erzeugt.
+
+    Returns:
+        list: angelegte AbsenceConflict-Objekte
+    """
+    from .models import Absence, AbsenceConflict
+
+    conflicts = []
+
+    # Team-Überschneidungen: alle Teamkollegen in einer Query
+    overlapping_absences = filter_overlapping(
+        Absence.objects.filter(user_id__in=teammate_ids(absence.user_id), status__in=CONFLICT_STATUSES),
+        absence.start_date, absence.end_date
+    ).exclude(pk=absence.pk).select_related('user')
+
+    for overlap in overlapping_absences:
+        conflicts.append(AbsenceConflict(
+            absence=absence,
+            conflict_type=AbsenceConflict.TEAM_OVERLAP,
+            conflicting_absence=overlap,
+            description=f"Überschneidung mit {overlap.user.get_full_name()} vom {overlap.start_date} bis {overlap.end_date}",
+            severity='medium'
+        ))
+
+    # Vertretungskonflikt
+    if absence.representative_id:
+        rep_conflicts = filter_overlapping(
+            Absence.objects.filter(user_id=absence.representative_id, status__in=CONFLICT_STATUSES),
+            absence.start_date, absence.end_date
+        ).exclude(pk=absence.pk)
+
+        for rep_conflict in rep_conflicts:
+            conflicts.append(AbsenceConflict(
+                absence=absence,
+                conflict_type=AbsenceConflict.REPRESENTATIVE_CONFLICT,
+                conflicting_absence=rep_conflict,
+                description=f"Vertretung {absence.representative.get_full_name()} ist selbst abwesend",
+                severity='high'
+            ))
+
+    AbsenceConflict.objects.filter(
+        absence=absence,
+        resolved=False,
+        conflict_type__in=[AbsenceConflict.TEAM_OVERLAP, AbsenceConflict.REPRESENTATIVE_CONFLICT]
+    ).delete()
+    return AbsenceConflict.objects.bulk_create(conflicts)
+
+
+def team_coverage(team, year, month, detail_filter=None):
+    """
+    Tägliche Besetzung eines Teams in einem Monat
+
+    Args:
+        detail_filter: Optional Scope-Filter (Absence-QuerySet → sichtbare
+            Abwesenheiten). Liegt eine Abwesenheit des Monats außerhalb,
+            enthält die Antwort nur Zahlen (detailed=False) - keine User und
+            Abwesenheitstypen (z.B. Krankheit).
+
+    Returns:
+        dict: {'team', 'month', 'detailed', 'member_count', 'members', 'days':
+        [{'date', 'is_workday', 'holiday', 'present', 'absent_count',
+        'pending_count', 'coverage', 'absent', 'pending'}]}
+        - absent/pending: nur bei detailed, Listen von {'user_id', 'absence_type', 'status'}
+        - present: Mitglieder ohne genehmigte Abwesenheit
+    """
+    from .holiday_calendar import get_holidays_between
+    from .models import Absence
+
+    first_day = date(year, month, 1)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+
+    members = list(
+        get_user_model().objects.filter(pk__in=team_member_ids([team.pk]))
+        .order_by('last_name', 'first_name')
+        .values('id', 'username', 'first_name', 'last_name')
+    )
+    member_count = len(members)
+
+    month_absences = filter_overlapping(
+        Absence.objects.filter(
+            user_id__in=[member['id'] for member in members],
+            status__in=COVERAGE_ABSENT_STATUSES + ('pending',)
+        ),
+        first_day, last_day
+    )
+    detailed = detail_filter is None or not month_absences.exclude(
+        pk__in=detail_filter(Absence.objects.all()).values('pk')
+    ).exists()
+    absences = month_absences.values_list('user_id', 'start_date', 'end_date', 'absence_type__name', 'status')
+
+    # Pro Tag: {user_id: (absence_type, status)} - genehmigt schlägt pending
+    absent_by_day = [{} for _ in range(last_day.day)]
+    pending_by_day = [{} for _ in range(last_day.day)]
+    for user_id, start_date, end_date, absence_type, status in absences:
+        target = absent_by_day if status in COVERAGE_ABSENT_STATUSES else pending_by_day
+        day = max(start_date, first_day)
+        while day <= min(end_date, last_day):
+            target[day.day - 1][user_id] = {'user_id': user_id, 'absence_type': absence_type, 'status': status}
+            day += timedelta(days=1)
+
+    holidays = dict(get_holidays_between(first_day, last_day))
+
+    days = []
+    for index in range(last_day.day):
+        day = first_day + timedelta(days=index)
+        absent = absent_by_day[index]
+        pending = [entry for user_id, entry in pending_by_day[index].items() if user_id not in absent]
+        present = member_count - len(absent)
+        entry = {
+            'date': day.isoformat(),
+            'is_workday': day.weekday() < 5 and day not in holidays,
+            'holiday': holidays.get(day),
+            'present': present,
+            'absent_count': len(absent),
+            'pending_count': len(pending),
+            'coverage': round(present / member_count, 2) if member_count else None,
+        }
+        if detailed:
+            entry['absent'] = list(absent.values())
+            entry['pending'] = pending
+        days.append(entry)
+
+    return {
+        'team': {'id': team.pk, 'name': team.name},
+        'month': f'{year:04d}-{month:02d}',
+        'detailed': detailed,
+        'member_count': member_count,
+        'members': members,
+        'days': days,
+    }
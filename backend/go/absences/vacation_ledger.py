@@ -0,0 +1,130 @@
+"""
+Urlaubskonto (VacationBalance) pro User und Jahr
+
+Genommene Urlaubstage werden nicht mehr bei jedem Zugriff aus allen
+Abwesenheiten aufsummiert, sondern als used_days pro (User, Jahr)
+materialisiert:
+- Absence-Signals rechnen betroffene (User, Jahr)-Paare bei Änderungen an
+  Status, Typ oder Zeitraum neu (signals.py)
+- Lesezugriffe gehen auf das Konto; fehlt eine Zeile, wird sie angelegt
+- rebuild_balances() rechnet Konten in Bulk neu (rebuild_vacation_ledger)
+
+Gezählt werden Arbeitstage (Mo-Fr ohne Feiertage) genehmigter bzw.
+HR-bearbeiteter Urlaube; jahresübergreifende Urlaube werden anteilig den
+Jahren zugeordnet.
+"""
+from datetime import date
+
+from django.db.models import Q
+
+# Status, die das Urlaubskonto belasten
+COUNTED_STATUSES = ('approved', 'hr_processed')
+
+
+def vacation_days_by_year(start_date, end_date):
+    """Urlaubs-Arbeitstage eines Zeitraums, aufgeteilt nach Jahren → {year: days}"""
+    from .holiday_calendar import count_workdays
+
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        days[year] = count_workdays(max(start_date, date(year, 1, 1)), min(end_date, date(year, 12, 31)))
+    return days
+
+
+def counted_vacations(user_ids, years):
+    """QuerySet der zählenden Urlaube der User, die eines der Jahre berühren"""
+    from .models import Absence, AbsenceType
+
+    overlap = Q()
+    for year in years:
+        overlap |= Q(start_date__lte=date(year, 12, 31), end_date__gte=date(year, 1, 1))
+
+    return Absence.objects.filter(
+        overlap,
+        user_id__in=user_ids,
+        absence_type__name=AbsenceType.VACATION,
+        status__in=COUNTED_STATUSES
+    )
+
+
+def compute_used_days(user_ids, years):
+    """Genommene Urlaubstage aus den Abwesenheiten → {(user_id, year): days}"""
+    years = set(years)
+    used = {(user_id, year): 0 for user_id in user_ids for year in years}
+    for user_id, start_date, end_date in counted_vacations(user_ids, years).values_list(
+        'user_id', 'start_date', 'end_date'
+    ):
+        for year, days in vacation_days_by_year(start_date, end_date).items():
+            if year in years:
+                used[(user_id, year)] += days
+    return used
+
+
+def _store(used):
+    from .models import VacationBalance
+
+    VacationBalance.objects.bulk_create(
+        [
+            VacationBalance(user_id=user_id, year=year, used_days=days)
+            for (user_id, year), days in used.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'year'],
+        update_fields=['used_days', 'updated_at']
+    )
+
+
+def recalculate(user_id, years):
+    """Rechnet die Konten eines Users für die Jahre neu (nach Absence-Änderungen)"""
+    if not years:
+        return
+    _store(compute_used_days([user_id], years))
+
+
+def get_used_days_bulk(user_ids, year):
+    """
+    Genommene Urlaubstage mehrerer User für ein Jahr → {user_id: days}
+
+    Eine Query auf die Konten; fehlende Konten werden in einem Rutsch
+    berechnet und angelegt.
+    """
+    from .models import VacationBalance
+
+    user_ids = set(user_ids)
+    used = dict(
+        VacationBalance.objects.filter(user_id__in=user_ids, year=year).values_list('user_id', 'used_days')
+    )
+    missing = user_ids - used.keys()
+    if missing:
+        computed = compute_used_days(missing, [year])
+        _store(computed)
+        used.update({user_id: days for (user_id, _), days in computed.items()})
+    return used
+
+
+def get_used_days(user, year):
+    return get_used_days_bulk([user.pk], year)[user.pk]
+
+
+def rebuild_balances(years, user_ids=None):
+    """
+    Rechnet Urlaubskonten in Bulk neu
+
+    Args:
+        years: Jahre
+        user_ids: Optional auf diese User beschränken (sonst alle aktiven
+            User plus alle mit vorhandenem Konto in den Jahren)
+
+    Returns:
+        int: Anzahl geschriebener Konten
+    """
+    from django.contrib.auth import get_user_model
+    from .models import VacationBalance
+
+    if user_ids is None:
+        user_ids = set(get_user_model().objects.filter(is_active=True).values_list('id', flat=True))
+        user_ids |= set(VacationBalance.objects.filter(year__in=years).values_list('user_id', flat=True))
+
+    used = compute_used_days(user_ids, years)
+    _store(used)
+    return len(used)
@@ -0,0 +1,140 @@
+"""
+Urlaubs-Jahreswechsel: Resturlaub übertragen (31.12.) und verfallen lassen (31.03.)
+
+Set-basiert statt Schleife über alle User:
+- Profile und genommene Tage (Urlaubskonto-Logik aus vacation_ledger) werden
+  für alle User auf einmal geladen
+- Änderungen gehen per bulk_update in Chunks innerhalb einer Transaktion raus
+- dry_run liefert nur den Diff, ohne zu schreiben
+
+Idempotent über UserProfile.vacation_year: Der Übertrag betrifft nur Profile,
+die noch nicht ins Folgejahr gewechselt sind; der Verfall nur Profile im
+laufenden Urlaubsjahr mit Übertrag > 0. Ein erneuter Lauf (z.B. Retry nach
+Absturz) findet nichts mehr zu tun.
+"""
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Maximaler Übertrag ins Folgejahr (gesetzliche Regelung)
+MAX_CARRYOVER = 20
+
+# Profile pro UPDATE-Statement
+YEAR_END_BATCH_SIZE = 500
+
+
+def _pending_carryover_profiles(year):
+    """Profile aktiver User, die noch nicht ins Folgejahr gewechselt sind"""
+    from auth_user.models import UserProfile
+
+    return UserProfile.objects.filter(user__is_active=True, vacation_year__lte=year)
+
+
+def plan_carryover(year, profiles=None):
+    """
+    Berechnet den Übertrag aller offenen Profile für das Jahr
+
+    Resturlaub wie User.get_remaining_vacation_days(): Anspruch (+ Übertrag,
+    falls das Profil im Jahr steht) abzüglich genommener Urlaubstage.
+
+    Returns:
+        list: Diff-Einträge {'user_id', 'username', 'entitlement',
+        'taken', 'remaining', 'old_carryover', 'carryover', 'old_vacation_year',
+        'vacation_year'}
+    """
+    from .vacation_ledger import compute_used_days
+
+    if profiles is None:
+        profiles = _pending_carryover_profiles(year)
+    rows = list(profiles.values(
+        'user_id', 'user__username', 'vacation_entitlement', 'carryover_vacation', 'vacation_year'
+    ))
+    used = compute_used_days([row['user_id'] for row in rows], [year])
+
+    changes = []
+    for row in rows:
+        entitlement = row['vacation_entitlement']
+        if row['vacation_year'] == year:
+            entitlement += row['carryover_vacation']
+        taken = used[(row['user_id'], year)]
+        remaining = max(0, entitlement - taken)
+        changes.append({
+            'user_id': row['user_id'],
+            'username': row['user__username'],
+            'entitlement': entitlement,
+            'taken': taken,
+            'remaining': remaining,
+            'old_carryover': row['carryover_vacation'],
+            'carryover': min(remaining, MAX_CARRYOVER),
+            'old_vacation_year': row['vacation_year'],
+            'vacation_year': year + 1,
+        })
+    return changes
+
+
+def _bulk_update_profiles(values, fields, batch_size):
+    """Schreibt {user_id: {field: value}} per bulk_update (user ist PK des Profils)"""
+    from auth_user.models import UserProfile
+
+    profiles = [UserProfile(pk=user_id, **field_values) for user_id, field_values in values.items()]
+    UserProfile.objects.bulk_update(profiles, fields, batch_size=batch_size)
+
+
+def apply_carryover(year, dry_run=False, batch_size=YEAR_END_BATCH_SIZE):
+    """
+    Überträgt den Resturlaub des Jahres ins Folgejahr
+
+    Returns:
+        list: Diff wie plan_carryover() - bei dry_run ohne Änderungen
+    """
+    if dry_run:
+        return plan_carryover(year)
+
+    with transaction.atomic():
+        # Sperre verhindert, dass parallele Läufe dieselben Profile übertragen
+        profiles = _pending_carryover_profiles(year).select_for_update()
+        changes = plan_carryover(year, profiles)
+        _bulk_update_profiles(
+            {
+                change['user_id']: {
+                    'carryover_vacation': change['carryover'],
+                    'vacation_year': change['vacation_year'],
+                }
+                for change in changes
+            },
+            ['carryover_vacation', 'vacation_year'],
+            batch_size
+        )
+    return changes
+
+
+def apply_expiry(year, dry_run=False):
+    """
+    Lässt den Übertrag im Urlaubsjahr verfallen (carryover_vacation → 0)
+
+    Returns:
+        list: Diff-Einträge {'user_id', 'username', 'expired_days'}
+    """
+    from auth_user.models import UserProfile
+
+    with transaction.atomic():
+        profiles = UserProfile.objects.filter(
+            user__is_active=True, vacation_year=year, carryover_vacation__gt=0
+        )
+        if not dry_run:
+            profiles = profiles.select_for_update()
+        changes = [
+            {
+                'user_id': row['user_id'],
+                'username': row['user__username'],
+                'expired_days': row['carryover_vacation'],
+            }
+            for row in profiles.values('user_id', 'user__username', 'carryover_vacation')
+        ]
+        if changes and not dry_run:
+            UserProfile.objects.filter(
+                pk__in=[change['user_id'] for change in changes]
+            ).update(carryover_vacation=0)
+    return changes
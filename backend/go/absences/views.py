@@ -1,4 +1,4 @@
-from .models import Absence, AbsenceType, AbsenceConflict
+from .models import Absence, AbsenceType
 from .serializers import (
     AbsenceSerializer, AbsenceCreateSerializer, AbsenceApprovalSerializer, 
     AbsenceHRSerializer, AbsenceTypeSerializer, AbsenceConflictSerializer
@@ -57,7 +57,7 @@ class IsSupervisorPermission(permissions.BasePermission):
             return True
         
         # Check 2: Ist User AL oder BL in einem Department?
-        from auth_user.models import DepartmentMember
+        from auth_user.profile_models import DepartmentMember
         is_leader = DepartmentMember.objects.filter(
             user=user,
             role__code__in=['AL', 'BL', 'GF', 'GF_OPS'],
@@ -88,7 +88,7 @@ class IsSupervisorPermission(permissions.BasePermission):
         
         # Check 2: Department-Hierarchie
         # Hole alle Departments des Mitarbeiters
-        from auth_user.models import DepartmentMember
+        from auth_user.profile_models import DepartmentMember
         
         employee_departments = DepartmentMember.objects.filter(
             user=employee,
@@ -160,29 +160,39 @@ class AbsenceViewSet(viewsets.ModelViewSet):
         
         user = self.request.user
         base_queryset = Absence.objects.select_related(
-            'user', 'absence_type', 'approved_by', 'representative'
-        ).all()
+            'user', 'absence_type', 'approved_by', 'representative',
+            'user__profile', 'approved_by__profile', 'representative__profile'
+        ).prefetch_related(
+            'comments__author__profile',
+            'conflicts__conflicting_absence__user',
+            'conflicts__conflicting_absence__absence_type'
+        )
         
-        # Prüfe ob ein Jahr-Parameter übergeben wurde und erstelle ggf. Feiertage
+        # Wende Permission-Scope-Filter an
+        return ScopeQuerySetMixin.filter_absences_by_scope(base_queryset, user)
+    
+    def _with_holidays(self, absences_data):
+        """
+        Mischt die berechneten Feiertage (virtuell, ohne DB-Zeilen) in die Liste
+        Jahr über ?year=, sonst Vorjahr bis Folgejahr
+        """
+        from .holiday_calendar import get_holiday_years, merge_holiday_absences
+        
+        year = None
         year_param = self.request.query_params.get('year')
         if year_param:
             try:
                 year = int(year_param)
-                # Stelle sicher, dass Feiertage für dieses Jahr existieren
-                self._ensure_holidays_for_year(user, year)
             except (ValueError, TypeError):
                 pass
         
-        # Wende Permission-Scope-Filter an
-        return ScopeQuerySetMixin.filter_absences_by_scope(base_queryset, user)
+        return merge_holiday_absences(absences_data, self.request.user, get_holiday_years(year))
     
-    def _ensure_holidays_for_year(self, user, year):
-        """Stellt sicher, dass Feiertage für ein bestimmtes Jahr existieren"""
-        from .signals import create_holidays_for_user
-        try:
-            create_holidays_for_user(user, years=[year])
-        except Exception as e:
-            logger.warning(f"Could not create holidays for year {year}: {e}")
+    def list(self, request, *args, **kwargs):
+        """Abwesenheiten im Scope + Feiertage aller enthaltenen User"""
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self._with_holidays(serializer.data))
     
     def perform_create(self, serializer):
         absence = serializer.save(user=self.request.user)
@@ -276,6 +286,10 @@ class AbsenceViewSet(viewsets.ModelViewSet):
         # Speichern
         absence = serializer.save()
         
+        # Zeitraum geändert → Konflikte neu ermitteln
+        if 'start_date' in changes or 'end_date' in changes:
+            self._check_conflicts(absence)
+        
         # Chat-Benachrichtigung senden wenn Status zurückgesetzt wurde
         if changes and old_status == Absence.APPROVED and absence.conversation:
             try:
@@ -291,47 +305,10 @@ class AbsenceViewSet(viewsets.ModelViewSet):
                 logger.error(f"Fehler beim Senden der Änderungsbenachrichtigung: {str(e)}", exc_info=True)
     
     def _check_conflicts(self, absence):
-        """Überprüft Abwesenheitskonflikte"""
-        conflicts = []
-        
-        # Team-Überschneidungen prüfen
-        overlapping_absences = Absence.objects.filter(
-            user__in=absence.user.team.all() if hasattr(absence.user, 'team') else [],
-            status__in=[Absence.APPROVED, Absence.PENDING],
-            start_date__lte=absence.end_date,
-            end_date__gte=absence.start_date
-        ).exclude(id=absence.id)
-        
-        for overlap in overlapping_absences:
-            conflict = AbsenceConflict.objects.create(
-                absence=absence,
-                conflict_type=AbsenceConflict.TEAM_OVERLAP,
-                conflicting_absence=overlap,
-                description=f"Überschneidung mit {overlap.user.get_full_name()} vom {overlap.start_date} bis {overlap.end_date}",
-                severity='medium'
-            )
-            conflicts.append(conflict)
-        
-        # Vertretungskonflikt prüfen
-        if absence.representative:
-            rep_conflicts = Absence.objects.filter(
-                user=absence.representative,
-                status__in=[Absence.APPROVED, Absence.PENDING],
-                start_date__lte=absence.end_date,
-                end_date__gte=absence.start_date
-            )
-            
-            for rep_conflict in rep_conflicts:
-                conflict = AbsenceConflict.objects.create(
-                    absence=absence,
-                    conflict_type=AbsenceConflict.REPRESENTATIVE_CONFLICT,
-                    conflicting_absence=rep_conflict,
-                    description=f"Vertretung {absence.representative.get_full_name()} ist selbst abwesend",
-                    severity='high'
-                )
-                conflicts.append(conflict)
+        """Überprüft Abwesenheitskonflikte (Team-Überschneidung, Vertretung)"""
+        from .team_overlap import detect_conflicts
         
-        return conflicts
+        return detect_conflicts(absence)
     
     def _send_approval_request_email(self, absence):
         """Sendet E-Mail-Benachrichtigung an Vorgesetzten"""
@@ -468,7 +445,7 @@ Das Abwesenheitssystem
             user=request.user
         )
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(self._with_holidays(serializer.data))
     
     @action(detail=False, methods=['get'], permission_classes=[IsSupervisorPermission])
     def pending_approvals(self, request):
@@ -596,16 +573,61 @@ Das Abwesenheitssystem
         vacation_entitlement = profile.vacation_entitlement if profile else 0
         carryover_vacation = profile.carryover_vacation if profile else 0
         vacation_year = profile.vacation_year if profile else current_year
+        used_vacation_days = user.get_used_vacation_days(current_year)
         
         return Response({
             'vacation_entitlement': vacation_entitlement,
             'carryover_vacation': carryover_vacation,
             'vacation_year': vacation_year,
-            'used_vacation_days': user.get_used_vacation_days(current_year),
-            'remaining_vacation_days': user.get_remaining_vacation_days(current_year),
+            'used_vacation_days': used_vacation_days,
+            'remaining_vacation_days': user.get_remaining_vacation_days(current_year, used_days=used_vacation_days),
             'total_entitlement': vacation_entitlement + carryover_vacation
         })
-    
+
+    @action(detail=False, methods=['get'])
+    def team_coverage(self, request):
+        """
+        Tägliche Besetzung eines Teams für einen Monat
+        Query: team=<id>, month=YYYY-MM (Standard: aktueller Monat)
+
+        Zugriff: Team-Mitglieder, Team-Lead und Staff mit Details; Vorgesetzte
+        nur mit Details, wenn alle Abwesenheiten des Monats in ihrem Scope
+        (filter_absences_by_scope) liegen - sonst nur Zahlen
+        """
+        from django.shortcuts import get_object_or_404
+        from auth_user.models import Team
+        from auth_user.scope_filters import ScopeQuerySetMixin
+        from .team_overlap import team_coverage
+
+        team_param = request.query_params.get('team')
+        if not team_param or not team_param.isdigit():
+            raise ValidationError({'team': 'Team-ID erforderlich'})
+        team = get_object_or_404(Team, pk=int(team_param), is_active=True)
+
+        month_param = request.query_params.get('month')
+        if month_param:
+            try:
+                year, month = (int(part) for part in month_param.split('-'))
+                if not 1 <= year <= 9999 or not 1 <= month <= 12:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({'month': 'Format YYYY-MM erwartet'})
+        else:
+            today = timezone.now().date()
+            year, month = today.year, today.month
+
+        user = request.user
+        is_member = team.lead_id == user.id or team.members.filter(pk=user.pk).exists()
+        if user.is_superuser or user.is_staff or is_member:
+            detail_filter = None
+        elif IsSupervisorPermission().has_permission(request, self):
+            def detail_filter(queryset):
+                return ScopeQuerySetMixin.filter_absences_by_scope(queryset, user)
+        else:
+            raise PermissionDenied('Keine Berechtigung für dieses Team')
+
+        return Response(team_coverage(team, year, month, detail_filter))
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def approve_from_chat(self, request, pk=None):
         """
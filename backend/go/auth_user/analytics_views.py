@@ -10,7 +10,7 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
-from .search_models import SearchQuery, SearchClick, SearchSynonym
+from .search_models import SearchQuery, SearchClick, SearchSynonym, SearchClickStats
 from .profile_serializers import UserProfileListSerializer
 
 logger = logging.getLogger(__name__)
@@ -115,34 +115,52 @@ def search_click_analytics(request):
             "avg_click_position": 2.3,
             "position_distribution": {...}
         }
+    
+    Meistgeklickte Profile kommen aus SearchClickStats (Zeitfenster 7/30/90
+    Tage bzw. gesamt - das kleinste Fenster das `days` abdeckt). Position,
+    Relevanz und Verweildauer der Top-Profile werden über die Roh-Klicks der
+    letzten `days` Tage gemittelt.
     """
     days = int(request.GET.get('days', 30))
     since = timezone.now() - timedelta(days=days)
     
     clicks = SearchClick.objects.filter(created_at__gte=since)
     
-    # Meistgeklickte Profile
-    most_clicked = clicks.values(
-        'clicked_profile_id',
-        'clicked_profile__user__first_name',
-        'clicked_profile__user__last_name'
+    # Meistgeklickte Profile (aus vorberechneter Statistik)
+    window_field = SearchClickStats.window_field(days)
+    most_clicked = SearchClickStats.objects.values(
+        'profile_id',
+        'profile__user__first_name',
+        'profile__user__last_name'
     ).annotate(
-        click_count=Count('id'),
-        avg_position=Avg('position'),
-        avg_relevance=Avg('relevance_score'),
-        avg_time_on_page=Avg('time_on_page')
-    ).order_by('-click_count')[:20]
+        click_count=Sum(window_field)
+    ).filter(click_count__gt=0).order_by('-click_count')[:20]
+    most_clicked = list(most_clicked)
+    
+    # Durchschnitte im angefragten Zeitraum → nur für die Top-Profile aus den Roh-Klicks
+    # (die Summen in SearchClickStats decken einen anderen Zeitraum ab)
+    averages = {
+        row['clicked_profile_id']: row
+        for row in clicks.filter(
+            clicked_profile_id__in=[item['profile_id'] for item in most_clicked]
+        ).values('clicked_profile_id').annotate(
+            avg_position=Avg('position'),
+            avg_relevance=Avg('relevance_score'),
+            avg_time_on_page=Avg('time_on_page')
+        )
+    }
     
     # Format results
     most_clicked_formatted = []
     for item in most_clicked:
+        row = averages.get(item['profile_id'], {})
         most_clicked_formatted.append({
-            'profile_id': item['clicked_profile_id'],
-            'name': f"{item['clicked_profile__user__first_name']} {item['clicked_profile__user__last_name']}",
+            'profile_id': item['profile_id'],
+            'name': f"{item['profile__user__first_name']} {item['profile__user__last_name']}",
             'click_count': item['click_count'],
-            'avg_position': round(item['avg_position'], 1),
-            'avg_relevance': round(item['avg_relevance'], 3),
-            'avg_time_on_page': round(item['avg_time_on_page'] or 0, 1)
+            'avg_position': round(row.get('avg_position') or 0, 1),
+            'avg_relevance': round(row.get('avg_relevance') or 0, 3),
+            'avg_time_on_page': round(row.get('avg_time_on_page') or 0, 1)
         })
     
     # Durchschnittliche Click-Position
@@ -156,6 +174,7 @@ def search_click_analytics(request):
     
     return Response({
         'period_days': days,
+        'stats_window': window_field,
         'most_clicked_profiles': most_clicked_formatted,
         'avg_click_position': round(avg_position, 2),
         'position_distribution': position_dist
@@ -501,6 +520,10 @@ def track_search_click(request):
             }
         )
         
+        # Vorberechnete Klick-Statistik für Learning-Boosts mitführen
+        if created:
+            SearchClickStats.record_click(query_text, profile.pk, position, score)
+        
         # Markiere Query als "hat Klick"
         if not search_query.has_click:
             search_query.has_click = True
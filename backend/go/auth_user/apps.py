@@ -13,6 +13,8 @@ class UsersConfig(AppConfig):
         """Import signals when app is ready"""
         import auth_user.profile_signals  # Profile & Presence auto-creation
         import auth_user.chat_signals  # Chat auto-updates
+        import auth_user.search_signals  # Synonym-/Zuordnungs-Cache invalidieren
+        import auth_user.permission_signals  # Permission-Snapshots invalidieren (Generationen)
         
         # KI-Model IMMER beim Start vorladen (verhindert 5-10s Wartezeit beim ersten Request)
         try:
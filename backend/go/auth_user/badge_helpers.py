@@ -1,36 +1,66 @@
 """
 Badge Helper Functions für Realtime Updates über Django Channels
+
+Badge-Counts liegen als Zähler pro User und Badge im Cache (Redis):
+- get_user_badge_counts() liest alle Zähler mit einem get_many; fehlende
+  Zähler werden einmalig aus der Datenbank berechnet (seed_badge_counters)
+- Signals ändern die Zähler inkrementell (adjust_badge_counter) und pushen
+  nur die geänderten Badges über den NotificationsConsumer
+- reconcile_badge_counters (Celery Beat) gleicht Drift gegen die Datenbank ab
+  (rotierende Teilmenge der User pro Lauf)
+
+Chat zählt Konversationen mit ungelesenen Nachrichten. Dafür gibt es zusätzlich
+pro (User, Konversation) einen Zähler ungelesener Nachrichten; wechselt er
+zwischen 0 und > 0, ändert sich der Chat-Badge um 1.
 """
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
+BADGE_NAMES = ('chat', 'arbeitsscheine', 'sofortmeldungen', 'absences')
+
+# Zähler pro User und Badge bzw. ungelesene Nachrichten pro User und Konversation
+BADGE_COUNTER_CACHE_KEY = 'badge_counter_{}_{}'
+BADGE_CHAT_UNREAD_CACHE_KEY = 'badge_chat_unread_{}_{}'
+
+# Zähler nicht genutzter User laufen ab und werden beim nächsten Lesen neu berechnet
+BADGE_COUNTER_TIMEOUT = 7 * 24 * 3600
+
+# Abgleich rotiert über Teilmengen (user_id % BADGE_RECONCILE_SLICES) - bei 900s
+# Intervall ist jeder User mit Zählern alle 2 Stunden dran
+BADGE_RECONCILE_SLICES = 8
+BADGE_RECONCILE_SLICE_CACHE_KEY = 'badge_reconcile_slice'
+
+# Attribut an der DB-Connection: gesammelte Arbeitsschein-Wechsel der laufenden Transaktion
+PENDING_WORKORDER_BADGES_ATTR = '_badge_pending_workorder_changes'
+
 
 def send_badge_update(user_id: int, badges: dict):
     """
     Sendet Badge-Update über WebSocket an einen User
-    
+
     Args:
         user_id: ID des Users
-        badges: Dictionary mit Badge-Counts, z.B.:
+        badges: Dictionary mit Badge-Counts - vollständig oder nur die
+                geänderten Badges (das Frontend übernimmt nur enthaltene Keys), z.B.:
                 {
                     'chat': 5,
                     'arbeitsscheine': 2,
-                    'organigramm': 1,
                     'sofortmeldungen': 0,
-                    'absences': 3,
-                    'users': 0
+                    'absences': 3
                 }
     """
     channel_layer = get_channel_layer()
     if channel_layer is None:
         logger.warning("❌ Channel Layer nicht verfügbar")
         return
-    
+
     group_name = f'notifications_{user_id}'
-    
+
     try:
         async_to_sync(channel_layer.group_send)(
             group_name,
@@ -39,103 +69,412 @@ def send_badge_update(user_id: int, badges: dict):
                 'badges': badges
             }
         )
-        logger.info(f"✅ Badge-Update gesendet an User {user_id}: {badges}")
+        logger.debug(f"✅ Badge-Update gesendet an User {user_id}: {badges}")
     except Exception as e:
         logger.error(f"❌ Fehler beim Senden von Badge-Update: {e}")
 
 
-def get_user_badge_counts(user):
+# ============================================================================
+# BERECHNUNG AUS DER DATENBANK (Seed + Abgleich)
+# ============================================================================
+
+def _count_chat(user):
     """
-    Berechnet alle Badge-Counts für einen User
-    
-    Args:
-        user: CustomUser Instanz
-        
+    Konversationen mit ungelesenen Nachrichten (nicht versteckt, nicht archiviert)
+
     Returns:
-        Dictionary mit allen Badge-Counts
+        tuple: (Anzahl, {conversation_id: ungelesene Nachrichten})
     """
-    from django.db.models import Count, Q
+    from django.db.models import Count
     from auth_user.chat_models import ChatConversation, ChatMessage
-    from workorders.models import WorkOrder
-    from sofortmeldung.models import Sofortmeldung
-    from absences.models import Absence
-    from auth_user.permission_service import PermissionService
-    
-    badges = {
-        'chat': 0,
-        'arbeitsscheine': 0,
-        'sofortmeldungen': 0,
-        'absences': 0,
-    }
-    
-    try:
-        # Chat: Anzahl Konversationen mit ungelesenen Nachrichten (nicht versteckt, nicht archiviert)
-        conversations = ChatConversation.objects.filter(
+
+    conversation_ids = list(
+        ChatConversation.objects.filter(
             participants=user,
             is_archived=False
-        )
-        
-        unread_conversations = 0
-        for conv in conversations:
-            # Prüfe ob Konversation für User versteckt ist
-            is_hidden = conv.hidden_for_users.filter(user=user).exists()
-            if is_hidden:
-                continue
-                
-            has_unread = ChatMessage.objects.filter(
-                conversation=conv,
-                is_deleted=False
-            ).exclude(
-                read_by=user
-            ).exclude(
-                sender=user
-            ).exists()
-            
-            if has_unread:
-                unread_conversations += 1
-        
-        badges['chat'] = unread_conversations
-        
-        # Arbeitsscheine: Eingereichte WorkOrder (status='submitted')
-        # WICHTIG: Nutze die gleiche Business-Logic wie in scope_filters.py
-        from auth_user.scope_filters import ScopeQuerySetMixin
-        
+        ).exclude(
+            hidden_for_users__user=user
+        ).values_list('id', flat=True)
+    )
+
+    unread = dict(
+        ChatMessage.objects.filter(
+            conversation_id__in=conversation_ids,
+            is_deleted=False
+        ).exclude(
+            read_by=user
+        ).exclude(
+            sender=user
+        ).values('conversation_id').annotate(
+            unread=Count('id')
+        ).values_list('conversation_id', 'unread')
+    )
+
+    unread_by_conversation = {conversation_id: unread.get(conversation_id, 0) for conversation_id in conversation_ids}
+    return sum(1 for count in unread_by_conversation.values() if count), unread_by_conversation
+
+
+def _workorder_scope(user, workorders, perm_service=None):
+    """Arbeitsscheine im Scope des Users (gleiche Business-Logic wie die WorkOrder-Liste)"""
+    from auth_user.permission_service import PermissionService
+    from auth_user.scope_filters import ScopeQuerySetMixin
+
+    if perm_service is None:
         perm_service = PermissionService.for_user(user)
-        
-        if perm_service.has_permission('can_view_workorders'):
-            # Basis: Alle eingereichten Arbeitsscheine
-            submitted_qs = WorkOrder.objects.filter(status='submitted')
-            
-            # Filtere mit der gleichen Scope + Business-Logic wie in der WorkOrder-Liste
-            filtered_qs = ScopeQuerySetMixin.filter_workorders_by_scope(
-                submitted_qs,
-                user,
-                perm_service
-            )
-            
-            badges['arbeitsscheine'] = filtered_qs.count()
-        
-        # Sofortmeldungen: Ungelesene Sofortmeldungen
-        try:
-            badges['sofortmeldungen'] = Sofortmeldung.objects.filter(
-                empfaenger=user,
-                gelesen=False
-            ).count()
-        except Exception:
-            badges['sofortmeldungen'] = 0
-        
-        # Absences: Pending Urlaubsanträge (für Vorgesetzte)
+    if not perm_service.has_permission('can_view_workorders'):
+        return workorders.none()
+    return ScopeQuerySetMixin.filter_workorders_by_scope(workorders, user, perm_service)
+
+
+def _count_arbeitsscheine(user):
+    """Eingereichte Arbeitsscheine (status='submitted') im Scope des Users"""
+    from workorders.models import WorkOrder
+
+    return _workorder_scope(user, WorkOrder.objects.filter(status='submitted')).count()
+
+
+def _count_sofortmeldungen(user):
+    """
+    Ungelesene Sofortmeldungen
+
+    Sofortmeldungen haben keinen Empfänger/Gelesen-Status - der Badge bleibt 0.
+    """
+    return 0
+
+
+def _count_absences(user):
+    """Ausstehende Abwesenheitsanträge der direkten Mitarbeiter (wie pending_approvals)"""
+    from absences.models import Absence
+
+    return Absence.objects.filter(
+        user__profile__direct_supervisor=user,
+        status=Absence.PENDING
+    ).count()
+
+
+BADGE_COUNTERS = {
+    'arbeitsscheine': _count_arbeitsscheine,
+    'sofortmeldungen': _count_sofortmeldungen,
+    'absences': _count_absences,
+}
+
+
+def compute_badge_counts(user, names=BADGE_NAMES):
+    """
+    Berechnet Badge-Counts aus der Datenbank
+
+    Returns:
+        tuple: (badges, chat_unread) - chat_unread nur gefüllt, wenn 'chat' in names
+    """
+    badges = {}
+    chat_unread = {}
+    for name in names:
         try:
-            badges['absences'] = Absence.objects.filter(
-                approver=user,
-                status='pending'
-            ).count()
-        except Exception:
-            badges['absences'] = 0
-            
+            if name == 'chat':
+                badges['chat'], chat_unread = _count_chat(user)
+            else:
+                badges[name] = BADGE_COUNTERS[name](user)
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Berechnen des Badge '{name}' für User {user.pk}: {e}")
+            badges[name] = 0
+    return badges, chat_unread
+
+
+def seed_badge_counters(user, names=BADGE_NAMES):
+    """Berechnet die Badges und legt die Zähler im Cache ab → badges"""
+    badges, chat_unread = compute_badge_counts(user, names)
+
+    values = {BADGE_COUNTER_CACHE_KEY.format(user.pk, name): count for name, count in badges.items()}
+    values.update({
+        BADGE_CHAT_UNREAD_CACHE_KEY.format(user.pk, conversation_id): count
+        for conversation_id, count in chat_unread.items()
+    })
+    try:
+        cache.set_many(values, BADGE_COUNTER_TIMEOUT)
     except Exception as e:
-        logger.error(f"❌ Fehler beim Berechnen von Badge-Counts: {e}")
-        import traceback
-        traceback.print_exc()
-    
+        logger.warning(f"⚠️ Badge-Zähler für User {user.pk} nicht gespeichert: {e}")
     return badges
+
+
+def get_user_badge_counts(user):
+    """
+    Liefert alle Badge-Counts für einen User
+
+    Args:
+        user: CustomUser Instanz
+
+    Returns:
+        Dictionary mit allen Badge-Counts
+    """
+    keys = {name: BADGE_COUNTER_CACHE_KEY.format(user.pk, name) for name in BADGE_NAMES}
+    try:
+        cached = cache.get_many(list(keys.values()))
+    except Exception as e:
+        logger.warning(f"⚠️ Badge-Zähler nicht lesbar, berechne aus der Datenbank: {e}")
+        return compute_badge_counts(user)[0]
+
+    badges = {name: max(0, cached[key]) for name, key in keys.items() if key in cached}
+    missing = [name for name in BADGE_NAMES if name not in badges]
+    if missing:
+        badges.update(seed_badge_counters(user, missing))
+    return {name: badges[name] for name in BADGE_NAMES}
+
+
+# ============================================================================
+# INKREMENTELLE UPDATES (aus Signals, nach dem Commit)
+# ============================================================================
+
+def _incr(key, delta):
+    """cache.incr/decr → neuer Wert oder None, wenn der Zähler nicht existiert"""
+    try:
+        return cache.incr(key, delta) if delta >= 0 else cache.decr(key, -delta)
+    except ValueError:
+        return None
+
+
+def _apply_badge_delta(user_id, name, delta):
+    """
+    Ändert einen vorhandenen Zähler und pusht den neuen Wert
+
+    Fehlt der Zähler, wird nichts geändert - er wird beim nächsten Lesen
+    ohnehin vollständig berechnet.
+    """
+    if not delta:
+        return
+    value = _incr(BADGE_COUNTER_CACHE_KEY.format(user_id, name), delta)
+    if value is not None:
+        send_badge_update(user_id, {name: max(0, value)})
+
+
+def adjust_badge_counter(user_ids, name, delta):
+    """Ändert den Badge der User um delta (nach dem Commit)"""
+    user_ids = [user_id for user_id in set(user_ids) if user_id]
+    if not user_ids or not delta:
+        return
+
+    def apply():
+        for user_id in user_ids:
+            try:
+                _apply_badge_delta(user_id, name, delta)
+            except Exception as e:
+                logger.error(f"❌ Badge '{name}' für User {user_id} nicht aktualisiert: {e}")
+
+    transaction.on_commit(apply)
+
+
+def _reseed_chat_badge(user_id):
+    """Berechnet den Chat-Badge (inkl. Konversations-Zähler) neu und pusht ihn"""
+    from django.contrib.auth import get_user_model
+
+    if cache.get(BADGE_COUNTER_CACHE_KEY.format(user_id, 'chat')) is None:
+        # User hat keine Zähler → wird beim nächsten Lesen ohnehin berechnet
+        return
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+    if user is not None:
+        send_badge_update(user_id, seed_badge_counters(user, ['chat']))
+
+
+def _apply_chat_unread_delta(user_id, conversation_id, delta):
+    value = _incr(BADGE_CHAT_UNREAD_CACHE_KEY.format(user_id, conversation_id), delta)
+    if value is None or value < 0:
+        # Konversation beim Seed nicht sichtbar (neu, versteckt, archiviert)
+        # oder Zähler gedriftet → Chat-Badge neu berechnen und pushen
+        _reseed_chat_badge(user_id)
+        return
+    if delta > 0 and value == delta:
+        _apply_badge_delta(user_id, 'chat', 1)
+    elif delta < 0 and value <= 0 < value - delta:
+        _apply_badge_delta(user_id, 'chat', -1)
+
+
+def refresh_chat_badges(user_ids):
+    """
+    Berechnet den Chat-Badge nach Änderungen neu, die sich nicht inkrementell
+    abbilden lassen (Chat versteckt, Teilnehmer geändert), und pusht ihn
+    """
+    user_ids = [user_id for user_id in set(user_ids) if user_id]
+    if not user_ids:
+        return
+
+    def apply():
+        for user_id in user_ids:
+            try:
+                _reseed_chat_badge(user_id)
+            except Exception as e:
+                logger.error(f"❌ Chat-Badge für User {user_id} nicht neu berechnet: {e}")
+
+    transaction.on_commit(apply)
+
+
+def adjust_chat_unread(user_ids, conversation_id, delta):
+    """
+    Ändert die ungelesenen Nachrichten der User in einer Konversation um delta;
+    der Chat-Badge ändert sich nur beim Wechsel zwischen 0 und > 0
+    """
+    user_ids = [user_id for user_id in set(user_ids) if user_id]
+    if not user_ids or not delta:
+        return
+
+    def apply():
+        for user_id in user_ids:
+            try:
+                _apply_chat_unread_delta(user_id, conversation_id, delta)
+            except Exception as e:
+                logger.error(f"❌ Chat-Badge für User {user_id} nicht aktualisiert: {e}")
+
+    transaction.on_commit(apply)
+
+
+def queue_workorder_badge_update(entered=(), left=()):
+    """
+    Arbeitsscheine sind in den Status 'submitted' gewechselt (entered) bzw.
+    haben ihn verlassen (left) → Badge-Zähler im Hintergrund anpassen
+
+    Alle Wechsel einer Transaktion werden gesammelt und nach dem Commit als
+    ein Task verschickt (Netto-Änderung pro Ersteller).
+    """
+    changes = [(order.created_by_id, 1) for order in entered]
+    changes += [(order.created_by_id, -1) for order in left]
+    if not changes:
+        return
+
+    connection = transaction.get_connection()
+    pending = getattr(connection, PENDING_WORKORDER_BADGES_ATTR, None)
+    # Nach einem Rollback ist der Callback nicht mehr registriert → neu sammeln
+    if pending is not None and any(entry[1] is pending['flush'] for entry in connection.run_on_commit):
+        pending['changes'].extend(changes)
+        return
+
+    pending = {'changes': changes}
+
+    def flush():
+        from auth_user.tasks import update_workorder_badges
+
+        if getattr(connection, PENDING_WORKORDER_BADGES_ATTR, None) is pending:
+            delattr(connection, PENDING_WORKORDER_BADGES_ATTR)
+        deltas = {}
+        for creator_id, delta in pending['changes']:
+            deltas[creator_id] = deltas.get(creator_id, 0) + delta
+        creator_deltas = [[creator_id, delta] for creator_id, delta in deltas.items() if delta]
+        if creator_deltas:
+            update_workorder_badges.delay(creator_deltas)
+
+    pending['flush'] = flush
+    setattr(connection, PENDING_WORKORDER_BADGES_ATTR, pending)
+    transaction.on_commit(flush)
+
+
+def apply_workorder_badge_update(creator_deltas):
+    """
+    Passt den Arbeitsschein-Badge der betroffenen User mit vorhandenem Zähler an
+
+    Args:
+        creator_deltas: [(created_by_id, delta)] - Netto-Änderung eingereichter
+                        Arbeitsscheine pro Ersteller
+
+    Betroffen sind nur (wie ScopeQuerySetMixin.filter_workorders_by_scope):
+    - Superuser/Staff und ALL-Scope: alle Änderungen
+    - OWN: eigene Arbeitsscheine
+    - OWN/DEPARTMENT: Arbeitsscheine der Mitarbeiter, denen der User als
+      Faktura-Bearbeiter zugewiesen ist (WorkOrder hat kein Abteilungsfeld)
+
+    Konstante Anzahl Queries, unabhängig von der Anzahl der User.
+
+    Returns:
+        int: Anzahl aktualisierter User
+    """
+    from auth_user.permission_service import get_permission_holders
+    from auth_user.profile_models import FakturaAssignment
+
+    deltas = {}
+    for creator_id, delta in creator_deltas:
+        deltas[creator_id] = deltas.get(creator_id, 0) + delta
+    if not any(deltas.values()):
+        return 0
+
+    holders = get_permission_holders('can_view_workorders')
+
+    # Sichtbare Ersteller pro User (Set → kein Doppelzählen wie .distinct())
+    visible = {user_id: None for user_id, scope in holders.items() if scope == 'ALL'}
+    for creator_id in deltas:
+        if creator_id and holders.get(creator_id) == 'OWN':
+            visible.setdefault(creator_id, set()).add(creator_id)
+    for processor_id, employee_id in FakturaAssignment.objects.filter(
+        employee_id__in=[creator_id for creator_id in deltas if creator_id],
+        is_active=True
+    ).values_list('faktura_processor_id', 'employee_id'):
+        if holders.get(processor_id) in ('OWN', 'DEPARTMENT'):
+            visible.setdefault(processor_id, set()).add(employee_id)
+
+    total = sum(deltas.values())
+    user_deltas = {
+        user_id: total if creators is None else sum(deltas[creator_id] for creator_id in creators)
+        for user_id, creators in visible.items()
+    }
+
+    keys = {
+        BADGE_COUNTER_CACHE_KEY.format(user_id, 'arbeitsscheine'): user_id
+        for user_id, delta in user_deltas.items() if delta
+    }
+    updated = 0
+    for key in cache.get_many(list(keys)):
+        user_id = keys[key]
+        _apply_badge_delta(user_id, 'arbeitsscheine', user_deltas[user_id])
+        updated += 1
+    return updated
+
+
+# ============================================================================
+# ABGLEICH (Celery Beat)
+# ============================================================================
+
+def _next_reconcile_slice():
+    try:
+        value = cache.incr(BADGE_RECONCILE_SLICE_CACHE_KEY)
+    except ValueError:
+        value = 0
+        cache.set(BADGE_RECONCILE_SLICE_CACHE_KEY, value, None)
+    return value % BADGE_RECONCILE_SLICES
+
+
+def reconcile_badge_counters(slice_index=None):
+    """
+    Gleicht die Zähler einer Teilmenge der User gegen die Datenbank ab
+
+    Pro Lauf nur User mit user_id % BADGE_RECONCILE_SLICES == slice_index
+    (rotierend) und davon nur die mit Cache-Einträgen, also die in den
+    letzten BADGE_COUNTER_TIMEOUT aktiven. Abweichungen (z.B. durch
+    QuerySet.update() ohne Signals) werden korrigiert und gepusht.
+
+    Returns:
+        dict: {'slice', 'checked', 'corrected'}
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models.functions import Mod
+
+    if slice_index is None:
+        slice_index = _next_reconcile_slice()
+
+    User = get_user_model()
+    keys = {}
+    for user_id in User.objects.filter(is_active=True).annotate(
+        reconcile_slice=Mod('id', BADGE_RECONCILE_SLICES)
+    ).filter(reconcile_slice=slice_index).values_list('id', flat=True):
+        for name in BADGE_NAMES:
+            keys[BADGE_COUNTER_CACHE_KEY.format(user_id, name)] = (user_id, name)
+
+    cached = {}
+    for key, value in cache.get_many(list(keys)).items():
+        user_id, name = keys[key]
+        cached.setdefault(user_id, {})[name] = value
+
+    corrected = 0
+    for user in User.objects.filter(pk__in=list(cached)):
+        badges = seed_badge_counters(user, list(cached[user.pk]))
+        changed = {name: count for name, count in badges.items() if cached[user.pk].get(name) != count}
+        if changed:
+            corrected += 1
+            send_badge_update(user.pk, changed)
+            logger.info(f"🔧 Badge-Drift korrigiert für User {user.pk}: {changed}")
+
+    return {'slice': slice_index, 'checked': len(cached), 'corrected': corrected}
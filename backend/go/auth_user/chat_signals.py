@@ -2,9 +2,10 @@
 Signals für Chat System
 Automatische Updates bei Nachrichten-Events
 """
-from django.db.models.signals import post_save
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .chat_models import ChatMessage
+from .chat_models import ChatConversation, ChatConversationHidden, ChatMessage
 
 
 @receiver(post_save, sender=ChatMessage)
@@ -39,3 +40,75 @@ def update_conversation_on_message(sender, instance, created, **kwargs):
             conversation=conversation,
             user__in=recipients
         ).delete()
+
+
+# ============================================================================
+# BADGE-ZÄHLER
+# ============================================================================
+
+@receiver(post_save, sender=ChatMessage)
+def update_chat_badges_on_message(sender, instance, created, **kwargs):
+    """Neue Nachricht → ungelesen für alle Teilnehmer außer dem Sender"""
+    if not created or instance.is_deleted:
+        return
+    
+    from .badge_helpers import adjust_chat_unread
+    
+    recipient_ids = list(
+        instance.conversation.participants.exclude(id=instance.sender_id).values_list('id', flat=True)
+    )
+    adjust_chat_unread(recipient_ids, instance.conversation_id, 1)
+
+
+@receiver(m2m_changed, sender=ChatMessage.read_by.through)
+def update_chat_badges_on_read(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Nachrichten gelesen: message.read_by.add(user) oder user.read_messages.add(*messages)
+    (pk_set enthält nur neu hinzugefügte Einträge)
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    
+    from .badge_helpers import adjust_chat_unread
+    
+    if not reverse:
+        if instance.is_deleted:
+            return
+        adjust_chat_unread(
+            [user_id for user_id in pk_set if user_id != instance.sender_id],
+            instance.conversation_id,
+            -1
+        )
+        return
+    
+    read_counts = ChatMessage.objects.filter(
+        pk__in=pk_set,
+        is_deleted=False
+    ).exclude(
+        sender=instance
+    ).values('conversation_id').annotate(read=Count('id')).values_list('conversation_id', 'read')
+    for conversation_id, read in read_counts:
+        adjust_chat_unread([instance.pk], conversation_id, -read)
+
+
+@receiver(post_save, sender=ChatConversationHidden)
+@receiver(post_delete, sender=ChatConversationHidden)
+def refresh_chat_badge_on_hide(sender, instance, **kwargs):
+    """Chat versteckt/wieder eingeblendet → Chat-Badge neu berechnen"""
+    from .badge_helpers import refresh_chat_badges
+    
+    refresh_chat_badges([instance.user_id])
+
+
+@receiver(m2m_changed, sender=ChatConversation.participants.through)
+def refresh_chat_badge_on_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    """Teilnehmer hinzugefügt/entfernt → Chat-Badge der Betroffenen neu berechnen"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    from .badge_helpers import refresh_chat_badges
+    
+    if reverse:
+        refresh_chat_badges([instance.pk])
+    elif pk_set:
+        refresh_chat_badges(pk_set)
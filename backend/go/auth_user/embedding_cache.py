@@ -0,0 +1,193 @@
+"""
+Cache für Query-Embeddings der semantischen Suche
+Zwei Stufen: begrenzter LRU-Cache im Prozess + Redis (float16, kompakt) für
+alle Worker. Wiederholte Suchen (Autocomplete, "IT Support", "Urlaub")
+sparen so die Modell-Inferenz.
+"""
+import base64
+import hashlib
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# Redis-Keys
+QUERY_EMBEDDING_KEY_PREFIX = 'query_embedding'
+QUERY_EMBEDDING_STATS_KEY = 'query_embedding_cache_stats:{}'
+STATS_COUNTERS = ('local_hits', 'redis_hits', 'misses')
+
+# Zähler werden im Prozess gesammelt und gebündelt nach Redis geschrieben:
+# spätestens nach STATS_FLUSH_INTERVAL Sekunden oder beim nächsten ohnehin
+# anfallenden Redis-Zugriff - LRU-Treffer bleiben ohne Netzwerk-Roundtrip
+STATS_FLUSH_INTERVAL = 30
+
+
+def normalize_query_text(text: str) -> str:
+    """Normalisiert Query-Text für den Cache-Key (Kleinschreibung, Whitespace)"""
+    return ' '.join(text.lower().split())
+
+
+def encode_vector(vector: List[float]) -> str:
+    """Packt einen Vektor als float16 (2 Bytes pro Dimension), base64 für den JSON-Cache"""
+    return base64.b64encode(struct.pack(f'<{len(vector)}e', *vector)).decode('ascii')
+
+
+def decode_vector(data: str) -> List[float]:
+    """Gegenstück zu encode_vector()"""
+    raw = base64.b64decode(data)
+    return list(struct.unpack(f'<{len(raw) // 2}e', raw))
+
+
+class QueryEmbeddingCache:
+    """
+    LRU-Cache (Prozess) + Redis-Cache für Query-Embeddings
+
+    - Key: Provider, Modell und normalisierter Text
+    - Werte werden immer auf float16 gerundet, damit Treffer aus beiden
+      Stufen und frisch berechnete Vektoren identische Scores liefern
+    """
+
+    def __init__(self, max_size: int = 1024, timeout: int = 7 * 24 * 3600):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_stats = dict.fromkeys(STATS_COUNTERS, 0)
+        self._last_stats_flush = time.monotonic()
+
+    def _make_key(self, text: str) -> str:
+        embedding_config = getattr(settings, 'EMBEDDING_CONFIG', {})
+        source = (
+            f"{embedding_config.get('provider', '')}:{embedding_config.get('model', '')}\n"
+            f"{normalize_query_text(text)}"
+        )
+        return f"{QUERY_EMBEDDING_KEY_PREFIX}:{hashlib.sha256(source.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key: str, vector: List[float]):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, counter: str, flush: bool = False):
+        """Zählt im Prozess; flush=True wenn der Aufrufer Redis ohnehin anspricht"""
+        with self._lock:
+            self._pending_stats[counter] += 1
+            due = flush or time.monotonic() - self._last_stats_flush >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Schreibt die gesammelten Zähler nach Redis (ein incr pro Zähler)"""
+        with self._lock:
+            pending = {counter: count for counter, count in self._pending_stats.items() if count}
+            self._pending_stats = dict.fromkeys(STATS_COUNTERS, 0)
+            self._last_stats_flush = time.monotonic()
+
+        for counter, count in pending.items():
+            key = QUERY_EMBEDDING_STATS_KEY.format(counter)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, None)
+            except Exception as e:
+                logger.debug(f"Query-Embedding Statistik nicht erhöht: {e}")
+
+    def get_or_generate(self, text: str, generate: Callable[[str], Optional[List[float]]]) -> Optional[List[float]]:
+        """
+        Liefert das Query-Embedding aus dem Cache oder berechnet es
+
+        Args:
+            text: Query-Text
+            generate: Funktion für die eigentliche Modell-Inferenz
+
+        Returns:
+            List[float] oder None
+        """
+        key = self._make_key(text)
+
+        # Stufe 1: Prozess-lokaler LRU
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        if vector is not None:
+            self._count('local_hits')
+            return vector
+
+        # Stufe 2: Redis (geteilt zwischen allen Workern)
+        try:
+            data = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Query-Embedding Cache nicht lesbar: {e}")
+            data = None
+        if data:
+            vector = decode_vector(data)
+            self._remember(key, vector)
+            self._count('redis_hits', flush=True)
+            return vector
+
+        # Miss → Modell-Inferenz
+        self._count('misses', flush=True)
+        vector = generate(text)
+        if not vector:
+            return vector
+
+        data = encode_vector(vector)
+        vector = decode_vector(data)
+        self._remember(key, vector)
+        try:
+            cache.set(key, data, self.timeout)
+        except Exception as e:
+            logger.warning(f"Query-Embedding nicht gecacht: {e}")
+        return vector
+
+    def clear(self):
+        """Leert den lokalen LRU (Redis-Einträge laufen über Timeout aus)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit/Miss-Zähler aller Worker + Größe des lokalen LRU"""
+        # Andere Worker melden ihre Zähler mit bis zu STATS_FLUSH_INTERVAL Verzögerung
+        self.flush_stats()
+        try:
+            counters = cache.get_many([QUERY_EMBEDDING_STATS_KEY.format(c) for c in STATS_COUNTERS])
+        except Exception as e:
+            logger.warning(f"Query-Embedding Statistik nicht lesbar: {e}")
+            counters = {}
+        stats = {c: counters.get(QUERY_EMBEDDING_STATS_KEY.format(c), 0) for c in STATS_COUNTERS}
+
+        lookups = sum(stats.values())
+        hits = stats['local_hits'] + stats['redis_hits']
+        stats['hit_rate_percent'] = round(hits / lookups * 100, 2) if lookups else 0
+        stats['local_size'] = len(self._entries)
+        stats['local_max_size'] = self.max_size
+        return stats
+
+
+_query_embedding_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Gibt die prozess-weite Instanz des Query-Embedding-Cache zurück"""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        with _cache_lock:
+            if _query_embedding_cache is None:
+                embedding_config = getattr(settings, 'EMBEDDING_CONFIG', {})
+                _query_embedding_cache = QueryEmbeddingCache(
+                    max_size=embedding_config.get('query_cache_size', 1024),
+                    timeout=embedding_config.get('query_cache_timeout', 7 * 24 * 3600),
+                )
+    return _query_embedding_cache
@@ -2,7 +2,7 @@
 KI-Embedding Service für semantische Suche mit Fuzzy Matching & Learning
 Generiert Vektor-Embeddings aus User-Profil-Feldern
 """
-import json
+import hashlib
 import os
 from typing import List, Optional, Dict, Tuple, Set
 from abc import ABC, abstractmethod
@@ -67,6 +67,20 @@ class EmbeddingProvider(ABC):
         """
         pass
     
+    def generate_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Generiert Embeddings für mehrere Texte
+        
+        Default: einzeln über generate(). Provider mit Batch-API überschreiben das.
+        
+        Args:
+            texts: Liste von Texten
+            
+        Returns:
+            Liste von Embeddings (None für leere/fehlerhafte Texte)
+        """
+        return [self.generate(text) for text in texts]
+    
     @staticmethod
     def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """Berechnet Cosine Similarity zwischen zwei Vektoren"""
@@ -145,6 +159,32 @@ class SentenceTransformersProvider(EmbeddingProvider):
             logger.error(f"Embedding-Fehler: {e}")
             return None
     
+    def generate_batch(self, texts: List[str], batch_size: int = 32) -> List[Optional[List[float]]]:
+        """Generiert Embeddings für mehrere Texte in einem model.encode()-Aufruf"""
+        cleaned = [
+            text.strip()[:512] if isinstance(text, str) else ''
+            for text in texts
+        ]
+        valid_positions = [i for i, text in enumerate(cleaned) if text]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        if not valid_positions:
+            return results
+        
+        try:
+            embeddings = self.model.encode(
+                [cleaned[i] for i in valid_positions],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            for pos, embedding in zip(valid_positions, embeddings):
+                results[pos] = embedding.tolist()
+        except Exception as e:
+            logger.error(f"Batch-Embedding-Fehler: {e}")
+        
+        return results
+    
     def search(self, query_vector: List[float], corpus_vectors: List[List[float]],
                top_k: int = 5) -> List[Tuple[int, float]]:
         """Cosine Similarity Search"""
@@ -226,6 +266,37 @@ class OllamaProvider(EmbeddingProvider):
             logger.error(f"Ollama Embedding-Fehler: {e}")
             return None
     
+    def generate_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Generiert Embeddings für mehrere Texte mit einem /api/embed Request"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        valid_positions = [i for i, text in enumerate(texts) if text]
+        
+        if not self.available or not valid_positions:
+            return results
+        
+        try:
+            import requests
+            
+            response = requests.post(
+                f"{self.base_url}/api/embed",
+                json={
+                    "model": self.model,
+                    "input": [texts[i][:512] for i in valid_positions]
+                },
+                timeout=120
+            )
+            
+            if response.status_code == 200:
+                embeddings = response.json().get('embeddings') or []
+                for pos, embedding in zip(valid_positions, embeddings):
+                    results[pos] = embedding
+            else:
+                logger.error(f"Ollama API Error: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Ollama Batch-Embedding-Fehler: {e}")
+        
+        return results
+    
     def search(self, query_vector: List[float], corpus_vectors: List[List[float]],
                top_k: int = 5) -> List[Tuple[int, float]]:
         """Cosine Similarity Search"""
@@ -276,6 +347,27 @@ class OpenAIProvider(EmbeddingProvider):
             logger.error(f"OpenAI Embedding-Fehler: {e}")
             return None
     
+    def generate_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Generiert Embeddings für mehrere Texte mit einem API-Call"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        valid_positions = [i for i, text in enumerate(texts) if text]
+        
+        if not valid_positions:
+            return results
+        
+        try:
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=[texts[i][:2000] for i in valid_positions]
+            )
+            # Antwort-Reihenfolge über data[].index zuordnen
+            for item in response.data:
+                results[valid_positions[item.index]] = item.embedding
+        except Exception as e:
+            logger.error(f"OpenAI Batch-Embedding-Fehler: {e}")
+        
+        return results
+    
     def search(self, query_vector: List[float], corpus_vectors: List[List[float]],
                top_k: int = 5) -> List[Tuple[int, float]]:
         """Cosine Similarity Search"""
@@ -357,6 +449,23 @@ class EmbeddingManager:
         
         return self._provider.generate(text)
     
+    def generate_query(self, text: str) -> Optional[List[float]]:
+        """
+        Generiert Embedding für eine Such-Query (mit Query-Embedding-Cache)
+        
+        Args:
+            text: Such-Query
+            
+        Returns:
+            List[float] oder None
+        """
+        if not self.is_available():
+            logger.warning("Embedding-Provider nicht verfügbar")
+            return None
+        
+        from .embedding_cache import get_query_embedding_cache
+        return get_query_embedding_cache().get_or_generate(text, self._provider.generate)
+    
     def search_profiles(self, query: str, top_k: int = 5):
         """
         Sucht nach ähnlichen User-Profilen
@@ -372,49 +481,44 @@ class EmbeddingManager:
             logger.warning("Embedding-Search nicht verfügbar")
             return None
         
-        # Query-Embedding generieren
-        query_embedding = self.generate(query)
+        # Query-Embedding generieren (gecacht)
+        query_embedding = self.generate_query(query)
         if not query_embedding:
             return None
         
-        # Alle Profile mit Embeddings laden
+        # Top-K über den In-Memory Vektor-Index
         from .profile_models import UserProfile
+        from .vector_index import get_profile_vector_index
         
-        profiles = UserProfile.objects.filter(
-            is_searchable=True,
-            embedding_vector__isnull=False
-        ).values('id', 'embedding_vector')
+        results = get_profile_vector_index().search(query_embedding, top_k)
+        top_ids = [r[0] for r in results]
         
-        # Similarities berechnen
-        results = []
-        for profile in profiles:
-            try:
-                corpus_vec = json.loads(profile['embedding_vector'])
-                sim = self._provider.cosine_similarity(query_embedding, corpus_vec)
-                results.append((profile['id'], sim))
-            except (json.JSONDecodeError, TypeError):
-                continue
-        
-        # Sort und return Top-K
-        results.sort(key=lambda x: x[1], reverse=True)
-        top_ids = [r[0] for r in results[:top_k]]
-        
-        return UserProfile.objects.filter(id__in=top_ids)
+        return UserProfile.objects.filter(pk__in=top_ids)
     
-    def generate_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+    def generate_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[Optional[List[float]]]:
         """
         Generiert Embeddings für mehrere Texte (optimiert)
         
+        Texte werden in Chunks von batch_size an den Provider gegeben,
+        der jeden Chunk in einem Modell-/API-Aufruf verarbeitet.
+        
         Args:
             texts: Liste von Texten
+            batch_size: Chunk-Größe (default: EMBEDDING_CONFIG['batch_size'] bzw. 64)
             
         Returns:
-            Liste von Embeddings
+            Liste von Embeddings (gleiche Reihenfolge wie texts)
         """
         if not self.is_available():
             return [None] * len(texts)
         
-        return [self.generate(text) for text in texts]
+        if batch_size is None:
+            batch_size = getattr(settings, 'EMBEDDING_CONFIG', {}).get('batch_size', 64)
+        
+        results: List[Optional[List[float]]] = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self._provider.generate_batch(texts[start:start + batch_size]))
+        return results
 
 
 # ============================================================================
@@ -469,20 +573,15 @@ def expand_query_with_synonyms(query: str) -> Set[str]:
     Returns:
         Set mit Original-Query + Synonymen
     """
-    from .search_models import SearchSynonym
+    from .search_dictionaries import get_search_dictionaries
     
+    dictionaries = get_search_dictionaries()
     expanded_terms = set([query.lower()])
     query_words = [w.strip().lower() for w in query.split() if len(w) >= 3]
     
     for word in query_words:
-        # Suche exakte Treffer in Synonymen
-        synonyms = SearchSynonym.objects.filter(
-            term__iexact=word,
-            is_active=True
-        ).first()
-        
-        if synonyms:
-            expanded_terms.update(synonyms.get_synonym_list())
+        # Suche exakte Treffer in Synonymen (gecachtes Wörterbuch)
+        expanded_terms.update(dictionaries.get_synonyms(word))
     
     return expanded_terms
 
@@ -536,6 +635,77 @@ def get_field_weight(field_name: str) -> float:
     return weights.get(field_name, 0.20)
 
 
+# Felder die in den Keyword-Boost eingehen (Reihenfolge wie in der Suche)
+KEYWORD_BOOST_FIELDS = (
+    'responsibilities',
+    'expertise_areas',
+    'role_keywords',
+    'department_keywords',
+    'job_title',
+)
+
+
+def tokenize_for_search(text: str) -> List[str]:
+    """Zerlegt Text in normalisierte Tokens (wie fuzzy_match_in_text)"""
+    return text.lower().split() if text else []
+
+
+def compute_keyword_boosts(search_tokens: List[Dict], query_words: List[str]) -> List[float]:
+    """
+    Keyword-Boost für alle Kandidaten auf einmal
+    
+    Alle Query-Wörter werden mit einem einzigen rapidfuzz.process.cdist-Aufruf
+    gegen das Token-Vokabular aller Kandidaten verglichen. Ergebnis ist
+    identisch zu fuzzy_match_in_text() pro Wort/Feld (75% Threshold).
+    
+    Args:
+        search_tokens: Token-Index pro Kandidat (UserProfile.search_tokens)
+        query_words: Query-Wörter inkl. Synonyme
+        
+    Returns:
+        Keyword-Boost pro Kandidat (gleiche Reihenfolge)
+    """
+    boosts = [0.0] * len(search_tokens)
+    match_words = [w.lower() for w in query_words if len(w) >= 3]
+    if not match_words:
+        return boosts
+    
+    # Vokabular: jedes Token einmal
+    vocabulary: Dict[str, int] = {}
+    for index in search_tokens:
+        for field_name in KEYWORD_BOOST_FIELDS:
+            for token in index['tokens'].get(field_name, []):
+                vocabulary.setdefault(token, len(vocabulary))
+    if not vocabulary:
+        return boosts
+    
+    use_fuzzy = HAS_RAPIDFUZZ and HAS_NUMPY
+    if use_fuzzy:
+        # (Query-Wörter × Vokabular) Ähnlichkeitsmatrix in einem Aufruf
+        hits = process.cdist(
+            match_words, list(vocabulary), scorer=fuzz.ratio, score_cutoff=75
+        ) >= 75
+    
+    for i, index in enumerate(search_tokens):
+        for field_name in KEYWORD_BOOST_FIELDS:
+            tokens = index['tokens'].get(field_name)
+            if not tokens:
+                continue
+            
+            if use_fuzzy:
+                matches = int(hits[:, [vocabulary[t] for t in tokens]].any(axis=1).sum())
+            else:
+                # Fallback: Einfache substring-Suche
+                field_text = ' '.join(tokens)
+                matches = sum(1 for word in match_words if word in field_text)
+            
+            if matches > 0:
+                # Boost proportional zu Anzahl Matches * Feldgewichtung
+                boosts[i] += get_field_weight(field_name) * (matches / len(query_words))
+    
+    return boosts
+
+
 # ============================================================================
 # SHORTCUT FUNCTIONS
 # ============================================================================
@@ -559,6 +729,19 @@ def generate_profile_embedding(profile) -> Optional[List[float]]:
     if not manager.is_available():
         return None
     
+    return manager.generate(build_profile_text(profile))
+
+
+def build_profile_text(profile) -> str:
+    """
+    Baut den Embedding-Text für ein User-Profil
+    
+    Args:
+        profile: UserProfile-Instanz
+        
+    Returns:
+        Zusammengesetzter Text aller relevanten Felder
+    """
     # Kombiniere relevante Felder
     parts = []
     
@@ -580,7 +763,10 @@ def generate_profile_embedding(profile) -> Optional[List[float]]:
         parts.append(f"Gesellschaft: {company_names}")
     
     # ALL Department Memberships (nicht nur primary!)
-    all_memberships = profile.get_all_department_memberships()
+    # Vorgeladen von build_profile_documents() oder einzeln abgefragt
+    all_memberships = getattr(profile.user, 'active_memberships', None)
+    if all_memberships is None:
+        all_memberships = profile.get_all_department_memberships()
     if all_memberships:
         for membership in all_memberships:
             # Department Info
@@ -602,9 +788,11 @@ def generate_profile_embedding(profile) -> Optional[List[float]]:
                 parts.append(f"Positionsbezeichnung: {membership.position_title}")
             
             # Specialty Assignments für dieses Membership
-            specialty_assignments = membership.specialty_assignments.filter(
-                is_active=True
-            ).select_related('specialty')
+            specialty_assignments = getattr(membership, 'active_specialty_assignments', None)
+            if specialty_assignments is None:
+                specialty_assignments = membership.specialty_assignments.filter(
+                    is_active=True
+                ).select_related('specialty')
             
             if specialty_assignments:
                 for assignment in specialty_assignments:
@@ -623,13 +811,17 @@ def generate_profile_embedding(profile) -> Optional[List[float]]:
                         parts.append(f"Kompetenz {specialty.name}: {proficiency_label}")
     
     # Teams
-    teams = profile.user.teams.filter(is_active=True).select_related('department')
+    teams = getattr(profile.user, 'active_teams', None)
+    if teams is None:
+        teams = profile.user.teams.filter(is_active=True).select_related('department')
     if teams:
         team_names = ", ".join([f"{t.name} ({t.department.name})" for t in teams])
         parts.append(f"Teams: {team_names}")
     
     # Led Teams (ist Team-Lead)
-    led_teams = profile.user.led_teams.filter(is_active=True).select_related('department')
+    led_teams = getattr(profile.user, 'active_led_teams', None)
+    if led_teams is None:
+        led_teams = profile.user.led_teams.filter(is_active=True).select_related('department')
     if led_teams:
         led_team_names = ", ".join([f"{t.name} ({t.department.name})" for t in led_teams])
         parts.append(f"Team-Lead: {led_team_names}")
@@ -649,8 +841,116 @@ def generate_profile_embedding(profile) -> Optional[List[float]]:
         if contract_label:
             parts.append(f"Vertragsart: {contract_label}")
     
-    combined_text = " | ".join(parts)
-    return manager.generate(combined_text)
+    return " | ".join(parts)
+
+
+def profile_text_hash(text: str) -> str:
+    """
+    Content-Hash eines Embedding-Texts
+    
+    Provider und Modell fließen mit ein, damit ein Modellwechsel
+    alle Profile neu einbettet.
+    """
+    embedding_config = getattr(settings, 'EMBEDDING_CONFIG', {})
+    source = f"{embedding_config.get('provider', '')}:{embedding_config.get('model', '')}\n{text}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def build_profile_search_tokens(profile) -> Dict:
+    """
+    Baut den Keyword-Token-Index für ein Profil
+    
+    Enthält die normalisierten Tokens der Boost-Felder und die aufgelösten
+    Namen der primären Abteilung/Rolle/Fachbereiche. Wird zusammen mit dem
+    Embedding in UserProfile.search_tokens gespeichert.
+    
+    Args:
+        profile: UserProfile-Instanz (optional mit Prefetches aus prefetch_profile_documents)
+        
+    Returns:
+        dict mit Namen der primären Organisation und 'tokens' pro Boost-Feld
+    """
+    memberships = getattr(profile.user, 'active_memberships', None)
+    if memberships is None:
+        membership = profile.primary_department_membership
+        specialties = profile.primary_specialties
+    else:
+        membership = next((m for m in memberships if m.is_primary), None)
+        specialties = [
+            assignment.specialty
+            for assignment in getattr(membership, 'active_specialty_assignments', [])
+            if assignment.is_primary
+        ]
+    
+    department = membership.department if membership else None
+    role = membership.role if membership else None
+    department_keywords = department.search_keywords if department and department.search_keywords else ''
+    role_keywords = role.search_keywords if role and role.search_keywords else ''
+    
+    return {
+        'department': department.name if department else '',
+        'department_keywords': department_keywords,
+        'role': role.name if role else '',
+        'role_keywords': role_keywords,
+        'specialties': ', '.join(s.name for s in specialties),
+        'tokens': {
+            'responsibilities': tokenize_for_search(profile.responsibilities),
+            'expertise_areas': tokenize_for_search(profile.expertise_areas),
+            'role_keywords': tokenize_for_search(role_keywords),
+            'department_keywords': tokenize_for_search(department_keywords),
+            'job_title': tokenize_for_search(profile.job_title),
+        },
+    }
+
+
+def prefetch_profile_documents(profiles):
+    """
+    Ergänzt ein Profil-QuerySet um alle Prefetches für Embedding-Text und Token-Index
+    
+    Companies, aktive Memberships mit Fachbereichen, Teams und geleitete Teams
+    werden mit fester Anzahl an Queries geladen (6 Queries pro Auswertung).
+    """
+    from django.db.models import Prefetch
+    from .profile_models import DepartmentMember, MemberSpecialty, Team
+    
+    memberships = DepartmentMember.objects.filter(
+        is_active=True
+    ).select_related(
+        'department__parent', 'role'
+    ).order_by('-is_primary', 'display_order').prefetch_related(
+        Prefetch(
+            'specialty_assignments',
+            queryset=MemberSpecialty.objects.filter(is_active=True).select_related('specialty__parent'),
+            to_attr='active_specialty_assignments'
+        )
+    )
+    active_teams = Team.objects.filter(is_active=True).select_related('department')
+    
+    return profiles.select_related('user').prefetch_related(
+        'companies',
+        Prefetch('user__department_memberships', queryset=memberships, to_attr='active_memberships'),
+        Prefetch('user__teams', queryset=active_teams, to_attr='active_teams'),
+        Prefetch('user__led_teams', queryset=active_teams, to_attr='active_led_teams'),
+    )
+
+
+def build_profile_documents(profiles) -> List[Tuple[int, str, str, Dict]]:
+    """
+    Baut Embedding-Texte und Token-Index für viele Profile mit fester Anzahl an Queries
+    
+    Args:
+        profiles: UserProfile-QuerySet
+        
+    Returns:
+        List[Tuple[int, str, str, Dict]]: (profile_id, text, content_hash, search_tokens)
+    """
+    documents = []
+    for profile in prefetch_profile_documents(profiles):
+        text = build_profile_text(profile)
+        documents.append((
+            profile.pk, text, profile_text_hash(text), build_profile_search_tokens(profile)
+        ))
+    return documents
 
 
 def search_profiles_semantic(query: str, top_k: int = 5, user=None, track_query: bool = True):
@@ -734,92 +1034,104 @@ def search_profiles_semantic(query: str, top_k: int = 5, user=None, track_query:
     if not manager.is_available():
         return []
     
-    # Query-Embedding generieren (mit bereinigter Query!)
-    query_embedding = manager.generate(query_cleaned)
+    # Query-Embedding generieren (mit bereinigter Query!) - gecacht für wiederholte Suchen
+    query_embedding = manager.generate_query(query_cleaned)
     if not query_embedding:
         return []
     
-    # Alle Profile mit Embeddings laden (nur aktive User)
-    profiles = UserProfile.objects.filter(
+    # Kandidaten per Vektor-Index: ein Matrix-Vektor-Produkt + Top-K statt
+    # alle Profile zu laden und einzeln zu vergleichen
+    from .vector_index import get_profile_vector_index, parse_embedding
+    
+    candidate_pool = getattr(settings, 'EMBEDDING_CONFIG', {}).get('candidate_pool', 200)
+    candidates = get_profile_vector_index().search(
+        query_embedding, max(candidate_pool, top_k)
+    )
+    
+    # Nur Kandidaten laden (Filter erneut anwenden - Index kann kurzzeitig veraltet sein)
+    profiles_by_id = UserProfile.objects.filter(
+        pk__in=[profile_id for profile_id, _ in candidates],
         is_searchable=True,
-        user__is_active=True,
-        embedding_vector__isnull=False
-    ).select_related('user')
+        user__is_active=True
+    ).select_related('user').in_bulk()
+    
+    candidates = [
+        (profiles_by_id[profile_id], similarity)
+        for profile_id, similarity in candidates
+        if profile_id in profiles_by_id
+    ]
+    
+    # Keyword-Kandidaten ergänzen: Starke Keyword-Treffer mit niedriger
+    # Vektor-Ähnlichkeit liegen evtl. außerhalb des candidate_pool und würden
+    # sonst nie geboostet. Gleiche Felder wie der Token-Index (KEYWORD_BOOST_FIELDS),
+    # Substring-Treffer, begrenzt auf candidate_pool Profile.
+    query_words = list(expanded_terms)  # Inkl. Synonyme
+    keyword_filter = models.Q()
+    for word in {w.lower() for w in query_words if len(w) >= 3}:
+        keyword_filter |= (
+            models.Q(job_title__icontains=word)
+            | models.Q(responsibilities__icontains=word)
+            | models.Q(expertise_areas__icontains=word)
+            | models.Q(
+                user__department_memberships__is_active=True,
+                user__department_memberships__department__search_keywords__icontains=word
+            )
+            | models.Q(
+                user__department_memberships__is_active=True,
+                user__department_memberships__role__search_keywords__icontains=word
+            )
+        )
+    if keyword_filter:
+        keyword_ids = UserProfile.objects.filter(
+            keyword_filter,
+            is_searchable=True,
+            user__is_active=True
+        ).exclude(
+            pk__in=[profile.pk for profile, _ in candidates]
+        ).order_by('pk').values_list('pk', flat=True).distinct()[:candidate_pool]
+    
+        for profile in UserProfile.objects.filter(pk__in=list(keyword_ids)).select_related('user'):
+            # Ähnlichkeit direkt aus dem gespeicherten Embedding (ohne Embedding: nur Keyword-Boost)
+            candidates.append((
+                profile,
+                EmbeddingProvider.cosine_similarity(query_embedding, parse_embedding(profile.embedding_vector))
+            ))
+    
+    # KEYWORD BOOST mit Fuzzy Matching & Synonym-Support - vorberechneter
+    # Token-Index pro Profil, ein vektorisierter Fuzzy-Vergleich für alle Kandidaten
+    missing_tokens = [profile.pk for profile, _ in candidates if not profile.search_tokens]
+    if missing_tokens:
+        # Noch kein gespeicherter Token-Index → für alle fehlenden auf einmal bauen
+        built_tokens = {
+            p.pk: build_profile_search_tokens(p)
+            for p in prefetch_profile_documents(UserProfile.objects.filter(pk__in=missing_tokens))
+        }
+    candidate_tokens = [
+        profile.search_tokens or built_tokens[profile.pk]
+        for profile, _ in candidates
+    ]
+    keyword_boosts = compute_keyword_boosts(candidate_tokens, query_words)
     
     # Similarities berechnen mit Details
     results = []
-    for profile in profiles:
+    for (profile, similarity), search_tokens, keyword_boost in zip(
+        candidates, candidate_tokens, keyword_boosts
+    ):
         try:
-            # embedding_vector ist bereits eine Liste, nicht JSON
-            corpus_vec = profile.embedding_vector
-            if isinstance(corpus_vec, str):
-                corpus_vec = json.loads(corpus_vec)
-            
-            similarity = manager._provider.cosine_similarity(query_embedding, corpus_vec)
-            
-            # KEYWORD BOOST mit Fuzzy Matching & Synonym-Support
-            keyword_boost = 0.0
-            query_words = list(expanded_terms)  # Inkl. Synonyme
-            
-            # Get primary department for boost fields
-            primary_dept = profile.primary_department
-            dept_keywords = primary_dept.search_keywords if primary_dept and primary_dept.search_keywords else ''
-            
-            primary_role = profile.primary_role
-            role_keywords = primary_role.search_keywords if primary_role and primary_role.search_keywords else ''
-            
-            # Prüfe wichtige Felder auf Keyword-Matches (inkl. Fuzzy)
-            boost_fields = [
-                ('responsibilities', profile.responsibilities or ''),
-                ('expertise_areas', profile.expertise_areas or ''),
-                ('role_keywords', role_keywords),
-                ('department_keywords', dept_keywords),
-                ('job_title', profile.job_title or ''),
-            ]
-            
-            for field_name, field_text in boost_fields:
-                if not field_text:
-                    continue
-                    
-                field_weight = get_field_weight(field_name)
-                matches = 0
-                
-                for word in query_words:
-                    if len(word) < 3:
-                        continue
-                    # Fuzzy match mit 75% threshold
-                    if fuzzy_match_in_text(word, field_text, threshold=75):
-                        matches += 1
-                
-                if matches > 0:
-                    # Boost proportional zu Anzahl Matches * Feldgewichtung
-                    keyword_boost += field_weight * (matches / len(query_words))
-            
             # Kombiniere Semantic Score + Keyword Boost (max 100%)
             final_score = min(similarity + keyword_boost, 1.0)
             
             # Matched fields identifizieren (für "Warum dieser Treffer?")
             matched_fields = []
             
-            # Sammle alle durchsuchbaren Felder
-            primary_dept = profile.primary_department
-            dept_name = primary_dept.name if primary_dept else ''
-            dept_keywords = primary_dept.search_keywords if primary_dept and primary_dept.search_keywords else ''
-            
-            primary_role = profile.primary_role
-            role_name = primary_role.name if primary_role else ''
-            role_keywords = primary_role.search_keywords if primary_role and primary_role.search_keywords else ''
-            
-            primary_specs = profile.primary_specialties
-            spec_names = ', '.join([s.name for s in primary_specs]) if primary_specs else ''
-            
+            # Sammle alle durchsuchbaren Felder (Namen aus dem Token-Index)
             searchable_fields = [
                 ('Position', profile.job_title or ''),
-                ('Abteilung', dept_name),
-                ('Bereich', dept_keywords),
-                ('Rolle', role_name),
-                ('Rollenaufgaben', role_keywords),
-                ('Fachbereich', spec_names),
+                ('Abteilung', search_tokens['department']),
+                ('Bereich', search_tokens['department_keywords']),
+                ('Rolle', search_tokens['role']),
+                ('Rollenaufgaben', search_tokens['role_keywords']),
+                ('Fachbereich', search_tokens['specialties']),
                 ('Verantwortung', profile.responsibilities or ''),
                 ('Expertise', profile.expertise_areas or ''),
             ]
@@ -840,9 +1152,8 @@ def search_profiles_semantic(query: str, top_k: int = 5, user=None, track_query:
             # Fallback: Wenn keine exakten Matches, zeige wichtigste Felder
             if not matched_fields and final_score >= 0.15:
                 # Zeige Department und wichtigstes User-Feld
-                primary_dept = profile.primary_department
-                if primary_dept:
-                    matched_fields.append(('Abteilung', primary_dept.name))
+                if search_tokens['department']:
+                    matched_fields.append(('Abteilung', search_tokens['department']))
                 if profile.responsibilities:
                     matched_fields.append(('Verantwortung', profile.responsibilities))
                 elif profile.expertise_areas:
@@ -857,7 +1168,7 @@ def search_profiles_semantic(query: str, top_k: int = 5, user=None, track_query:
                 'user_id': profile.user.id,
                 'display_name': profile.display_name,
             })
-        except (json.JSONDecodeError, TypeError, AttributeError) as e:
+        except (TypeError, AttributeError, KeyError) as e:
             logger.warning(f"Profile {profile.user_id} skip: {e}")
             continue
     
@@ -1,11 +1,19 @@
 """
 Celery Tasks für Embedding-Generierung und KI-Features
 """
+import json
 import logging
 from celery import shared_task
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
 from .profile_models import UserProfile
-from .embedding_service import generate_profile_embedding
+from .embedding_service import (
+    build_profile_search_tokens,
+    build_profile_text,
+    get_embedding_manager,
+    profile_text_hash,
+)
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -16,24 +24,57 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 @shared_task(name='auth_user.tasks.generate_profile_embedding_task')
-def generate_profile_embedding_task(profile_id: int):
+def generate_profile_embedding_task(profile_id: int, reindex: bool = False):
     """
     Generiert Embedding für ein Profil (asynchron)
     
     Args:
         profile_id: UserProfile ID
+        reindex: Vektor auch bei unverändertem Text in den Index schreiben
+                 (Profil ist wieder suchbar geworden)
     """
     try:
-        profile = UserProfile.objects.get(id=profile_id)
+        profile = UserProfile.objects.get(pk=profile_id)
+        
+        # Text bauen - unverändert seit letztem Embedding → nichts zu tun
+        text = build_profile_text(profile)
+        content_hash = profile_text_hash(text)
+        search_tokens = build_profile_search_tokens(profile)
+        if profile.embedding_vector and profile.embedding_text_hash == content_hash:
+            if profile.search_tokens != search_tokens:
+                profile.search_tokens = search_tokens
+                profile.save(update_fields=['search_tokens'])
+            if reindex and profile.is_searchable and profile.user.is_active:
+                from .vector_index import get_profile_vector_index, parse_embedding
+                vector = parse_embedding(profile.embedding_vector)
+                if vector:
+                    get_profile_vector_index().upsert(profile.pk, vector)
+            logger.info(f"ℹ️ Embedding für Profil {profile_id} unverändert")
+            return True
         
         # Generiere Embedding
-        embedding = generate_profile_embedding(profile)
+        embedding = get_embedding_manager().generate(text)
         
         if embedding:
             # Speichere Embedding
-            import json
             profile.embedding_vector = json.dumps(embedding)
-            profile.save(update_fields=['embedding_vector', 'embedding_updated_at'])
+            profile.embedding_updated_at = timezone.now()
+            profile.embedding_text_hash = content_hash
+            profile.search_tokens = search_tokens
+            profile.save(update_fields=[
+                'embedding_vector', 'embedding_updated_at', 'embedding_text_hash', 'search_tokens'
+            ])
+            
+            # Vektor-Index inkrementell aktualisieren (andere Worker via Redis-Version)
+            from .vector_index import PgVectorIndex, get_profile_vector_index
+            index = get_profile_vector_index()
+            if profile.is_searchable and profile.user.is_active:
+                index.upsert(profile.pk, embedding)
+            elif not isinstance(index, PgVectorIndex):
+                # pgvector filtert is_searchable/is_active in der Suche - Zeile
+                # behalten, damit das Profil beim Wieder-Einblenden gefunden wird
+                index.remove(profile.pk)
+            
             logger.info(f"✅ Embedding generiert für Profil {profile_id}")
             return True
         else:
@@ -48,6 +89,92 @@ def generate_profile_embedding_task(profile_id: int):
         return False
 
 
+def embed_profiles_in_chunks(profiles, chunk_size: int = 256, force: bool = False) -> dict:
+    """
+    Berechnet Embeddings für ein Profil-QuerySet in Chunks
+    
+    Pro Chunk: Texte und Token-Index mit fester Query-Anzahl bauen, Profile mit
+    unverändertem Text-Hash überspringen, ein Batch-Encode, ein bulk_update.
+    
+    Args:
+        profiles: UserProfile-QuerySet
+        chunk_size: Profile pro Chunk
+        force: Auch unveränderte Profile neu einbetten
+        
+    Returns:
+        dict mit 'updated', 'unchanged' und 'failed'
+    """
+    from .embedding_service import build_profile_documents
+    from .vector_index import get_profile_vector_index
+    
+    manager = get_embedding_manager()
+    if not manager.is_available():
+        logger.warning("⚠️  Embedding-Service nicht verfügbar")
+        return {'updated': 0, 'unchanged': 0, 'failed': 0}
+    
+    stored = {
+        pk: (text_hash, has_tokens)
+        for pk, text_hash, has_tokens in profiles.order_by('pk').annotate(
+            has_tokens=ExpressionWrapper(Q(search_tokens__isnull=False), output_field=BooleanField())
+        ).values_list('pk', 'embedding_text_hash', 'has_tokens')
+    }
+    profile_ids = list(stored)
+    updated = 0
+    unchanged = 0
+    failed = 0
+    
+    for start in range(0, len(profile_ids), chunk_size):
+        documents = build_profile_documents(
+            UserProfile.objects.filter(pk__in=profile_ids[start:start + chunk_size])
+        )
+        if not force:
+            pending = [doc for doc in documents if doc[2] != stored[doc[0]][0]]
+            unchanged_docs = [doc for doc in documents if doc[2] == stored[doc[0]][0]]
+            unchanged += len(unchanged_docs)
+            documents = pending
+            
+            # Embedding aktuell, aber noch ohne Token-Index (Altbestand) → nur Tokens nachtragen
+            UserProfile.objects.bulk_update([
+                UserProfile(pk=profile_id, search_tokens=search_tokens)
+                for profile_id, _, _, search_tokens in unchanged_docs
+                if not stored[profile_id][1]
+            ], ['search_tokens'])
+        if not documents:
+            continue
+        
+        embeddings = manager.generate_batch([text for _, text, _, _ in documents])
+        
+        now = timezone.now()
+        to_update = []
+        for (profile_id, _, content_hash, search_tokens), embedding in zip(documents, embeddings):
+            if not embedding:
+                failed += 1
+                continue
+            to_update.append(UserProfile(
+                pk=profile_id,
+                embedding_vector=json.dumps(embedding),
+                embedding_updated_at=now,
+                embedding_text_hash=content_hash,
+                search_tokens=search_tokens
+            ))
+        
+        UserProfile.objects.bulk_update(
+            to_update,
+            ['embedding_vector', 'embedding_updated_at', 'embedding_text_hash', 'search_tokens']
+        )
+        updated += len(to_update)
+        
+        # Vektor-Index aktualisieren (pgvector: Zeilen schreiben, NumPy: Neuaufbau in allen Workern)
+        get_profile_vector_index().bulk_upsert([
+            (profile_id, embedding)
+            for (profile_id, _, _, _), embedding in zip(documents, embeddings)
+            if embedding
+        ])
+        logger.info(f"🔄 Embeddings: {updated + unchanged}/{len(profile_ids)} verarbeitet")
+    
+    return {'updated': updated, 'unchanged': unchanged, 'failed': failed}
+
+
 @shared_task(name='auth_user.tasks.regenerate_all_embeddings_task')
 def regenerate_all_embeddings_task():
     """
@@ -59,13 +186,13 @@ def regenerate_all_embeddings_task():
         user__is_active=True
     )
     
-    count = 0
-    for profile in profiles:
-        generate_profile_embedding_task.delay(profile.user_id)
-        count += 1
+    result = embed_profiles_in_chunks(profiles)
     
-    logger.info(f"✅ {count} Embedding-Tasks in Queue eingeplant")
-    return {'scheduled': count}
+    logger.info(
+        f"✅ {result['updated']} Embeddings neu generiert, {result['unchanged']} unverändert "
+        f"({result['failed']} fehlgeschlagen)"
+    )
+    return result
 
 
 @shared_task(name='auth_user.tasks.update_embeddings_for_department')
@@ -80,16 +207,17 @@ def update_embeddings_for_department(department_id: int):
     
     try:
         department = Department.objects.get(id=department_id)
-        members = department.members.all()
+        profiles = UserProfile.objects.filter(
+            user__department_memberships__department=department,
+            user__department_memberships__is_active=True,
+            is_searchable=True,
+            user__is_active=True
+        ).distinct()
         
-        count = 0
-        for user in members:
-            if hasattr(user, 'profile'):
-                generate_profile_embedding_task.delay(user.profile.id)
-                count += 1
+        result = embed_profiles_in_chunks(profiles)
         
-        logger.info(f"✅ {count} Embeddings-Tasks für Dept {department.name} eingeplant")
-        return {'department': department.name, 'count': count}
+        logger.info(f"✅ {result['updated']} Embeddings für Dept {department.name} aktualisiert")
+        return {'department': department.name, 'count': result['updated']}
     
     except Exception as e:
         logger.error(f"❌ Fehler beim Update: {e}")
@@ -145,6 +273,9 @@ def health_check_embeddings():
     manager = get_embedding_manager()
     available = manager.is_available()
     
+    from .embedding_cache import get_query_embedding_cache
+    query_cache = get_query_embedding_cache().get_stats()
+    
     if available:
         logger.info("✅ Embedding-Service OK")
         
@@ -163,8 +294,9 @@ def health_check_embeddings():
             'status': 'ok',
             'embeddings': count_with_embeddings,
             'total': total_profiles,
-            'coverage_percent': round(coverage, 2)
+            'coverage_percent': round(coverage, 2),
+            'query_cache': query_cache
         }
     else:
         logger.warning("⚠️  Embedding-Service nicht verfügbar")
-        return {'status': 'unavailable'}
+        return {'status': 'unavailable', 'query_cache': query_cache}
@@ -5,7 +5,7 @@ import logging
 from typing import List, Dict, Optional
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, Sum
 
 logger = logging.getLogger(__name__)
 
@@ -21,43 +21,25 @@ def calculate_click_boost(profile_id: int, query_text: str) -> float:
     Returns:
         Boost-Wert (0.0 - 0.3)
     """
-    from .search_models import SearchClick, SearchQuery
-    
-    # Prüfe wie oft dieses Profil bei ähnlichen Queries geklickt wurde
-    # Zeitfenster: letzte 90 Tage
-    cutoff_date = timezone.now() - timedelta(days=90)
-    
-    # Exakte Query-Matches
-    exact_clicks = SearchClick.objects.filter(
-        search_query__query_text__iexact=query_text,
-        clicked_profile_id=profile_id,
-        search_query__created_at__gte=cutoff_date
-    ).count()
-    
-    # Ähnliche Queries (enthält Query-Wörter)
-    query_words = set(query_text.lower().split())
-    if len(query_words) >= 2:
-        similar_clicks = SearchClick.objects.filter(
-            clicked_profile_id=profile_id,
-            search_query__created_at__gte=cutoff_date
-        ).annotate(
-            query_lower=Q(search_query__query_text__icontains=list(query_words)[0])
-        ).count()
-    else:
-        similar_clicks = 0
-    
+    click_boosts, _ = calculate_click_and_temporal_boosts([profile_id], query_text)
+    return click_boosts.get(profile_id, 0.0)
+
+
+def _click_boost_from_counts(exact_clicks: int, similar_clicks: int) -> float:
+    """Click-Boost aus Klickzahlen (gemeinsame Formel für Einzel- und Bulk-Berechnung)"""
     # Berechne Boost
     # - Exakte Query: 0.05 pro Click (max 0.25)
     # - Ähnliche Query: 0.01 pro Click (max 0.05)
     exact_boost = min(exact_clicks * 0.05, 0.25)
     similar_boost = min(similar_clicks * 0.01, 0.05)
     
-    total_boost = exact_boost + similar_boost
-    
-    if total_boost > 0:
-        logger.debug(f"Profile {profile_id} click boost: {total_boost:.3f} (exact: {exact_clicks}, similar: {similar_clicks})")
-    
-    return min(total_boost, 0.3)  # Max 30% Boost
+    return min(exact_boost + similar_boost, 0.3)  # Max 30% Boost
+
+
+def _temporal_boost_from_count(recent_clicks: int) -> float:
+    """Trending-Boost aus Klicks der letzten 7 Tage"""
+    # 1 Click = +2% Boost (max 10%)
+    return min(recent_clicks * 0.02, 0.10)
 
 
 def calculate_position_penalty(clicked_position: int, relevance_score: float) -> float:
@@ -148,22 +130,135 @@ def calculate_temporal_boost(profile_id: int) -> float:
     Returns:
         Boost-Wert (0.0 - 0.10)
     """
-    from .search_models import SearchClick
-    
     # Profile die in letzten 7 Tagen oft geklickt wurden → "Trending"
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_clicks = SearchClick.objects.filter(
-        clicked_profile_id=profile_id,
-        created_at__gte=week_ago
-    ).count()
+    _, temporal_boosts = calculate_click_and_temporal_boosts([profile_id], '')
+    return temporal_boosts.get(profile_id, 0.0)
+
+
+def calculate_click_and_temporal_boosts(profile_ids, query_text: str):
+    """
+    Bulk-Variante von calculate_click_boost + calculate_temporal_boost
     
-    # 1 Click = +2% Boost (max 10%)
-    boost = min(recent_clicks * 0.02, 0.10)
+    Eine gruppierte Aggregation über SearchClickStats für alle Kandidaten
+    statt Count-Queries auf den Roh-Klicks pro Profil.
+    
+    - exakt: Klicks auf genau diese Query (90 Tage)
+    - ähnlich: alle Klicks auf das Profil (90 Tage), nur bei >= 2 Query-Wörtern
+    - trending: alle Klicks auf das Profil (7 Tage)
+    
+    Die Fenster laufen nur bei der täglichen Kompaktierung aus - "7 Tage"
+    heißt effektiv 7-8 Tage (siehe SearchClickStats).
     
-    if boost > 0:
-        logger.debug(f"Profile {profile_id} temporal boost: {boost:.3f} ({recent_clicks} recent clicks)")
+    Args:
+        profile_ids: Kandidaten-Profil-IDs
+        query_text: Such-Query
+        
+    Returns:
+        Tuple (click_boosts, temporal_boosts) als Dict profile_id → Boost
+    """
+    from .search_models import SearchClickStats
+    
+    profile_ids = list(profile_ids)
+    if not profile_ids:
+        return {}, {}
+    
+    normalized_query = SearchClickStats.normalize_query(query_text)
+    
+    rows = SearchClickStats.objects.filter(
+        profile_id__in=profile_ids
+    ).values('profile_id').annotate(
+        in_window=Sum('clicks_90d'),
+        exact=Sum('clicks_90d', filter=Q(normalized_query=normalized_query)),
+        recent=Sum('clicks_7d'),
+    ).order_by()
+    aggregates = {row['profile_id']: row for row in rows}
+    
+    # Ähnliche Queries zählen nur bei mehreren Query-Wörtern
+    count_similar = len(set(query_text.lower().split())) >= 2
+    
+    click_boosts = {}
+    temporal_boosts = {}
+    for profile_id in profile_ids:
+        row = aggregates.get(profile_id, {})
+        if query_text:
+            similar_clicks = (row.get('in_window') or 0) if count_similar else 0
+            click_boosts[profile_id] = _click_boost_from_counts(row.get('exact') or 0, similar_clicks)
+        temporal_boosts[profile_id] = _temporal_boost_from_count(row.get('recent') or 0)
     
-    return boost
+    return click_boosts, temporal_boosts
+
+
+def calculate_personalization_boosts(searcher_profile, profiles) -> Dict[int, float]:
+    """
+    Bulk-Variante von calculate_personalization_boost
+    
+    Lädt primäre Abteilungen und aktive Teams für Suchenden und alle
+    Kandidaten mit je einer Query. Ergebnisse sind identisch zur Einzel-Funktion.
+    
+    Args:
+        searcher_profile: UserProfile des Suchenden
+        profiles: UserProfile-Instanzen der Kandidaten
+        
+    Returns:
+        Dict profile_id → Boost (0.0 - 0.25)
+    """
+    from .profile_models import DepartmentMember, Team
+    
+    profiles = list(profiles)
+    if searcher_profile is None or not profiles:
+        return {}
+    
+    searcher_id = searcher_profile.pk
+    user_ids = {searcher_id} | {profile.pk for profile in profiles}
+    
+    # Primäre Abteilung: erste aktive primäre Zuordnung (Default-Ordering wie .first())
+    primary_departments = {}
+    for user_id, department_id in DepartmentMember.objects.filter(
+        user_id__in=user_ids,
+        is_primary=True,
+        is_active=True
+    ).values_list('user_id', 'department_id'):
+        primary_departments.setdefault(user_id, department_id)
+    
+    team_ids = {}
+    for user_id, team_id in Team.objects.filter(
+        is_active=True,
+        members__in=user_ids
+    ).values_list('members', 'id'):
+        team_ids.setdefault(user_id, set()).add(team_id)
+    
+    searcher_dept = primary_departments.get(searcher_id)
+    searcher_location = (searcher_profile.office_location or '').lower()
+    searcher_teams = team_ids.get(searcher_id, set())
+    
+    boosts = {}
+    for found in profiles:
+        boost = 0.0
+        
+        # BOOST 1: Gleiche primäre Abteilung (+10%)
+        found_dept = primary_departments.get(found.pk)
+        if searcher_dept and found_dept and searcher_dept == found_dept:
+            boost += 0.10
+        
+        # BOOST 2: Direkter Vorgesetzter (+15%)
+        if searcher_profile.direct_supervisor_id and searcher_profile.direct_supervisor_id == found.pk:
+            boost += 0.15
+        
+        # BOOST 3: Direkter Untergebener (+12%)
+        if found.direct_supervisor_id and found.direct_supervisor_id == searcher_id:
+            boost += 0.12
+        
+        # BOOST 4: Gleicher Standort (+5%)
+        if searcher_location and found.office_location and searcher_location == found.office_location.lower():
+            boost += 0.05
+        
+        # BOOST 5: Gleiche Teams (+8%)
+        if searcher_teams & team_ids.get(found.pk, set()):
+            boost += 0.08
+        
+        boosts[found.pk] = min(boost, 0.25)  # Max 25% Personalisierungs-Boost
+    
+    return boosts
 
 
 def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: str = "") -> List[Dict]:
@@ -187,18 +282,14 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
     # MANUELLE MAPPINGS: Prüfe ob Admin manuelle Zuordnungen erstellt hat
     manual_boosts = {}
     if query_text:
-        from .search_models import SearchProfileMapping
+        from .search_dictionaries import get_search_dictionaries
         
         logger.info(f"Checking manual mappings for query: '{query_text}'")
         
-        # Exakte und Partial Matches
-        mappings = SearchProfileMapping.objects.filter(
-            is_active=True
-        ).filter(
-            query_term__icontains=query_text
-        ).select_related('profile')
+        # Exakte und Partial Matches (gecachter Teilstring-Index)
+        mappings = get_search_dictionaries().find_mappings(query_text)
         
-        logger.info(f"Found {mappings.count()} active mappings")
+        logger.info(f"Found {len(mappings)} active mappings")
         
         for mapping in mappings:
             # Exakter Match = voller Boost, Partial Match = reduzierter Boost
@@ -208,7 +299,7 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
                 # Partial Match: Boost proportional zur Übereinstimmung
                 boost_multiplier = len(query_text) / len(mapping.query_term) if len(mapping.query_term) > 0 else 0.5
             
-            profile_id = mapping.profile.pk
+            profile_id = mapping.profile_id
             current_boost = manual_boosts.get(profile_id, 0)
             new_boost = mapping.boost_score * boost_multiplier
             
@@ -216,29 +307,22 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
             if new_boost > current_boost:
                 manual_boosts[profile_id] = new_boost
                 logger.info(
-                    f"Manual mapping: '{mapping.query_term}' → {mapping.profile.user.get_full_name()} "
+                    f"Manual mapping: '{mapping.query_term}' → Profil {profile_id} "
                     f"(+{new_boost:.3f}, multiplier: {boost_multiplier:.2f})"
                 )
     
     # CLICK-LEARNING: Finde Profile mit Click-History für diese Query
     learned_profiles = {}
     if query_text:
-        from .search_models import SearchClick, SearchQuery
-        
-        # Zeitfenster: letzte 90 Tage
-        cutoff_date = timezone.now() - timedelta(days=90)
+        from .search_models import SearchClickStats
         
-        # Finde alle Profile mit Klicks auf exakte Query
-        clicks = SearchClick.objects.filter(
-            search_query__query_text__iexact=query_text,
-            search_query__created_at__gte=cutoff_date
-        ).values('clicked_profile_id').annotate(
-            click_count=Count('id')
-        ).filter(click_count__gte=1)  # Mindestens 1 Klick
+        # Finde alle Profile mit Klicks auf exakte Query (letzte 90 Tage)
+        clicks = SearchClickStats.objects.filter(
+            normalized_query=SearchClickStats.normalize_query(query_text),
+            clicks_90d__gte=1  # Mindestens 1 Klick
+        ).values_list('profile_id', 'clicks_90d')
         
-        for click_data in clicks:
-            profile_id = click_data['clicked_profile_id']
-            click_count = click_data['click_count']
+        for profile_id, click_count in clicks:
             
             # Berechne Boost: 0.15 pro Klick (deutlicher als vorher 0.05)
             click_boost = min(click_count * 0.15, 0.5)  # Max 50% Boost
@@ -249,13 +333,17 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
     # WICHTIG: Füge Profile mit manuellen Mappings ODER Click-Learning hinzu, auch wenn nicht in results!
     existing_profile_ids = {r['profile'].pk for r in results}
     
+    # Fehlende Profile aus Mappings / Click-Learning mit einer Query laden
+    from .models import UserProfile
+    missing_ids = (set(manual_boosts) | set(learned_profiles)) - existing_profile_ids
+    missing_profiles = UserProfile.objects.select_related('user').in_bulk(missing_ids) if missing_ids else {}
+    
     # Manuelle Mappings hinzufügen
     if manual_boosts:
         for profile_id, boost in manual_boosts.items():
             if profile_id not in existing_profile_ids:
-                from .models import UserProfile
-                try:
-                    profile = UserProfile.objects.get(pk=profile_id)
+                profile = missing_profiles.get(profile_id)
+                if profile is not None:
                     results.append({
                         'profile': profile,
                         'score': boost,
@@ -266,16 +354,13 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
                     })
                     existing_profile_ids.add(profile_id)
                     logger.info(f"✨ Added by manual mapping: {profile.user.get_full_name()} (score={boost:.3f})")
-                except UserProfile.DoesNotExist:
-                    pass
     
     # Click-gelernte Profile hinzufügen
     if learned_profiles:
         for profile_id, boost in learned_profiles.items():
             if profile_id not in existing_profile_ids and boost >= 0.15:  # Mindestens 1 Klick
-                from .models import UserProfile
-                try:
-                    profile = UserProfile.objects.get(pk=profile_id)
+                profile = missing_profiles.get(profile_id)
+                if profile is not None:
                     results.append({
                         'profile': profile,
                         'score': boost,
@@ -286,8 +371,16 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
                     })
                     existing_profile_ids.add(profile_id)
                     logger.info(f"✨ Added by click-learning: {profile.user.get_full_name()} (score={boost:.3f})")
-                except UserProfile.DoesNotExist:
-                    pass
+    
+    # Alle Signale für alle Kandidaten auf einmal berechnen (statt Queries pro Ergebnis)
+    candidate_ids = [r['profile'].pk for r in results]
+    click_boosts, temporal_boosts = calculate_click_and_temporal_boosts(candidate_ids, query_text)
+    
+    person_boosts = {}
+    if searcher_profile_id:
+        person_boosts = calculate_personalization_boosts(
+            searcher_user.profile, [r['profile'] for r in results]
+        )
     
     for result in results:
         profile = result['profile']
@@ -301,18 +394,13 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
             total_boost += manual_boost
         
         # BOOST 1: Click-basiertes Re-Ranking
-        if query_text:
-            click_boost = calculate_click_boost(profile.pk, query_text)
-            total_boost += click_boost
+        total_boost += click_boosts.get(profile.pk, 0.0)
         
         # BOOST 2: Personalisierung
-        if searcher_profile_id:
-            person_boost = calculate_personalization_boost(searcher_profile_id, profile.pk)
-            total_boost += person_boost
+        total_boost += person_boosts.get(profile.pk, 0.0)
         
         # BOOST 3: Temporal (Trending)
-        temporal_boost = calculate_temporal_boost(profile.pk)
-        total_boost += temporal_boost
+        total_boost += temporal_boosts.get(profile.pk, 0.0)
         
         # Wende Boost an (max Score = 1.0)
         result['score'] = min(original_score + total_boost, 1.0)
@@ -338,6 +426,98 @@ def apply_learning_boosts(results: List[Dict], searcher_user=None, query_text: s
     return results
 
 
+def compact_click_stats(batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Berechnet die rollierenden Zähler von SearchClickStats aus den Roh-Klicks neu
+    
+    - Zeitfenster-Zähler (7/30/90 Tage) werden aus SearchClick neu aggregiert
+    - Fehlende Zeilen werden angelegt (Backfill)
+    - Zeilen ohne Klick in den letzten 90 Tagen werden gelöscht
+    
+    Returns:
+        Dict mit Anzahl aktualisierter, angelegter und gelöschter Zeilen
+    """
+    from django.db import transaction
+    from django.db.models import Max
+    from django.db.models.functions import Lower, Trim
+    from .search_models import SearchClick, SearchClickStats
+    
+    now = timezone.now()
+    cutoffs = {
+        field: now - timedelta(days=days)
+        for days, field in SearchClickStats.WINDOWS.items()
+    }
+    oldest_cutoff = min(cutoffs.values())
+    
+    fresh = {}
+    rows = SearchClick.objects.filter(
+        created_at__gte=oldest_cutoff
+    ).annotate(
+        normalized_query=Lower(Trim('search_query__query_text'))
+    ).values('normalized_query', 'clicked_profile_id').annotate(
+        **{
+            field: Count('id', filter=Q(created_at__gte=cutoff))
+            for field, cutoff in cutoffs.items()
+        },
+        position_sum=Sum('position'),
+        relevance_sum=Sum('relevance_score'),
+        last_clicked_at=Max('created_at'),
+    ).order_by()
+    for row in rows:
+        key = (row['normalized_query'][:500], row['clicked_profile_id'])
+        fresh[key] = row
+    
+    window_fields = list(SearchClickStats.WINDOWS.values())
+    updated = 0
+    deleted = 0
+    
+    with transaction.atomic():
+        # Veraltete Zeilen entfernen
+        deleted, _ = SearchClickStats.objects.filter(
+            Q(last_clicked_at__lt=oldest_cutoff) | Q(last_clicked_at__isnull=True)
+        ).delete()
+        
+        # Bestehende Zeilen: Zeitfenster-Zähler überschreiben
+        to_update = []
+        for stats in SearchClickStats.objects.only(
+            'id', 'normalized_query', 'profile_id', *window_fields
+        ).iterator(chunk_size=batch_size):
+            row = fresh.pop((stats.normalized_query, stats.profile_id), None)
+            changed = False
+            for field in window_fields:
+                value = row[field] if row else 0
+                if getattr(stats, field) != value:
+                    setattr(stats, field, value)
+                    changed = True
+            if changed:
+                to_update.append(stats)
+        
+        SearchClickStats.objects.bulk_update(to_update, window_fields, batch_size=batch_size)
+        updated = len(to_update)
+        
+        # Neue Zeilen (Backfill für Klicks ohne Statistik)
+        to_create = [
+            SearchClickStats(
+                normalized_query=normalized_query,
+                profile_id=profile_id,
+                clicks_total=row['clicks_90d'],
+                position_sum=row['position_sum'] or 0,
+                relevance_sum=row['relevance_sum'] or 0.0,
+                last_clicked_at=row['last_clicked_at'],
+                **{field: row[field] for field in window_fields},
+            )
+            for (normalized_query, profile_id), row in fresh.items()
+            if normalized_query
+        ]
+        SearchClickStats.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+    
+    logger.info(
+        f"✅ Klick-Statistik kompaktiert: {updated} aktualisiert, "
+        f"{len(to_create)} angelegt, {deleted} gelöscht"
+    )
+    return {'updated': updated, 'created': len(to_create), 'deleted': deleted}
+
+
 def get_query_suggestions(partial_query: str, limit: int = 5) -> List[str]:
     """
     Gibt Auto-Complete Vorschläge basierend auf häufigen Queries
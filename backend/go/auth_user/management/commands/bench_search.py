@@ -0,0 +1,588 @@
+"""
+Management Command: Reproduzierbarer Latenz-Benchmark der Suche
+
+Erzeugt eine synthetische Organisation (Abteilungen, Rollen, Fachbereiche,
+Profile, Klicks, Synonyme) in einer Transaktion, bettet alle Profile mit
+einem deterministischen Fake-Provider ein und misst p50/p95-Latenz und
+Query-Anzahl für:
+- search_profiles_semantic (Themen- und Namenssuche)
+- apply_learning_boosts
+- query_autocomplete (/api/search/autocomplete/)
+- Telefonbuch (/api/phonebook/ mit und ohne Query)
+
+Am Ende wird die Transaktion zurückgerollt - es bleiben keine Daten zurück.
+Klick-Statistiken werden nur für die synthetischen Klicks angelegt (keine
+Kompaktierung der echten SearchClickStats), Index- und Wörterbuch-Version
+laufen über eigene Redis-Keys - andere Worker bauen nichts neu auf.
+Die JSON-Ausgabe ist zum Vergleich zwischen Commits gedacht.
+
+Läuft nur gegen eine Test-Datenbank (Name beginnt mit "test_" oder SQLite
+in-memory), sonst nur mit --force.
+
+Verwendung:
+    python manage.py bench_search
+    python manage.py bench_search --force   # z.B. lokale Entwicklungs-DB
+    python manage.py bench_search --users 10000 --output bench_10k.json
+    python manage.py bench_search --users 50000 --iterations 5 --json
+"""
+import hashlib
+import json
+import math
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from auth_user.embedding_service import EmbeddingProvider, get_embedding_manager
+from auth_user.profile_models import (
+    Department,
+    DepartmentMember,
+    DepartmentRole,
+    MemberSpecialty,
+    Specialty,
+    UserProfile,
+)
+from auth_user.search_models import SearchClick, SearchClickStats, SearchQuery, SearchSynonym
+
+User = get_user_model()
+
+
+# ============================================================================
+# SYNTHETISCHE ORGANISATION
+# ============================================================================
+
+DEPARTMENT_TOPICS = [
+    ('IT', 'computer, drucker, netzwerk, hardware, software, support, server',
+     ['Systemadministrator', 'IT-Support', 'Entwickler']),
+    ('Buchhaltung', 'rechnung, kreditoren, debitoren, zahlung, mahnung, controlling',
+     ['Buchhalter', 'Controller', 'Finanzbuchhalter']),
+    ('Personal', 'urlaub, lohnabrechnung, bewerbung, vertrag, krankmeldung, personalakte',
+     ['Personalreferent', 'Lohnbuchhalter', 'Recruiter']),
+    ('Einkauf', 'bestellung, lieferant, angebot, material, beschaffung, rahmenvertrag',
+     ['Einkäufer', 'Disponent', 'Sachbearbeiter Einkauf']),
+    ('Vertrieb', 'kunde, angebot, ausschreibung, akquise, kalkulation, auftrag',
+     ['Key Account Manager', 'Vertriebsmitarbeiter', 'Kalkulator']),
+    ('Fakturierung', 'faktura, rechnungsstellung, leistungsnachweis, abrechnung, gutschrift',
+     ['Fakturist', 'Sachbearbeiter Faktura', 'Abrechnungsspezialist']),
+    ('Objektleitung', 'reinigung, objekt, revier, qualitätskontrolle, einsatzplanung',
+     ['Objektleiter', 'Vorarbeiter', 'Bereichsleiter Reinigung']),
+    ('Qualitätsmanagement', 'audit, zertifizierung, iso, reklamation, prozess',
+     ['Qualitätsmanager', 'Auditor', 'Prozessmanager']),
+    ('Arbeitssicherheit', 'unterweisung, gefährdungsbeurteilung, arbeitsschutz, psa, unfall',
+     ['Fachkraft Arbeitssicherheit', 'Sicherheitsbeauftragter']),
+    ('Recht', 'vertrag, datenschutz, haftung, versicherung, compliance',
+     ['Jurist', 'Datenschutzbeauftragter']),
+    ('Fuhrpark', 'fahrzeug, tankkarte, leasing, werkstatt, führerschein',
+     ['Fuhrparkmanager', 'Sachbearbeiter Fuhrpark']),
+    ('Marketing', 'werbung, website, messe, social media, broschüre',
+     ['Marketing Manager', 'Grafikdesigner']),
+]
+
+ROLES = [
+    ('Geschäftsführung', 'BENCH_GF', 1, 'führung, strategie, geschäftsleitung', 1),
+    ('Bereichsleitung', 'BENCH_BL', 2, 'leitung, budget, verantwortung', 3),
+    ('Abteilungsleitung', 'BENCH_AL', 3, 'leitung, personalverantwortung', 8),
+    ('Teamleitung', 'BENCH_TL', 4, 'team, koordination, einsatzplanung', 15),
+    ('Sachbearbeitung', 'BENCH_SB', 5, 'bearbeitung, service, ansprechpartner', 65),
+    ('Auszubildende', 'BENCH_AZ', 6, 'ausbildung, lernen', 8),
+]
+
+FIRST_NAMES = [
+    'Anna', 'Ben', 'Clara', 'David', 'Elena', 'Felix', 'Greta', 'Hannes', 'Ida', 'Jonas',
+    'Katrin', 'Lukas', 'Mia', 'Niklas', 'Olga', 'Paul', 'Rosa', 'Simon', 'Tanja', 'Uwe',
+]
+
+LAST_NAMES = [
+    'Albers', 'Brandt', 'Conrad', 'Dietrich', 'Engel', 'Franke', 'Graf', 'Hartmann',
+    'Imhoff', 'Jansen', 'Kruse', 'Lorenz', 'Möller', 'Nowak', 'Ostermann', 'Peters',
+    'Quast', 'Richter', 'Seidel', 'Thiele', 'Ulrich', 'Vogt', 'Wagner', 'Zander',
+]
+
+SYNONYMS = [
+    ('drucker', 'printer, druckgerät, kopierer'),
+    ('rechnung', 'invoice, faktura, abrechnung'),
+    ('urlaub', 'abwesenheit, freizeit, urlaubsantrag'),
+    ('lohn', 'gehalt, lohnabrechnung, vergütung'),
+    ('computer', 'pc, rechner, laptop'),
+    ('netzwerk', 'lan, wlan, internet'),
+    ('vertrag', 'kontrakt, vereinbarung'),
+    ('bestellung', 'order, beschaffung, einkauf'),
+    ('support', 'hilfe, unterstützung, service'),
+    ('fahrzeug', 'auto, dienstwagen, pkw'),
+]
+
+TOPIC_QUERIES = [
+    'IT Support', 'Drucker kaputt', 'Rechnung', 'Urlaub beantragen', 'Lohnabrechnung',
+    'Bestellung Material', 'Vertrag prüfen', 'Netzwerk Problem', 'Dienstwagen', 'Audit ISO',
+]
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministischer Embedding-Provider für Benchmarks
+
+    Bag-of-Words: jedes Token bekommt einen festen Zufallsvektor (Seed aus
+    SHA-256), der Text-Vektor ist die Summe. Ähnliche Texte → ähnliche Vektoren,
+    ohne Modell-Download und unabhängig von Hardware.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    @lru_cache(maxsize=None)
+    def _token_vector(self, token: str):
+        rng = random.Random(int(hashlib.sha256(token.encode('utf-8')).hexdigest()[:16], 16))
+        return [rng.gauss(0, 1) for _ in range(self.dim)]
+
+    def generate(self, text: str):
+        vector = [0.0] * self.dim
+        for token in text.lower().split():
+            token = token.strip('.,:;()!?"\'')
+            if len(token) < 2:
+                continue
+            for i, value in enumerate(self._token_vector(token)):
+                vector[i] += value
+        return vector
+
+    def search(self, query_vector, corpus_vectors, top_k=5):
+        from auth_user.vector_index import ProfileVectorIndex
+        index = ProfileVectorIndex()
+        index._load_rows = lambda: list(enumerate(corpus_vectors))
+        return index.search(query_vector, top_k)
+
+
+# Präfix der Redis-Keys für Index- und Wörterbuch-Version während des Benchmarks
+BENCH_CACHE_KEY_PREFIX = 'bench_search'
+
+
+def is_test_database(db_settings) -> bool:
+    """Test-Datenbank von Django (test_*) oder SQLite in-memory"""
+    name = str(db_settings.get('NAME') or '')
+    test_name = (db_settings.get('TEST') or {}).get('NAME')
+    return (
+        name.startswith('test_')
+        or (test_name and name == test_name)
+        or name == ':memory:'
+        or 'mode=memory' in name
+    )
+
+
+@contextmanager
+def isolated_version_keys():
+    """
+    Leitet die globalen Versions-Keys (Vektor-Index, Such-Wörterbücher) auf
+    eigene Keys um - Invalidierungen im Benchmark erreichen keine anderen Worker
+    """
+    from django.core.cache import cache
+    from auth_user import search_dictionaries, vector_index
+
+    originals = {
+        vector_index: vector_index.INDEX_VERSION_CACHE_KEY,
+        search_dictionaries: search_dictionaries.DICTIONARY_VERSION_CACHE_KEY,
+    }
+    vector_index.INDEX_VERSION_CACHE_KEY = f'{BENCH_CACHE_KEY_PREFIX}:{originals[vector_index]}'
+    search_dictionaries.DICTIONARY_VERSION_CACHE_KEY = f'{BENCH_CACHE_KEY_PREFIX}:{originals[search_dictionaries]}'
+    try:
+        yield
+    finally:
+        cache.delete_many([
+            vector_index.INDEX_VERSION_CACHE_KEY,
+            search_dictionaries.DICTIONARY_VERSION_CACHE_KEY,
+        ])
+        vector_index.INDEX_VERSION_CACHE_KEY = originals[vector_index]
+        search_dictionaries.DICTIONARY_VERSION_CACHE_KEY = originals[search_dictionaries]
+
+
+def percentile(values, pct):
+    """Nearest-Rank Perzentil"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class Command(BaseCommand):
+    help = 'Latenz-Benchmark der Suche mit synthetischer Organisation (JSON-Ausgabe)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Anzahl synthetischer Mitarbeiter (z.B. 1000, 10000, 50000; default: 1000)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=3,
+            help='Wiederholungen pro Query (default: 3)'
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=20,
+            help='Top-K der Suche wie im Telefonbuch (default: 20)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed für die synthetischen Daten (default: 42)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='JSON-Ergebnis in Datei schreiben'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Nur JSON auf stdout ausgeben'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Auch gegen eine Nicht-Test-Datenbank ausführen'
+        )
+
+    def handle(self, *args, **options):
+        if not options['force'] and not is_test_database(connection.settings_dict):
+            raise CommandError(
+                f'Datenbank "{connection.settings_dict.get("NAME")}" ist keine Test-Datenbank - '
+                f'Benchmark nur mit --force ausführen'
+            )
+
+        self.quiet = options['json']
+        rng = random.Random(options['seed'])
+
+        bench_config = dict(getattr(settings, 'EMBEDDING_CONFIG', {}))
+        bench_config.update({
+            # Eigener Provider/Modell-Name → Query-Cache und Text-Hashes kollidieren nicht mit Produktion
+            'provider': 'bench-fake',
+            'model': 'bench-fake-384',
+            # Synthetische Daten liegen nur in dieser Transaktion, nicht in der pgvector-Tabelle
+            'vector_backend': 'numpy',
+        })
+
+        manager = get_embedding_manager()
+        original_provider = manager._provider
+        manager._provider = FakeEmbeddingProvider()
+
+        try:
+            with override_settings(EMBEDDING_CONFIG=bench_config, ALLOWED_HOSTS=['*']), isolated_version_keys():
+                try:
+                    with transaction.atomic():
+                        try:
+                            report = self._run(rng, options)
+                        finally:
+                            # Synthetische Daten nie persistieren
+                            transaction.set_rollback(True)
+                finally:
+                    self._reset_caches()
+        finally:
+            manager._provider = original_provider
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self._log(f'\n💾 Ergebnis gespeichert: {options["output"]}')
+        if self.quiet:
+            self.stdout.write(output)
+
+    # ------------------------------------------------------------------
+    # Ablauf
+    # ------------------------------------------------------------------
+
+    def _run(self, rng, options):
+        from auth_user.embedding_tasks import embed_profiles_in_chunks
+        from auth_user.search_dictionaries import invalidate_search_dictionaries
+        from auth_user.vector_index import get_profile_vector_index
+
+        started = time.perf_counter()
+        users = self._generate_org(rng, options['users'])
+        setup = {'generate_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+        start = time.perf_counter()
+        embedded = embed_profiles_in_chunks(UserProfile.objects.filter(pk__in=[u.pk for u in users]))
+        setup['embed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        start = time.perf_counter()
+        self._generate_clicks(rng, users)
+        setup['clicks_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        invalidate_search_dictionaries()
+        index = get_profile_vector_index()
+        index.invalidate()
+        start = time.perf_counter()
+        index.ensure_fresh()
+        setup['index_build_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        self._log(
+            f'🏢 {len(users)} Mitarbeiter, {embedded["updated"]} Embeddings '
+            f'(Setup: {setup["generate_ms"]:.0f} ms Daten, {setup["embed_ms"]:.0f} ms Embeddings)'
+        )
+
+        searcher = users[0]
+        name_queries = [name.lower() for name in LAST_NAMES[:5]]
+        results = {
+            'search_semantic': self._bench_semantic('search_semantic', TOPIC_QUERIES, searcher, options),
+            'search_name': self._bench_semantic('search_name', name_queries, searcher, options),
+            'apply_learning_boosts': self._bench_learning(searcher, options),
+            'query_autocomplete': self._bench_endpoint(
+                'query_autocomplete', searcher, '/api/search/autocomplete/',
+                [{'q': q[:4]} for q in TOPIC_QUERIES], options
+            ),
+            'phonebook_search': self._bench_endpoint(
+                'phonebook_search', searcher, '/api/phonebook/',
+                [{'query': q} for q in TOPIC_QUERIES], options
+            ),
+            'phonebook_list': self._bench_endpoint(
+                'phonebook_list', searcher, '/api/phonebook/', [{}], options
+            ),
+        }
+
+        return {
+            'meta': {
+                'users': len(users),
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'top_k': options['top_k'],
+                'db_vendor': connection.vendor,
+                'git_commit': self._git_commit(),
+                'timestamp': timezone.now().isoformat(),
+            },
+            'setup': setup,
+            'results': results,
+        }
+
+    def _generate_org(self, rng, user_count):
+        """Legt Abteilungen, Rollen, Fachbereiche, User, Profile und Zuordnungen per bulk_create an"""
+        department_count = max(len(DEPARTMENT_TOPICS), user_count // 250)
+        departments = []
+        for i in range(department_count):
+            name, keywords, _ = DEPARTMENT_TOPICS[i % len(DEPARTMENT_TOPICS)]
+            suffix = f' {i // len(DEPARTMENT_TOPICS) + 1}' if i >= len(DEPARTMENT_TOPICS) else ''
+            departments.append(Department(
+                name=f'{name}{suffix}', code=f'B{i:04d}', search_keywords=keywords,
+                org_type='administration'
+            ))
+        departments = Department.objects.bulk_create(departments)
+
+        roles = DepartmentRole.objects.bulk_create([
+            DepartmentRole(name=name, code=code, hierarchy_level=level, search_keywords=keywords)
+            for name, code, level, keywords, _ in ROLES
+        ])
+        role_weights = [weight for *_, weight in ROLES]
+
+        specialties = Specialty.objects.bulk_create([
+            Specialty(
+                department=department, name=f'{department.name} {word.strip().title()}',
+                code=f'BENCH-{d:04d}-{k}', search_keywords=word.strip()
+            )
+            for d, department in enumerate(departments)
+            for k, word in enumerate(DEPARTMENT_TOPICS[d % len(DEPARTMENT_TOPICS)][1].split(',')[:3])
+        ])
+        specialties_by_department = {}
+        for specialty in specialties:
+            specialties_by_department.setdefault(specialty.department_id, []).append(specialty)
+
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench_{i:06d}',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                email=f'bench_{i:06d}@bench.invalid',
+                password='!',
+                is_active=rng.random() > 0.03,
+            )
+            for i in range(user_count)
+        ], batch_size=2000)
+        # Bei Backends ohne RETURNING (z.B. MySQL) IDs nachladen
+        if users and users[0].pk is None:
+            users = list(User.objects.filter(username__startswith='bench_').order_by('username'))
+
+        profiles = []
+        members = []
+        for user in users:
+            d = rng.randrange(len(departments))
+            department = departments[d]
+            _, keywords, titles = DEPARTMENT_TOPICS[d % len(DEPARTMENT_TOPICS)]
+            words = [w.strip() for w in keywords.split(',')]
+            profiles.append(UserProfile(
+                user=user,
+                job_title=rng.choice(titles),
+                responsibilities=', '.join(rng.sample(words, k=min(3, len(words)))),
+                expertise_areas=', '.join(rng.sample(words, k=min(2, len(words)))),
+                is_searchable=True,
+            ))
+            members.append(DepartmentMember(
+                user=user, department=department,
+                role=rng.choices(roles, weights=role_weights)[0], is_primary=True
+            ))
+        UserProfile.objects.bulk_create(profiles, batch_size=2000)
+        members = DepartmentMember.objects.bulk_create(members, batch_size=2000)
+
+        MemberSpecialty.objects.bulk_create([
+            MemberSpecialty(
+                member=member, specialty=rng.choice(specialties_by_department[member.department_id]),
+                is_primary=True
+            )
+            for member in members
+        ], batch_size=2000)
+
+        SearchSynonym.objects.bulk_create([
+            SearchSynonym(term=term, synonyms=synonyms) for term, synonyms in SYNONYMS
+        ], ignore_conflicts=True)
+
+        return users
+
+    def _generate_clicks(self, rng, users):
+        """
+        Such-Historie: je Query 0-2 Klicks auf zufällige Profile
+
+        SearchClickStats wird direkt aus den synthetischen Klicks befüllt statt
+        über compact_click_stats() - das würde alle echten Zeilen neu schreiben.
+        """
+        queries = SearchQuery.objects.bulk_create([
+            SearchQuery(
+                user=rng.choice(users),
+                query_text=rng.choice(TOPIC_QUERIES),
+                result_count=rng.randint(1, 20),
+                avg_score=rng.random(),
+            )
+            for _ in range(max(len(users) // 2, 100))
+        ], batch_size=2000)
+        clicks = SearchClick.objects.bulk_create([
+            SearchClick(
+                search_query=query, clicked_profile_id=rng.choice(users).pk,
+                position=rng.randint(1, 10), relevance_score=rng.random()
+            )
+            for query in queries
+            for _ in range(rng.randint(0, 2))
+        ], batch_size=2000)
+
+        now = timezone.now()
+        stats = {}
+        for click in clicks:
+            key = (SearchClickStats.normalize_query(click.search_query.query_text), click.clicked_profile_id)
+            row = stats.get(key)
+            if row is None:
+                row = stats[key] = SearchClickStats(
+                    normalized_query=key[0], profile_id=key[1], last_clicked_at=now
+                )
+            # Alle synthetischen Klicks sind "jetzt" → zählen in jedem Zeitfenster
+            for field in list(SearchClickStats.WINDOWS.values()) + ['clicks_total']:
+                setattr(row, field, getattr(row, field) + 1)
+            row.position_sum += click.position
+            row.relevance_sum += click.relevance_score
+        SearchClickStats.objects.bulk_create(stats.values(), batch_size=2000)
+
+    # ------------------------------------------------------------------
+    # Messungen
+    # ------------------------------------------------------------------
+
+    def _measure(self, name, calls, iterations):
+        """Führt jeden Call `iterations` mal aus (plus Warm-up) und aggregiert Zeit & Queries"""
+        for call in calls:
+            call()  # Warm-up (Index, Wörterbücher, Query-Cache)
+
+        times = []
+        query_counts = []
+        for _ in range(iterations):
+            for call in calls:
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    call()
+                    times.append((time.perf_counter() - start) * 1000)
+                query_counts.append(len(ctx.captured_queries))
+
+        stats = {
+            'runs': len(times),
+            'p50_ms': round(percentile(times, 50), 2),
+            'p95_ms': round(percentile(times, 95), 2),
+            'mean_ms': round(sum(times) / len(times), 2),
+            'queries_p50': percentile(query_counts, 50),
+            'queries_max': max(query_counts),
+        }
+        self._log(
+            f'{name:>22}: p50 {stats["p50_ms"]:8.2f} ms | p95 {stats["p95_ms"]:8.2f} ms | '
+            f'Queries p50 {stats["queries_p50"]:4d} / max {stats["queries_max"]:4d}'
+        )
+        return stats
+
+    def _bench_semantic(self, name, queries, searcher, options):
+        from auth_user.embedding_service import search_profiles_semantic
+
+        return self._measure(name, [
+            lambda q=q: search_profiles_semantic(q, top_k=options['top_k'], user=searcher, track_query=False)
+            for q in queries
+        ], options['iterations'])
+
+    def _bench_learning(self, searcher, options):
+        from auth_user.embedding_service import search_profiles_semantic
+        from auth_user.learning_service import apply_learning_boosts
+
+        # Basis-Ergebnisse einmal berechnen, gemessen wird nur das Boosting
+        base_results = {
+            q: search_profiles_semantic(q, top_k=options['top_k'], track_query=False)
+            for q in TOPIC_QUERIES
+        }
+        return self._measure('apply_learning_boosts', [
+            lambda q=q: apply_learning_boosts([dict(r) for r in base_results[q]], searcher, q)
+            for q in TOPIC_QUERIES
+        ], options['iterations'])
+
+    def _bench_endpoint(self, name, searcher, path, params_list, options):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=searcher)
+
+        def call(params):
+            response = client.get(path, params)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} → HTTP {response.status_code}')
+
+        return self._measure(name, [lambda p=p: call(p) for p in params_list], options['iterations'])
+
+    # ------------------------------------------------------------------
+    # Hilfsfunktionen
+    # ------------------------------------------------------------------
+
+    def _reset_caches(self):
+        """
+        Prozess-lokale Caches kannten die synthetischen Daten → verwerfen
+
+        Nur dieser Prozess: die Versionen laufen über die Benchmark-Keys, andere
+        Worker haben die synthetischen Daten nie gesehen.
+        """
+        from auth_user.embedding_cache import get_query_embedding_cache
+        from auth_user.search_dictionaries import invalidate_search_dictionaries
+        from auth_user.vector_index import get_profile_vector_index
+
+        get_profile_vector_index().invalidate()
+        invalidate_search_dictionaries()
+        get_query_embedding_cache().clear()
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, timeout=5, cwd=settings.BASE_DIR
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _log(self, message):
+        if not self.quiet:
+            self.stdout.write(message)
@@ -0,0 +1,120 @@
+"""
+Management Command: Vergleiche die Vektor-Index-Backends (NumPy vs. pgvector)
+
+Misst Latenz der Top-K Suche beider Backends mit denselben Query-Vektoren
+(leicht verrauschte Profil-Embeddings) und den Recall@K von pgvector
+gegenüber der exakten NumPy-Suche.
+
+Verwendung:
+    python manage.py benchmark_vector_backends
+    python manage.py benchmark_vector_backends --queries 200 --top-k 50
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_user.profile_models import UserProfile
+from auth_user.vector_index import (
+    ProfileVectorIndex,
+    PgVectorIndex,
+    parse_embedding,
+    pgvector_table_dimension,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark der Vektor-Suche: NumPy In-Memory Index vs. pgvector'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=100,
+            help='Anzahl Such-Queries (default: 100)'
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=20,
+            help='Top-K pro Suche (default: 20)'
+        )
+        parser.add_argument(
+            '--noise',
+            type=float,
+            default=0.05,
+            help='Rauschen auf den Query-Vektoren (default: 0.05)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed für reproduzierbare Queries (default: 42)'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        top_k = options['top_k']
+
+        sample = [
+            parse_embedding(raw)
+            for raw in UserProfile.objects.filter(
+                embedding_vector__isnull=False
+            ).values_list('embedding_vector', flat=True)[:1000]
+        ]
+        sample = [vector for vector in sample if vector]
+        if not sample:
+            raise CommandError('Keine Embeddings vorhanden')
+
+        queries = [
+            [v + rng.gauss(0, options['noise']) for v in rng.choice(sample)]
+            for _ in range(options['queries'])
+        ]
+
+        # NumPy-Index (eigene Instanz, Aufbau separat gemessen)
+        numpy_index = ProfileVectorIndex()
+        start = time.perf_counter()
+        numpy_index.build()
+        build_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(f'NumPy-Index: {len(numpy_index)} Profile, Aufbau {build_ms:.1f} ms')
+
+        numpy_times, numpy_results = self._run(numpy_index, queries, top_k)
+        self._report('numpy', numpy_times)
+
+        dim = pgvector_table_dimension()
+        if not dim:
+            self.stdout.write(self.style.WARNING(
+                '⚠️  pgvector nicht eingerichtet - migrate_embeddings_to_pgvector ausführen'
+            ))
+            return
+
+        pg_index = PgVectorIndex(dim)
+        pg_times, pg_results = self._run(pg_index, queries, top_k)
+        self._report('pgvector', pg_times)
+
+        # Recall@K: Anteil der exakten Top-K, die pgvector (ANN) ebenfalls liefert
+        recalls = [
+            len({pid for pid, _ in pg} & {pid for pid, _ in exact}) / len(exact)
+            for pg, exact in zip(pg_results, numpy_results)
+            if exact
+        ]
+        recall = sum(recalls) / len(recalls) if recalls else 0
+        self.stdout.write(f'\nRecall@{top_k} pgvector vs. exakt: {recall * 100:.1f}%')
+
+    def _run(self, index, queries, top_k):
+        index.search(queries[0], top_k)  # Warm-up
+        times = []
+        results = []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(index.search(query, top_k))
+            times.append((time.perf_counter() - start) * 1000)
+        return times, results
+
+    def _report(self, name, times):
+        times = sorted(times)
+        avg = sum(times) / len(times)
+        p95 = times[min(int(len(times) * 0.95), len(times) - 1)]
+        self.stdout.write(
+            f'{name:>9}: Ø {avg:.2f} ms | p95 {p95:.2f} ms | max {times[-1]:.2f} ms ({len(times)} Queries)'
+        )
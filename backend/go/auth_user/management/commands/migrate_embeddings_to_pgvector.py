@@ -0,0 +1,165 @@
+"""
+Management Command: Übertrage Profil-Embeddings in eine pgvector-Tabelle
+
+Legt die Extension `vector`, die Tabelle und einen ANN-Index (HNSW oder
+IVFFlat) an und kopiert alle JSON-Vektoren aus UserProfile.embedding_vector.
+Danach nutzt die semantische Suche automatisch das pgvector-Backend
+(EMBEDDING_CONFIG['vector_backend'] = 'auto').
+
+Verwendung:
+    python manage.py migrate_embeddings_to_pgvector
+    python manage.py migrate_embeddings_to_pgvector --index ivfflat --lists 100
+    python manage.py migrate_embeddings_to_pgvector --recreate  # nach Modellwechsel
+    python manage.py migrate_embeddings_to_pgvector --drop      # zurück zum NumPy-Index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from auth_user.profile_models import UserProfile
+from auth_user.vector_index import (
+    PGVECTOR_TABLE,
+    bump_index_version,
+    parse_embedding,
+    pgvector_table_dimension,
+    to_pgvector,
+)
+
+
+class Command(BaseCommand):
+    help = 'Überträgt Profil-Embeddings in eine pgvector-Spalte mit HNSW/IVFFlat-Index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--index',
+            choices=['hnsw', 'ivfflat'],
+            default='hnsw',
+            help='ANN-Indextyp (default: hnsw, benötigt pgvector >= 0.5)'
+        )
+        parser.add_argument(
+            '--lists',
+            type=int,
+            default=100,
+            help='Anzahl Listen für IVFFlat (default: 100)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Profile pro Insert-Batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--recreate',
+            action='store_true',
+            help='Tabelle neu anlegen (z.B. nach Wechsel des Embedding-Modells)'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Tabelle entfernen → Suche nutzt wieder den NumPy-Index'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('pgvector benötigt PostgreSQL')
+
+        if options['drop']:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {PGVECTOR_TABLE}")
+            bump_index_version()
+            self.stdout.write(self.style.SUCCESS(f'✅ {PGVECTOR_TABLE} entfernt - NumPy-Index aktiv'))
+            return
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        except DatabaseError as e:
+            raise CommandError(f'Extension "vector" nicht verfügbar: {e}')
+
+        rows = UserProfile.objects.filter(
+            embedding_vector__isnull=False
+        ).values_list('pk', 'embedding_vector')
+
+        # Dimension aus dem ersten gültigen Vektor
+        dim = None
+        for _, raw in rows.iterator(chunk_size=100):
+            vector = parse_embedding(raw)
+            if vector:
+                dim = len(vector)
+                break
+        if dim is None:
+            raise CommandError('Keine Embeddings vorhanden - zuerst regenerate_all_embeddings_task ausführen')
+
+        existing_dim = pgvector_table_dimension()
+        if existing_dim and existing_dim != dim and not options['recreate']:
+            raise CommandError(
+                f'{PGVECTOR_TABLE} hat {existing_dim} dims, Embeddings haben {dim} - --recreate verwenden'
+            )
+
+        self.stdout.write(f'Starte Migration nach {PGVECTOR_TABLE} ({dim} dims, Index: {options["index"]})...\n')
+
+        profile_table = UserProfile._meta.db_table
+        profile_pk = UserProfile._meta.pk.column
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if options['recreate']:
+                    cursor.execute(f"DROP TABLE IF EXISTS {PGVECTOR_TABLE}")
+                cursor.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {PGVECTOR_TABLE} (
+                        profile_id integer PRIMARY KEY
+                            REFERENCES {profile_table} ({profile_pk}) ON DELETE CASCADE,
+                        embedding vector({dim}) NOT NULL
+                    )
+                    """
+                )
+
+            copied = 0
+            skipped = 0
+            batch = []
+            for profile_id, raw in rows.iterator(chunk_size=options['batch_size']):
+                vector = parse_embedding(raw)
+                if not vector or len(vector) != dim:
+                    skipped += 1
+                    continue
+                batch.append([profile_id, to_pgvector(vector)])
+                if len(batch) >= options['batch_size']:
+                    copied += self._write_batch(batch)
+                    batch = []
+            if batch:
+                copied += self._write_batch(batch)
+
+            # Index erst nach dem Laden bauen (deutlich schneller, IVFFlat braucht Daten für die Listen)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX IF EXISTS {PGVECTOR_TABLE}_ann")
+                if options['index'] == 'hnsw':
+                    cursor.execute(
+                        f"CREATE INDEX {PGVECTOR_TABLE}_ann ON {PGVECTOR_TABLE} "
+                        f"USING hnsw (embedding vector_cosine_ops)"
+                    )
+                else:
+                    cursor.execute(
+                        f"CREATE INDEX {PGVECTOR_TABLE}_ann ON {PGVECTOR_TABLE} "
+                        f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(options['lists'])})"
+                    )
+                cursor.execute(f"ANALYZE {PGVECTOR_TABLE}")
+
+        # Alle Worker prüfen das Backend bei neuer Generation erneut
+        bump_index_version()
+
+        self.stdout.write(f'  📦 {copied} Vektoren übertragen')
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'  ⚠️  {skipped} Profile übersprungen (ungültig oder andere Dimension)'))
+        self.stdout.write(self.style.SUCCESS('\n✅ pgvector-Backend aktiv'))
+
+    def _write_batch(self, batch):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {PGVECTOR_TABLE} (profile_id, embedding)
+                VALUES (%s, %s::vector)
+                ON CONFLICT (profile_id) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                batch
+            )
+        return len(batch)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_user', '0034_add_permission_scope'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='embedding_text_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 des eingebetteten Texts (unveränderte Profile werden übersprungen)', max_length=64, verbose_name='Embedding Text-Hash'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:35
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+
+
+def backfill_click_stats(apps, schema_editor):
+    """Legt die Klick-Statistik aus den Roh-Klicks der letzten 90 Tage an"""
+    SearchClick = apps.get_model('auth_user', 'SearchClick')
+    SearchClickStats = apps.get_model('auth_user', 'SearchClickStats')
+    
+    now = timezone.now()
+    rows = SearchClick.objects.filter(
+        created_at__gte=now - timedelta(days=90)
+    ).annotate(
+        normalized_query=Lower(Trim('search_query__query_text'))
+    ).values('normalized_query', 'clicked_profile_id').annotate(
+        clicks_7d=Count('id', filter=Q(created_at__gte=now - timedelta(days=7))),
+        clicks_30d=Count('id', filter=Q(created_at__gte=now - timedelta(days=30))),
+        clicks_90d=Count('id'),
+        position_sum=Sum('position'),
+        relevance_sum=Sum('relevance_score'),
+        last_clicked_at=Max('created_at'),
+    ).order_by()
+    
+    SearchClickStats.objects.bulk_create([
+        SearchClickStats(
+            normalized_query=row['normalized_query'][:500],
+            profile_id=row['clicked_profile_id'],
+            clicks_7d=row['clicks_7d'],
+            clicks_30d=row['clicks_30d'],
+            clicks_90d=row['clicks_90d'],
+            clicks_total=row['clicks_90d'],
+            position_sum=row['position_sum'] or 0,
+            relevance_sum=row['relevance_sum'] or 0.0,
+            last_clicked_at=row['last_clicked_at'],
+        )
+        for row in rows
+        if row['normalized_query']
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_user', '0035_userprofile_embedding_text_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchClickStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_query', models.CharField(max_length=500, verbose_name='Normalisierte Query')),
+                ('clicks_7d', models.PositiveIntegerField(default=0, verbose_name='Klicks 7 Tage')),
+                ('clicks_30d', models.PositiveIntegerField(default=0, verbose_name='Klicks 30 Tage')),
+                ('clicks_90d', models.PositiveIntegerField(default=0, verbose_name='Klicks 90 Tage')),
+                ('clicks_total', models.PositiveIntegerField(default=0, verbose_name='Klicks gesamt')),
+                ('position_sum', models.PositiveIntegerField(default=0, verbose_name='Summe Positionen')),
+                ('relevance_sum', models.FloatField(default=0.0, verbose_name='Summe Relevanz')),
+                ('last_clicked_at', models.DateTimeField(blank=True, null=True, verbose_name='Letzter Klick')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_click_stats', to='auth_user.userprofile', verbose_name='Profil')),
+            ],
+            options={
+                'verbose_name': 'Such-Klick-Statistik',
+                'verbose_name_plural': 'Such-Klick-Statistiken',
+                'indexes': [models.Index(fields=['profile', 'clicks_90d'], name='auth_user_s_profile_192784_idx')],
+                'unique_together': {('normalized_query', 'profile')},
+            },
+        ),
+        migrations.RunPython(backfill_click_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_user', '0036_searchclickstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_tokens',
+            field=models.JSONField(blank=True, help_text='Vorberechneter Keyword-Index (Tokens der Boost-Felder, primäre Organisation)', null=True, verbose_name='Such-Tokens'),
+        ),
+    ]
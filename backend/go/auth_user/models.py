@@ -47,32 +47,21 @@ class CustomUser(AbstractUser):
     # === VACATION METHODS ===
     
     def get_used_vacation_days(self, year=None):
-        """Berechne verwendete Urlaubstage für ein Jahr"""
-        from absences.models import Absence, AbsenceType
-        from django.db.models import Q
+        """Verwendete Urlaubstage für ein Jahr (aus dem Urlaubskonto)"""
+        from absences.vacation_ledger import get_used_days
         from django.utils import timezone
         
         if year is None:
             year = timezone.now().year
-            
-        try:
-            vacation_type = AbsenceType.objects.get(name=AbsenceType.VACATION)
-        except AbsenceType.DoesNotExist:
-            return 0
-            
-        # Berücksichtige Urlaube, die über Jahresgrenzen gehen
-        used_absences = self.absences.select_related('absence_type').filter(
-            absence_type=vacation_type,
-            status__in=[Absence.APPROVED, Absence.HR_PROCESSED],
-        ).filter(
-            Q(start_date__year=year) | Q(end_date__year=year)
-        )
         
-        total_days = sum(absence.get_workday_count() for absence in used_absences)
-        return total_days
+        return get_used_days(self, year)
     
-    def get_remaining_vacation_days(self, year=None):
-        """Berechne verbleibende Urlaubstage"""
+    def get_remaining_vacation_days(self, year=None, used_days=None):
+        """
+        Berechne verbleibende Urlaubstage
+        
+        used_days: bereits ermittelte genommene Tage (z.B. aus einem Bulk-Lookup)
+        """
         from django.utils import timezone
         
         if year is None:
@@ -89,8 +78,9 @@ class CustomUser(AbstractUser):
         total_entitlement = vacation_ent
         if year == vacation_yr:
             total_entitlement += carryover
-            
-        used_days = self.get_used_vacation_days(year)
+        
+        if used_days is None:
+            used_days = self.get_used_vacation_days(year)
         return max(0, total_entitlement - used_days)
     
     def can_take_vacation(self, days, year=None):
@@ -86,3 +86,52 @@ class NotificationsConsumer(AsyncWebsocketConsumer):
             'badges': event['badges']
         }))
 
+    
+    async def bulk_submit_progress(self, event):
+        """Fortschritt eines Scan-Uploads (pro Datei) zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'bulk_submit_progress',
+            **event['payload']
+        }))
+    
+    async def bulk_submit_completed(self, event):
+        """Abschluss eines Scan-Uploads zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'bulk_submit_completed',
+            **event['payload']
+        }))
+    
+    async def pdf_merge_ready(self, event):
+        """Fertigen (oder fehlgeschlagenen) Hintergrund-PDF-Merge zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'pdf_merge_ready',
+            **event['payload']
+        }))
+    
+    async def pdf_split_progress(self, event):
+        """Fortschritt eines Hintergrund-PDF-Splits zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'pdf_split_progress',
+            **event['payload']
+        }))
+    
+    async def pdf_split_ready(self, event):
+        """Fertigen (oder fehlgeschlagenen) Hintergrund-PDF-Split zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'pdf_split_ready',
+            **event['payload']
+        }))
+    
+    async def checklist_import_progress(self, event):
+        """Fortschritt eines Hintergrund-Haklisten-Imports zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'checklist_import_progress',
+            **event['payload']
+        }))
+    
+    async def checklist_import_completed(self, event):
+        """Abschluss eines Hintergrund-Haklisten-Imports zu Client senden"""
+        await self.send(text_data=json.dumps({
+            'type': 'checklist_import_completed',
+            **event['payload']
+        }))
@@ -0,0 +1,166 @@
+"""
+Request-scoped Permission-Kontext
+
+Innerhalb eines Requests teilen sich Views, Scope-Filter, Serializer und
+Model-Checks (z.B. WorkOrder.can_cancel pro Zeile) denselben Kontext pro User:
+- Scope-Service (permission_service.UserPermissionService, Snapshot)
+- Struktur-Service (permissions.PermissionService, Business-Logic)
+- aktive Abteilungs-IDs
+- Mitarbeiter-IDs aus FakturaAssignment (User ist Faktura-Bearbeiter)
+- aktive Vertretungen (inkl. transitive Kette)
+
+Außerhalb eines Request-Scopes (Celery, Shell, WebSocket) liefert
+get_permission_context() jedes Mal einen frischen Kontext - damit bleiben
+langlebige Prozesse frei von veralteten Berechtigungen. Eigene Scopes lassen
+sich mit `with permission_scope():` öffnen.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property
+
+from django.utils import timezone
+
+
+# {user_id: PermissionContext} des aktuellen Requests (None = kein Scope aktiv)
+_request_contexts = ContextVar('permission_contexts', default=None)
+
+
+class PermissionContext:
+    """Memoisiert Berechtigungsdaten eines Users für die Dauer eines Scopes"""
+
+    def __init__(self, user):
+        self.user = user
+        self._substitutions = {}
+
+    @cached_property
+    def scope_service(self):
+        """Scope-basierter Service (PermissionMapping-Snapshot)"""
+        from .permission_service import UserPermissionService
+        return UserPermissionService(self.user)
+
+    @cached_property
+    def structure_service(self):
+        """Struktur-/Business-Logic-Service (Vertretungen, Faktura, HR)"""
+        from .permissions import PermissionService
+        return PermissionService(self.user, context=self)
+
+    @cached_property
+    def department_ids(self):
+        """IDs der Abteilungen mit aktiver Mitgliedschaft"""
+        return frozenset(
+            self.user.department_memberships.filter(
+                is_active=True
+            ).values_list('department_id', flat=True)
+        )
+
+    @cached_property
+    def faktura_employee_ids(self):
+        """IDs der Mitarbeiter, denen der User als Faktura-Bearbeiter zugewiesen ist"""
+        from .profile_models import FakturaAssignment
+        return frozenset(
+            FakturaAssignment.objects.filter(
+                faktura_processor=self.user,
+                is_active=True
+            ).values_list('employee_id', flat=True)
+        )
+
+    def get_active_substitutions(self, date=None):
+        """Aktive Vertretungen des Users am Stichtag (inkl. transitive Kette A→B→C)"""
+        from .profile_models import SubstituteAssignment
+        from absences.models import Absence
+
+        if date is None:
+            date = timezone.now().date()
+
+        if date in self._substitutions:
+            return self._substitutions[date]
+
+        active = dict(
+            is_active=True,
+            absence__start_date__lte=date,
+            absence__end_date__gte=date,
+            absence__status__in=[Absence.APPROVED, Absence.HR_PROCESSED]
+        )
+        related = ('original_user', 'absence', 'substitute_user')
+
+        direct = list(
+            SubstituteAssignment.objects.filter(
+                substitute_user=self.user, **active
+            ).select_related(*related)
+        )
+
+        # Transitive Vertretungen: vertritt der abwesende User (A) selbst jemanden,
+        # erbt der aktuelle User auch diese Rechte - eine Query für alle A
+        substitutions = list(direct)
+        original_user_ids = {sub.original_user_id for sub in direct}
+        if original_user_ids:
+            transitive = SubstituteAssignment.objects.filter(
+                substitute_user_id__in=original_user_ids, **active
+            ).select_related(*related)
+            by_substitute = {}
+            for sub in transitive:
+                by_substitute.setdefault(sub.substitute_user_id, []).append(sub)
+            # Reihenfolge wie bisher: je direkter Vertretung deren transitive Einträge
+            for sub in direct:
+                substitutions.extend(by_substitute.get(sub.original_user_id, []))
+
+        self._substitutions[date] = substitutions
+        return substitutions
+
+    def get_substituted_user_ids(self, date=None):
+        """IDs der User, die aktuell vertreten werden"""
+        return {sub.original_user_id for sub in self.get_active_substitutions(date)}
+
+
+def get_permission_context(user):
+    """
+    Gibt den Permission-Kontext für den User zurück
+
+    Im Request-Scope wird pro User genau ein Kontext gebaut und
+    wiederverwendet, sonst entsteht ein neuer (nicht geteilter) Kontext.
+    """
+    contexts = _request_contexts.get()
+    if contexts is None or user.pk is None:
+        return PermissionContext(user)
+
+    context = contexts.get(user.pk)
+    if context is None:
+        context = contexts[user.pk] = PermissionContext(user)
+    return context
+
+
+def discard_permission_context(user_id=None):
+    """Verwirft Kontexte im aktuellen Scope (None = alle), z.B. nach Rechteänderungen"""
+    contexts = _request_contexts.get()
+    if contexts is None:
+        return
+    if user_id is None:
+        contexts.clear()
+    else:
+        contexts.pop(user_id, None)
+
+
+@contextmanager
+def permission_scope():
+    """Öffnet einen Scope, in dem Permission-Kontexte geteilt werden"""
+    token = _request_contexts.set({})
+    try:
+        yield
+    finally:
+        _request_contexts.reset(token)
+
+
+class PermissionContextMiddleware:
+    """
+    Öffnet pro HTTP-Request einen Permission-Scope
+
+    Die DRF-Authentifizierung (JWT) passiert erst in der View - der Kontext
+    wird deshalb lazy beim ersten Permission-Check angelegt, nicht hier.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permission_scope():
+            return self.get_response(request)
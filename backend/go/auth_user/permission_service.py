@@ -3,8 +3,116 @@ Permission Service - Zentrale Berechtigungsprüfung
 Prüft dynamisch gegen PermissionMapping statt Hardcoding
 """
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from .permission_context import discard_permission_context, get_permission_context
 from .permission_models import PermissionMapping, PermissionCode
-from .profile_models import MemberSpecialty
+from .profile_models import DepartmentMember, MemberSpecialty
+
+
+# Redis-Keys der Generationen:
+# - global: ändert sich bei jeder Mapping-/Permission-Änderung
+# - pro User: ändert sich bei Abteilungs-, Fachbereichs- und Gruppenzuordnung
+PERMISSION_GENERATION_CACHE_KEY = 'permission_mapping_generation'
+USER_PERMISSION_GENERATION_CACHE_KEY = 'permission_user_generation_{}'
+
+# Snapshot pro User (eigener Key - unter user_permissions_<id> lagen früher Listen)
+USER_PERMISSION_SNAPSHOT_CACHE_KEY = 'user_permission_snapshot_{}'
+
+# Gültigkeit eines Snapshots (Sekunden) - Invalidierung läuft über die Generationen
+PERMISSION_SNAPSHOT_TIMEOUT = 24 * 3600
+
+# Höchster Scope gewinnt: ALL > DEPARTMENT > OWN > NONE
+SCOPE_PRIORITY = {'ALL': 4, 'DEPARTMENT': 3, 'OWN': 2, 'NONE': 1}
+
+
+def _incr_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def bump_permission_generation():
+    """
+    Erhöht die globale Generation → alle User-Snapshots werden neu gebaut
+    
+    Läuft erst nach dem Commit, damit kein Snapshot mit altem DB-Stand
+    unter der neuen Generation gespeichert wird.
+    """
+    transaction.on_commit(lambda: _incr_generation(PERMISSION_GENERATION_CACHE_KEY))
+
+
+def bump_user_permission_generation(user_id):
+    """Erhöht die Generation eines Users → nur dessen Snapshot wird neu gebaut"""
+    key = USER_PERMISSION_GENERATION_CACHE_KEY.format(user_id)
+    transaction.on_commit(lambda: _incr_generation(key))
+
+
+def get_permission_holders(permission_code):
+    """
+    Alle aktiven User mit einer Permission und ihrem effektiven Scope
+    
+    Umkehrung von UserPermissionService._compile_snapshot (gleiche Quellen und
+    Scope-Priorität) mit konstanter Anzahl Queries - für Fan-out auf die
+    betroffenen User statt Snapshot pro User.
+    
+    Returns:
+        dict: {user_id: scope} - Superuser/Staff immer 'ALL'
+    """
+    from django.contrib.auth import get_user_model
+    
+    User = get_user_model()
+    holders = {}
+    
+    def grant(user_id, scope):
+        if SCOPE_PRIORITY.get(scope, 0) > SCOPE_PRIORITY.get(holders.get(user_id), 0):
+            holders[user_id] = scope
+    
+    entity_scopes = {'DEPARTMENT': {}, 'ROLE': {}, 'SPECIALTY': {}, 'GROUP': {}}
+    for entity_type, entity_id, scope, default_scope, supports_scope in PermissionMapping.objects.filter(
+        permission__code=permission_code,
+        is_active=True,
+        permission__is_active=True
+    ).values_list('entity_type', 'entity_id', 'scope', 'permission__default_scope', 'permission__supports_scope'):
+        scopes = entity_scopes.setdefault(entity_type, {})
+        effective_scope = (scope or default_scope) if supports_scope else 'NONE'
+        if SCOPE_PRIORITY.get(effective_scope, 0) > SCOPE_PRIORITY.get(scopes.get(entity_id), 0):
+            scopes[entity_id] = effective_scope
+    
+    departments, roles = entity_scopes['DEPARTMENT'], entity_scopes['ROLE']
+    if departments or roles:
+        for user_id, department_id, role_id in DepartmentMember.objects.filter(
+            Q(department_id__in=list(departments)) | Q(role_id__in=list(roles)),
+            is_active=True,
+            user__is_active=True
+        ).values_list('user_id', 'department_id', 'role_id'):
+            grant(user_id, departments.get(department_id))
+            grant(user_id, roles.get(role_id))
+    
+    specialties = entity_scopes['SPECIALTY']
+    if specialties:
+        for user_id, specialty_id in MemberSpecialty.objects.filter(
+            specialty_id__in=list(specialties),
+            is_active=True,
+            member__is_active=True,
+            member__user__is_active=True
+        ).values_list('member__user_id', 'specialty_id'):
+            grant(user_id, specialties[specialty_id])
+    
+    groups = entity_scopes['GROUP']
+    if groups:
+        for user_id, group_id in User.objects.filter(
+            groups__in=list(groups), is_active=True
+        ).values_list('id', 'groups'):
+            grant(user_id, groups[group_id])
+    
+    for user_id in User.objects.filter(
+        Q(is_superuser=True) | Q(is_staff=True), is_active=True
+    ).values_list('id', flat=True):
+        holders[user_id] = 'ALL'
+    
+    return holders
 
 
 class PermissionService:
@@ -15,34 +123,138 @@ class PermissionService:
     
     @staticmethod
     def for_user(user):
-        """Factory-Methode für User-spezifische Permission-Instanz"""
-        return UserPermissionService(user)
+        """
+        Factory-Methode für User-spezifische Permission-Instanz
+        
+        Im Request wird die Instanz über den Permission-Kontext geteilt
+        (ein Snapshot-Lookup pro User und Request).
+        """
+        return get_permission_context(user).scope_service
     
     @staticmethod
     def clear_cache(user_id):
         """Löscht Permission-Cache für User"""
-        cache.delete(f'user_permissions_{user_id}')
+        discard_permission_context(user_id)
+        bump_user_permission_generation(user_id)
     
     @staticmethod
     def clear_all_caches():
-        """Löscht alle Permission-Caches"""
-        cache.delete_pattern('user_permissions_*')
+        """Löscht alle Permission-Caches (O(1): neue globale Generation)"""
+        discard_permission_context()
+        bump_permission_generation()
 
 
 class UserPermissionService:
     """
     User-spezifische Permission-Prüfung
+    
+    Alle Abfragen beantwortet ein kompilierter Snapshot
+    {permission_code: effektiver Scope}, der mit einer Query gebaut und
+    mit globaler + User-Generation im Cache abgelegt wird.
     """
     
     def __init__(self, user):
         self.user = user
-        self._cache_key = f'user_permissions_{user.id}'
-        self._permissions_cache = None
+        self._snapshot = None
     
     def has_full_access(self):
         """Prüft ob User vollen Zugriff hat (Superuser/Staff)"""
         return self.user.is_superuser or self.user.is_staff
     
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+    
+    def get_snapshot(self, use_cache=True):
+        """
+        Gibt den Permission-Snapshot des Users zurück
+        
+        Snapshot und beide Generationen werden mit einem get_many gelesen;
+        passt die gespeicherte Generation nicht mehr, wird neu kompiliert.
+        
+        Args:
+            use_cache: Cache verwenden? (False = neu aus der DB kompilieren)
+        
+        Returns:
+            dict: {permission_code: scope} - scope 'NONE' bei Permissions ohne Scope-Unterstützung
+        """
+        if use_cache and self._snapshot is not None:
+            return self._snapshot
+        
+        snapshot_key = USER_PERMISSION_SNAPSHOT_CACHE_KEY.format(self.user.id)
+        user_generation_key = USER_PERMISSION_GENERATION_CACHE_KEY.format(self.user.id)
+        values = cache.get_many([snapshot_key, PERMISSION_GENERATION_CACHE_KEY, user_generation_key])
+        generation = [
+            values.get(PERMISSION_GENERATION_CACHE_KEY) or 0,
+            values.get(user_generation_key) or 0,
+        ]
+        
+        # Superuser/Staff-Status ist Teil des Snapshots (wird am User-Objekt geprüft)
+        generation.append(self.has_full_access())
+        
+        cached = values.get(snapshot_key) if use_cache else None
+        if isinstance(cached, dict) and cached.get('generation') == generation:
+            snapshot = cached['permissions']
+        else:
+            snapshot = self._compile_snapshot()
+            cache.set(
+                snapshot_key,
+                {'generation': generation, 'permissions': snapshot},
+                PERMISSION_SNAPSHOT_TIMEOUT
+            )
+        
+        self._snapshot = snapshot
+        return snapshot
+    
+    def _compile_snapshot(self):
+        """
+        Kompiliert alle Permissions des Users mit effektivem Scope (1 Query)
+        
+        Quellen: Department-, Rollen-, Fachbereichs- und Gruppen-Mappings.
+        Die Entity-IDs des Users werden als Subqueries eingebunden.
+        """
+        if self.has_full_access():
+            # Superuser/Staff haben alle
+            return {
+                code: 'ALL'
+                for code in PermissionCode.objects.filter(is_active=True).values_list('code', flat=True)
+            }
+        
+        memberships = DepartmentMember.objects.filter(user=self.user, is_active=True)
+        user_specialties = MemberSpecialty.objects.filter(
+            member__user=self.user,
+            member__is_active=True,
+            is_active=True
+        ).values('specialty_id')
+        user_groups = self.user.groups.values('id')
+        
+        mappings = PermissionMapping.objects.filter(
+            Q(entity_type='DEPARTMENT', entity_id__in=memberships.values('department_id')) |
+            Q(entity_type='ROLE', entity_id__in=memberships.values('role_id')) |
+            Q(entity_type='SPECIALTY', entity_id__in=user_specialties) |
+            Q(entity_type='GROUP', entity_id__in=user_groups),
+            is_active=True,
+            permission__is_active=True
+        ).values_list(
+            'permission__code', 'scope', 'permission__default_scope', 'permission__supports_scope'
+        )
+        
+        snapshot = {}
+        for code, scope, default_scope, supports_scope in mappings:
+            if not supports_scope:
+                # Permission ohne Scope-Unterstützung
+                snapshot[code] = 'NONE'
+                continue
+            effective_scope = scope or default_scope
+            if code not in snapshot or SCOPE_PRIORITY.get(effective_scope, 0) > SCOPE_PRIORITY.get(snapshot[code], 0):
+                snapshot[code] = effective_scope
+        
+        return snapshot
+    
+    # ------------------------------------------------------------------
+    # Abfragen
+    # ------------------------------------------------------------------
+    
     def has_permission(self, permission_code, use_cache=True):
         """
         Prüft ob User eine Permission hat (irgendein Scope)
@@ -58,16 +270,7 @@ class UserPermissionService:
         if self.has_full_access():
             return True
         
-        # Cache prüfen
-        if use_cache:
-            cached = self._get_cached_permissions()
-            if cached is not None:
-                return permission_code in cached
-        
-        # Permission-Check durchführen
-        has_perm = self._check_permission_mappings(permission_code)
-        
-        return has_perm
+        return permission_code in self.get_snapshot(use_cache)
     
     def get_permission_scope(self, permission_code):
         """
@@ -83,24 +286,7 @@ class UserPermissionService:
         if self.has_full_access():
             return 'ALL'
         
-        try:
-            permission = PermissionCode.objects.get(code=permission_code, is_active=True)
-        except PermissionCode.DoesNotExist:
-            return None
-        
-        # Wenn Permission keine Scope-Unterstützung hat
-        if not permission.supports_scope:
-            return 'NONE' if self.has_permission(permission_code) else None
-        
-        # Sammle alle Scopes aus Mappings
-        scopes = self._collect_permission_scopes(permission)
-        
-        if not scopes:
-            return None
-        
-        # Höchster Scope gewinnt: ALL > DEPARTMENT > OWN > NONE
-        scope_priority = {'ALL': 4, 'DEPARTMENT': 3, 'OWN': 2, 'NONE': 1}
-        return max(scopes, key=lambda s: scope_priority.get(s, 0))
+        return self.get_snapshot().get(permission_code)
     
     def has_scope(self, permission_code, required_scope):
         """
@@ -122,8 +308,7 @@ class UserPermissionService:
             return required_scope == 'NONE'
         
         # Scope-Hierarchie prüfen
-        scope_priority = {'ALL': 4, 'DEPARTMENT': 3, 'OWN': 2, 'NONE': 1}
-        return scope_priority.get(current_scope, 0) >= scope_priority.get(required_scope, 0)
+        return SCOPE_PRIORITY.get(current_scope, 0) >= SCOPE_PRIORITY.get(required_scope, 0)
     
     def get_all_permissions(self, use_cache=True):
         """
@@ -132,222 +317,7 @@ class UserPermissionService:
         Returns:
             set: Permission-Codes
         """
-        if self.has_full_access():
-            # Superuser/Staff haben alle
-            return set(PermissionCode.objects.filter(
-                is_active=True
-            ).values_list('code', flat=True))
-        
-        # Cache prüfen
-        if use_cache:
-            cached = self._get_cached_permissions()
-            if cached is not None:
-                return cached
-        
-        # Alle Permissions sammeln
-        permissions = self._collect_all_permissions()
-        
-        # Cache speichern (10 Minuten) - Convert to list for JSON serialization
-        cache.set(self._cache_key, list(permissions), 600)
-        
-        return permissions
-    
-    def _get_cached_permissions(self):
-        """Holt Permissions aus Cache"""
-        return cache.get(self._cache_key)
-    
-    def _check_permission_mappings(self, permission_code):
-        """
-        Prüft PermissionMapping für User
-        
-        Prüft in dieser Reihenfolge:
-        1. Department Permissions
-        2. Role Permissions
-        3. Specialty Permissions
-        4. Group Permissions
-        """
-        try:
-            permission = PermissionCode.objects.get(code=permission_code, is_active=True)
-        except PermissionCode.DoesNotExist:
-            return False
-        
-        # 1. Department Permissions
-        user_departments = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('department_id', flat=True)
-        
-        if PermissionMapping.objects.filter(
-            entity_type='DEPARTMENT',
-            entity_id__in=user_departments,
-            permission=permission,
-            is_active=True
-        ).exists():
-            return True
-        
-        # 2. Role Permissions
-        user_roles = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('role_id', flat=True)
-        
-        if PermissionMapping.objects.filter(
-            entity_type='ROLE',
-            entity_id__in=user_roles,
-            permission=permission,
-            is_active=True
-        ).exists():
-            return True
-        
-        # 3. Specialty Permissions
-        user_specialties = MemberSpecialty.objects.filter(
-            member__user=self.user,
-            member__is_active=True,
-            is_active=True
-        ).values_list('specialty_id', flat=True)
-        
-        if PermissionMapping.objects.filter(
-            entity_type='SPECIALTY',
-            entity_id__in=user_specialties,
-            permission=permission,
-            is_active=True
-        ).exists():
-            return True
-        
-        # 4. Group Permissions
-        user_groups = self.user.groups.values_list('id', flat=True)
-        
-        if PermissionMapping.objects.filter(
-            entity_type='GROUP',
-            entity_id__in=user_groups,
-            permission=permission,
-            is_active=True
-        ).exists():
-            return True
-        
-        return False
-    
-    def _collect_permission_scopes(self, permission):
-        """
-        Sammelt alle Scopes für eine Permission aus den Mappings des Users
-        
-        Args:
-            permission: PermissionCode Objekt
-        
-        Returns:
-            list: Liste der Scopes
-        """
-        scopes = []
-        
-        # Department Scopes
-        user_departments = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('department_id', flat=True)
-        
-        dept_mappings = PermissionMapping.objects.filter(
-            entity_type='DEPARTMENT',
-            entity_id__in=user_departments,
-            permission=permission,
-            is_active=True
-        )
-        for mapping in dept_mappings:
-            scopes.append(mapping.get_effective_scope())
-        
-        # Role Scopes
-        user_roles = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('role_id', flat=True)
-        
-        role_mappings = PermissionMapping.objects.filter(
-            entity_type='ROLE',
-            entity_id__in=user_roles,
-            permission=permission,
-            is_active=True
-        )
-        for mapping in role_mappings:
-            scopes.append(mapping.get_effective_scope())
-        
-        # Specialty Scopes
-        user_specialties = MemberSpecialty.objects.filter(
-            member__user=self.user,
-            member__is_active=True,
-            is_active=True
-        ).values_list('specialty_id', flat=True)
-        
-        spec_mappings = PermissionMapping.objects.filter(
-            entity_type='SPECIALTY',
-            entity_id__in=user_specialties,
-            permission=permission,
-            is_active=True
-        )
-        for mapping in spec_mappings:
-            scopes.append(mapping.get_effective_scope())
-        
-        # Group Scopes
-        user_groups = self.user.groups.values_list('id', flat=True)
-        
-        group_mappings = PermissionMapping.objects.filter(
-            entity_type='GROUP',
-            entity_id__in=user_groups,
-            permission=permission,
-            is_active=True
-        )
-        for mapping in group_mappings:
-            scopes.append(mapping.get_effective_scope())
-        
-        return scopes
-    
-    def _collect_all_permissions(self):
-        """Sammelt alle Permissions des Users"""
-        permissions = set()
-        
-        # Department Permissions
-        user_departments = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('department_id', flat=True)
-        
-        dept_perms = PermissionMapping.objects.filter(
-            entity_type='DEPARTMENT',
-            entity_id__in=user_departments,
-            is_active=True
-        ).select_related('permission').values_list('permission__code', flat=True)
-        permissions.update(dept_perms)
-        
-        # Role Permissions
-        user_roles = self.user.department_memberships.filter(
-            is_active=True
-        ).values_list('role_id', flat=True)
-        
-        role_perms = PermissionMapping.objects.filter(
-            entity_type='ROLE',
-            entity_id__in=user_roles,
-            is_active=True
-        ).select_related('permission').values_list('permission__code', flat=True)
-        permissions.update(role_perms)
-        
-        # Specialty Permissions
-        user_specialties = MemberSpecialty.objects.filter(
-            member__user=self.user,
-            member__is_active=True,
-            is_active=True
-        ).values_list('specialty_id', flat=True)
-        
-        spec_perms = PermissionMapping.objects.filter(
-            entity_type='SPECIALTY',
-            entity_id__in=user_specialties,
-            is_active=True
-        ).select_related('permission').values_list('permission__code', flat=True)
-        permissions.update(spec_perms)
-        
-        # Group Permissions
-        user_groups = self.user.groups.values_list('id', flat=True)
-        
-        group_perms = PermissionMapping.objects.filter(
-            entity_type='GROUP',
-            entity_id__in=user_groups,
-            is_active=True
-        ).select_related('permission').values_list('permission__code', flat=True)
-        permissions.update(group_perms)
-        
-        return permissions
+        return set(self.get_snapshot(use_cache))
     
     def has_specialty(self, specialty_code):
         """Prüft ob User einen Fachbereich hat"""
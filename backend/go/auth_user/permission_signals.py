@@ -0,0 +1,61 @@
+"""
+Signals für Permission-Snapshots
+Invalidiert über Generationen statt Keys zu löschen:
+- Mapping- oder Permission-Änderung → globale Generation (O(1))
+- Abteilungs-, Fachbereichs- oder Gruppenzuordnung → Generation des betroffenen Users
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .permission_models import PermissionCode, PermissionMapping
+from .permission_service import bump_permission_generation, bump_user_permission_generation
+from .profile_models import DepartmentMember, MemberSpecialty
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=PermissionMapping)
+@receiver(post_delete, sender=PermissionMapping)
+@receiver(post_save, sender=PermissionCode)
+@receiver(post_delete, sender=PermissionCode)
+@receiver(post_delete, sender=Group)
+def invalidate_permissions_on_mapping_change(sender, instance, **kwargs):
+    """Mapping/Permission geändert → alle Snapshots neu kompilieren"""
+    bump_permission_generation()
+
+
+@receiver(post_save, sender=DepartmentMember)
+@receiver(post_delete, sender=DepartmentMember)
+def invalidate_permissions_on_membership_change(sender, instance, **kwargs):
+    """Abteilungszuordnung geändert → Snapshot des Users neu kompilieren"""
+    bump_user_permission_generation(instance.user_id)
+
+
+@receiver(post_save, sender=MemberSpecialty)
+@receiver(post_delete, sender=MemberSpecialty)
+def invalidate_permissions_on_specialty_change(sender, instance, **kwargs):
+    """Fachbereichszuordnung geändert → Snapshot des Users neu kompilieren"""
+    user_id = DepartmentMember.objects.filter(
+        pk=instance.member_id
+    ).values_list('user_id', flat=True).first()
+    if user_id:
+        bump_user_permission_generation(user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_permissions_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Gruppenmitgliedschaft geändert (user.groups oder group.user_set)"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if not reverse:
+        # user.groups.add/remove/clear
+        bump_user_permission_generation(instance.pk)
+    elif pk_set:
+        # group.user_set.add/remove
+        for user_id in pk_set:
+            bump_user_permission_generation(user_id)
+    else:
+        # group.user_set.clear() → betroffene User unbekannt
+        bump_permission_generation()
@@ -238,7 +238,7 @@ class PermissionMappingViewSet(viewsets.ModelViewSet):
                 else:
                     updated_count += 1
             
-            # Cache für alle betroffenen User löschen
+            # Deaktivierung per QuerySet.update() löst keine Signals aus → globale Generation erhöhen
             PermissionService.clear_all_caches()
         
         return Response({
@@ -1,16 +1,24 @@
 """
 Permission Service - Zentraler Service für strukturbasierte Berechtigungen
 """
-from django.utils import timezone
 from django.db.models import Q
 
 
 class PermissionService:
     """Zentraler Service für strukturbasierte Berechtigungen"""
     
-    def __init__(self, user):
+    def __init__(self, user, context=None):
         self.user = user
         self._cache = {}  # Request-Level Cache
+        self._context = context
+    
+    @property
+    def context(self):
+        """Permission-Kontext (Abteilungen, Faktura-Zuordnungen, Vertretungen)"""
+        if self._context is None:
+            from .permission_context import PermissionContext
+            self._context = PermissionContext(self.user)
+        return self._context
     
     # ===== SUPERUSER/GF BYPASS =====
     
@@ -77,44 +85,7 @@ class PermissionService:
     
     def get_active_substitutions(self, date=None):
         """Gibt aktive Vertretungen zurück (inkl. transitive Kette)"""
-        from .profile_models import SubstituteAssignment
-        from absences.models import Absence
-        
-        if date is None:
-            date = timezone.now().date()
-        
-        cache_key = f'substitutions_{date}'
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-        
-        # Direkte Vertretungen
-        direct = SubstituteAssignment.objects.filter(
-            substitute_user=self.user,
-            is_active=True,
-            absence__start_date__lte=date,
-            absence__end_date__gte=date,
-            absence__status__in=[Absence.APPROVED, Absence.HR_PROCESSED]
-        ).select_related('original_user', 'absence', 'substitute_user')
-        
-        substitutions = list(direct)
-        
-        # Transitive Vertretungen (A→B→C)
-        # Wenn User B jemanden vertritt (A), und jemand anders (C) vertritt B,
-        # dann erbt C auch As Rechte
-        for sub in direct:
-            # Prüfe ob der abwesende User (A) selbst jemanden vertritt
-            transitive = SubstituteAssignment.objects.filter(
-                substitute_user=sub.original_user,
-                is_active=True,
-                absence__start_date__lte=date,
-                absence__end_date__gte=date,
-                absence__status__in=[Absence.APPROVED, Absence.HR_PROCESSED]
-            ).select_related('original_user', 'absence', 'substitute_user')
-            
-            substitutions.extend(list(transitive))
-        
-        self._cache[cache_key] = substitutions
-        return substitutions
+        return self.context.get_active_substitutions(date)
     
     def is_substituting_for(self, user, specialty=None, date=None):
         """Prüft ob aktueller User für anderen User vertritt"""
@@ -148,10 +119,7 @@ class PermissionService:
         if self.has_full_access():
             return True
         
-        # Importiere neue PermissionService-Klasse mit Scope-Funktionalität
-        from .permission_service import PermissionService as ScopePermissionService
-        
-        perm_service = ScopePermissionService.for_user(self.user)
+        perm_service = self.context.scope_service
         
         # Prüfe Permission
         if not perm_service.has_permission('can_view_workorders'):
@@ -164,10 +132,7 @@ class PermissionService:
             return True
         elif scope == 'DEPARTMENT':
             # Prüfe Abteilung
-            user_dept_ids = self.user.department_memberships.filter(
-                is_active=True
-            ).values_list('department_id', flat=True)
-            if workorder.department_id and workorder.department_id in user_dept_ids:
+            if workorder.department_id and workorder.department_id in self.context.department_ids:
                 return True
             # Prüfe FakturaAssignment
             if self._is_assigned_faktur_ma(workorder):
@@ -190,10 +155,7 @@ class PermissionService:
         if self.has_full_access():
             return True
         
-        # Importiere neue PermissionService-Klasse mit Scope-Funktionalität
-        from .permission_service import PermissionService as ScopePermissionService
-        
-        perm_service = ScopePermissionService.for_user(self.user)
+        perm_service = self.context.scope_service
         
         # Prüfe Permission
         if not perm_service.has_permission('can_edit_workorders'):
@@ -206,10 +168,7 @@ class PermissionService:
             return True
         elif scope == 'DEPARTMENT':
             # Prüfe Abteilung
-            user_dept_ids = self.user.department_memberships.filter(
-                is_active=True
-            ).values_list('department_id', flat=True)
-            if workorder.department_id and workorder.department_id in user_dept_ids:
+            if workorder.department_id and workorder.department_id in self.context.department_ids:
                 return True
             # Prüfe FakturaAssignment
             if self._is_assigned_faktur_ma(workorder):
@@ -343,42 +302,30 @@ class PermissionService:
     
     def _is_assigned_faktur_ma(self, workorder) -> bool:
         """Prüft ob User zugewiesener Faktur-MA für diesen Workorder ist"""
-        if not hasattr(workorder, 'created_by') or not workorder.created_by:
+        created_by_id = getattr(workorder, 'created_by_id', None)
+        if not created_by_id:
             return False
         
-        from auth_user.profile_models import FakturaAssignment
-        
-        return FakturaAssignment.objects.filter(
-            employee=workorder.created_by,
-            faktura_processor=self.user,
-            is_active=True
-        ).exists()
+        return created_by_id in self.context.faktura_employee_ids
     
     def _is_substituting_assigned_faktur_ma(self, workorder) -> bool:
         """Prüft ob User Vertretung für den zugewiesenen Faktur-MA ist"""
-        if not hasattr(workorder, 'created_by') or not workorder.created_by:
+        created_by_id = getattr(workorder, 'created_by_id', None)
+        if not created_by_id:
+            return False
+        
+        substituted_ids = self.context.get_substituted_user_ids()
+        if not substituted_ids:
             return False
         
         from auth_user.profile_models import FakturaAssignment
         
-        # Finde zugewiesene Faktur-MAs
-        assigned_faktur_mas = FakturaAssignment.objects.filter(
-            employee=workorder.created_by,
+        # Ist einer der zugewiesenen Faktur-MAs vom User vertreten?
+        return FakturaAssignment.objects.filter(
+            employee_id=created_by_id,
+            faktura_processor_id__in=substituted_ids,
             is_active=True
-        ).values_list('faktura_processor', flat=True)
-        
-        # Ist User Vertretung für einen davon?
-        for faktur_ma_id in assigned_faktur_mas:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            try:
-                faktur_ma = User.objects.get(id=faktur_ma_id)
-                if self.is_substituting_for(faktur_ma):
-                    return True
-            except User.DoesNotExist:
-                continue
-        
-        return False
+        ).exists()
     
     def _is_service_manager_supervisor(self, workorder) -> bool:
         """Prüft ob User Bereichsleiter des Service Managers ist"""
@@ -708,8 +655,9 @@ class PermissionService:
     
     @classmethod
     def for_user(cls, user):
-        """Factory Method"""
-        return cls(user)
+        """Factory Method (im Request über den Permission-Kontext geteilt)"""
+        from .permission_context import get_permission_context
+        return get_permission_context(user).structure_service
     
     def clear_cache(self):
         """Cache leeren (z.B. nach Änderungen)"""
@@ -721,6 +721,18 @@ class UserProfile(models.Model):
         null=True,
         blank=True
     )
+    embedding_text_hash = models.CharField(
+        'Embedding Text-Hash',
+        max_length=64,
+        blank=True,
+        help_text='SHA-256 des eingebetteten Texts (unveränderte Profile werden übersprungen)'
+    )
+    search_tokens = models.JSONField(
+        'Such-Tokens',
+        null=True,
+        blank=True,
+        help_text='Vorberechneter Keyword-Index (Tokens der Boost-Felder, primäre Organisation)'
+    )
     
     # === Standort & Arbeitszeit ===
     office_location = models.CharField(
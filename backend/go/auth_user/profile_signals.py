@@ -45,6 +45,19 @@ def create_user_profile_and_presence(sender, instance, created, **kwargs):
         sync_deprecated_fields_to_profile(instance, profile)
 
 
+@receiver(pre_save, sender=UserProfile)
+def remember_profile_searchable(sender, instance, **kwargs):
+    """Signal: Merkt sich, ob das Profil wieder suchbar wird (für den Vektor-Index)"""
+    instance._became_searchable = False
+    if instance.pk is None or not instance.is_searchable:
+        return
+    
+    was_searchable = UserProfile.objects.filter(pk=instance.pk).values_list(
+        'is_searchable', flat=True
+    ).first()
+    instance._became_searchable = was_searchable is False
+
+
 @receiver(post_save, sender=UserProfile)
 def regenerate_embedding_on_profile_change(sender, instance, created, **kwargs):
     """
@@ -59,8 +72,19 @@ def regenerate_embedding_on_profile_change(sender, instance, created, **kwargs):
         # Importiere tasks hier um zirkuläre Imports zu vermeiden
         from .embedding_tasks import generate_profile_embedding_task
         
-        # Starte async Task
-        generate_profile_embedding_task.delay(instance.user_id)
+        # Starte async Task - wieder suchbar → Vektor neu in den Index,
+        # auch wenn sich der Text (Hash) nicht geändert hat
+        generate_profile_embedding_task.delay(
+            instance.user_id,
+            reindex=getattr(instance, '_became_searchable', False)
+        )
+    elif not instance.is_searchable and instance.embedding_vector:
+        # Nicht mehr suchbar → aus dem NumPy-Index entfernen; pgvector filtert
+        # is_searchable in der Suche selbst, die Zeile bleibt erhalten
+        from .vector_index import PgVectorIndex, get_profile_vector_index
+        index = get_profile_vector_index()
+        if not isinstance(index, PgVectorIndex):
+            index.remove(instance.pk)
 
 
 
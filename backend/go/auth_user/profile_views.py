@@ -604,6 +604,9 @@ class UserProfileViewSet(viewsets.ReadOnlyModelViewSet):
         Badge-Counts für aktuellen User abrufen
         GET /api/profiles/badges/
         
+        Liest die Zähler aus dem Cache (badge_helpers); nur fehlende Zähler
+        werden aus der Datenbank berechnet.
+        
         Returns:
             {
                 'chat': 5,
@@ -755,24 +758,25 @@ class ChatConversationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """Chat als gelesen markieren"""
-        from auth_user.badge_helpers import get_user_badge_counts, send_badge_update
+        from auth_user.badge_helpers import get_user_badge_counts
         
         conversation = self.get_object()
-        unread_messages = conversation.messages.filter(is_deleted=False).exclude(
-            read_by=request.user
+        unread_message_ids = list(
+            conversation.messages.filter(is_deleted=False).exclude(
+                read_by=request.user
+            ).values_list('id', flat=True)
         )
         
-        count = unread_messages.count()
+        count = len(unread_message_ids)
         
-        for message in unread_messages:
-            message.read_by.add(request.user)
+        # Ein INSERT statt add() pro Nachricht; das m2m_changed-Signal passt den
+        # Chat-Badge an und pusht ihn an andere Tabs/Geräte
+        if unread_message_ids:
+            request.user.read_messages.add(*unread_message_ids)
         
-        # Badge-Counts neu berechnen und zurückgeben
+        # Badge-Counts aus den Zählern (O(1))
         badges = get_user_badge_counts(request.user)
         
-        # Auch über WebSocket senden für andere Tabs/Geräte
-        send_badge_update(request.user.id, badges)
-        
         return Response({
             'status': 'marked_as_read', 
             'count': count,
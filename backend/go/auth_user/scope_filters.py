@@ -3,8 +3,8 @@ Scope-basierte QuerySet Filter mit Business-Logic
 Kombiniert Permission-Scopes mit app-spezifischen Zuweisungen
 """
 from django.db.models import Q
+from .permission_context import get_permission_context
 from .permission_service import PermissionService
-from .profile_models import FakturaAssignment
 
 
 class ScopeQuerySetMixin:
@@ -57,20 +57,14 @@ class ScopeQuerySetMixin:
             q = Q(created_by=user)
         elif scope == 'DEPARTMENT':
             # Arbeitsscheine der eigenen Abteilung(en)
-            user_departments = user.department_memberships.filter(
-                is_active=True
-            ).values_list('department_id', flat=True)
-            q = Q(department_id__in=user_departments)
+            q = Q(department_id__in=get_permission_context(user).department_ids)
         else:
             # Fallback: leeres QuerySet
             return queryset.none()
         
         # Business-Logic: Faktura-Assignments hinzufügen
         # Faktura-MAs sehen zusätzlich die Arbeitsscheine ihrer zugewiesenen Service-Manager
-        assigned_sm_ids = FakturaAssignment.objects.filter(
-            faktura_processor=user,
-            is_active=True
-        ).values_list('employee_id', flat=True)
+        assigned_sm_ids = get_permission_context(user).faktura_employee_ids
         
         if assigned_sm_ids:
             # Erweitere QuerySet: Original ODER von zugewiesenen SMs erstellt
@@ -177,9 +171,7 @@ class ScopeQuerySetMixin:
         
         if scope in ['DEPARTMENT', 'ALL']:
             # Abteilungs-Sofortmeldungen
-            user_departments = user.department_memberships.filter(
-                is_active=True
-            ).values_list('department_id', flat=True)
+            user_departments = get_permission_context(user).department_ids
             
             if user_departments:
                 # Sofortmeldungen der eigenen Abteilung
@@ -245,9 +237,7 @@ def get_queryset_for_scope(queryset, user, permission_code, app_name=None):
     if scope == 'OWN':
         return queryset.filter(created_by=user)
     elif scope == 'DEPARTMENT':
-        user_departments = user.department_memberships.filter(
-            is_active=True
-        ).values_list('department_id', flat=True)
+        user_departments = get_permission_context(user).department_ids
         return queryset.filter(department_id__in=user_departments)
     
     return queryset.none()
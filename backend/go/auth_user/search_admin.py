@@ -2,7 +2,8 @@
 Admin-Interface für Search-Tracking Models
 """
 from django.contrib import admin
-from .search_models import SearchQuery, SearchClick, SearchSynonym
+from .search_models import SearchQuery, SearchClick, SearchSynonym, SearchClickStats
+from .search_dictionaries import invalidate_search_dictionaries
 
 
 @admin.register(SearchQuery)
@@ -32,6 +33,16 @@ class SearchClickAdmin(admin.ModelAdmin):
         )
 
 
+@admin.register(SearchClickStats)
+class SearchClickStatsAdmin(admin.ModelAdmin):
+    list_display = ['normalized_query', 'profile', 'clicks_7d', 'clicks_30d', 'clicks_90d', 'clicks_total', 'last_clicked_at']
+    search_fields = ['normalized_query', 'profile__user__username']
+    readonly_fields = ['updated_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('profile__user')
+
+
 @admin.register(SearchSynonym)
 class SearchSynonymAdmin(admin.ModelAdmin):
     list_display = ['term', 'synonyms', 'weight', 'scope', 'is_auto_generated', 'is_active']
@@ -43,10 +54,12 @@ class SearchSynonymAdmin(admin.ModelAdmin):
     
     def activate_synonyms(self, request, queryset):
         updated = queryset.update(is_active=True)
+        invalidate_search_dictionaries()  # update() löst keine Signals aus
         self.message_user(request, f'{updated} Synonyme aktiviert')
     activate_synonyms.short_description = 'Ausgewählte Synonyme aktivieren'
     
     def deactivate_synonyms(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_search_dictionaries()  # update() löst keine Signals aus
         self.message_user(request, f'{updated} Synonyme deaktiviert')
     deactivate_synonyms.short_description = 'Ausgewählte Synonyme deaktivieren'
@@ -0,0 +1,123 @@
+"""
+Prozess-lokaler Cache für Such-Wörterbücher (Synonyme & manuelle Zuordnungen)
+Spart pro Suche die Synonym-Query pro Wort und den icontains-Scan über
+SearchProfileMapping. Invalidierung über eine Versionsnummer in Redis.
+"""
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Set
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# Redis-Key für die Wörterbuch-Version (Invalidierung über alle Worker)
+DICTIONARY_VERSION_CACHE_KEY = 'search_dictionaries_version'
+
+
+class ProfileMappingEntry(NamedTuple):
+    """Aktive manuelle Zuordnung (Suchbegriff → Profil)"""
+    query_term: str
+    profile_id: int
+    boost_score: float
+
+
+class SubstringIndex:
+    """
+    Suffix-Trie über alle Mapping-Suchbegriffe
+
+    Beantwortet "welche Begriffe enthalten den Query-Text?" (entspricht
+    query_term__icontains=query) in O(len(query)) statt Scan über alle Zeilen.
+    """
+
+    def __init__(self, terms: List[str]):
+        self._root: Dict = {}
+        for term_id, term in enumerate(terms):
+            term = term.lower()
+            for start in range(len(term)):
+                node = self._root
+                for char in term[start:]:
+                    node = node.setdefault(char, {})
+                    node.setdefault('$', set()).add(term_id)
+
+    def find_containing(self, text: str) -> Set[int]:
+        """Gibt die IDs aller Begriffe zurück, die `text` als Teilstring enthalten"""
+        node = self._root
+        for char in text.lower():
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get('$', set())
+
+
+class SearchDictionaries:
+    """Snapshot von Synonym-Wörterbuch und manuellen Zuordnungen"""
+
+    def __init__(self, version: int):
+        from .search_models import SearchSynonym, SearchProfileMapping
+
+        self.version = version
+
+        # Synonyme: term (lower) → Synonym-Liste (erster Treffer wie .first())
+        self.synonyms: Dict[str, List[str]] = {}
+        for synonym in SearchSynonym.objects.filter(is_active=True).only('term', 'synonyms'):
+            self.synonyms.setdefault(synonym.term.lower(), synonym.get_synonym_list())
+
+        self.mappings: List[ProfileMappingEntry] = [
+            ProfileMappingEntry(query_term, profile_id, boost_score)
+            for query_term, profile_id, boost_score in SearchProfileMapping.objects.filter(
+                is_active=True
+            ).values_list('query_term', 'profile_id', 'boost_score')
+        ]
+        self._mapping_index = SubstringIndex([m.query_term for m in self.mappings])
+
+        logger.info(
+            f"✅ Such-Wörterbücher geladen: {len(self.synonyms)} Synonyme, "
+            f"{len(self.mappings)} Zuordnungen (v{version})"
+        )
+
+    def get_synonyms(self, word: str) -> List[str]:
+        """Synonyme für ein Wort (case-insensitive)"""
+        return self.synonyms.get(word.lower(), [])
+
+    def find_mappings(self, query_text: str) -> List[ProfileMappingEntry]:
+        """Alle Zuordnungen deren Suchbegriff den Query-Text enthält"""
+        if not query_text:
+            return []
+        return [self.mappings[i] for i in sorted(self._mapping_index.find_containing(query_text))]
+
+
+_dictionaries = None
+_lock = threading.Lock()
+
+
+def _get_version() -> int:
+    try:
+        return cache.get(DICTIONARY_VERSION_CACHE_KEY) or 0
+    except Exception as e:
+        logger.warning(f"Wörterbuch-Version nicht lesbar: {e}")
+        return 0
+
+
+def get_search_dictionaries() -> SearchDictionaries:
+    """Gibt den aktuellen Wörterbuch-Snapshot zurück (lädt neu bei Versionswechsel)"""
+    global _dictionaries
+    version = _get_version()
+    if _dictionaries is None or _dictionaries.version != version:
+        with _lock:
+            if _dictionaries is None or _dictionaries.version != version:
+                _dictionaries = SearchDictionaries(version)
+    return _dictionaries
+
+
+def invalidate_search_dictionaries():
+    """Erhöht die Version → alle Worker laden Synonyme und Zuordnungen neu"""
+    global _dictionaries
+    try:
+        cache.incr(DICTIONARY_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(DICTIONARY_VERSION_CACHE_KEY, 1, None)
+    except Exception as e:
+        logger.warning(f"Wörterbuch-Version nicht erhöht: {e}")
+    _dictionaries = None
@@ -194,3 +194,113 @@ class SearchProfileMapping(models.Model):
     
     def __str__(self):
         return f"{self.query_term} → {self.profile.user.get_full_name()} (+{self.boost_score})"
+
+
+class SearchClickStats(models.Model):
+    """
+    Vorberechnete Klick-Statistik pro (normalisierte Query, Profil)
+    
+    Wird bei jedem Klick inkrementell hochgezählt (track_search_click) und
+    täglich von compact_search_click_stats aus den Roh-Klicks neu berechnet,
+    damit die Zeitfenster-Zähler korrekt auslaufen.
+    Learning-Boosts lesen nur diese Tabelle statt SearchClick ⨝ SearchQuery.
+    
+    Bewusste Näherung: Zwischen zwei Kompaktierungen steigen die
+    Fenster-Zähler nur, Klicks fallen erst beim nächsten Lauf heraus. Effektiv
+    umfassen die Fenster also bis zu 8 / 31 / 91 Tage (Fenster + ein
+    Kompaktierungs-Intervall). Für Boost-Gewichtung reicht das; exakte
+    Zeiträume liefern nur die Roh-Klicks (SearchClick).
+    """
+    # Zeitfenster der rollierenden Zähler (Tage → Feldname)
+    WINDOWS = {
+        7: 'clicks_7d',
+        30: 'clicks_30d',
+        90: 'clicks_90d',
+    }
+    
+    normalized_query = models.CharField('Normalisierte Query', max_length=500)
+    profile = models.ForeignKey(
+        'auth_user.UserProfile',
+        on_delete=models.CASCADE,
+        related_name='search_click_stats',
+        verbose_name='Profil'
+    )
+    
+    # Rollierende Zähler
+    clicks_7d = models.PositiveIntegerField('Klicks 7 Tage', default=0)
+    clicks_30d = models.PositiveIntegerField('Klicks 30 Tage', default=0)
+    clicks_90d = models.PositiveIntegerField('Klicks 90 Tage', default=0)
+    clicks_total = models.PositiveIntegerField('Klicks gesamt', default=0)
+    
+    # Summen für Durchschnittswerte (Position / Relevanz)
+    position_sum = models.PositiveIntegerField('Summe Positionen', default=0)
+    relevance_sum = models.FloatField('Summe Relevanz', default=0.0)
+    
+    last_clicked_at = models.DateTimeField('Letzter Klick', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Such-Klick-Statistik'
+        verbose_name_plural = 'Such-Klick-Statistiken'
+        unique_together = ['normalized_query', 'profile']
+        indexes = [
+            models.Index(fields=['profile', 'clicks_90d']),
+        ]
+    
+    def __str__(self):
+        return f"{self.normalized_query} → {self.profile_id} ({self.clicks_90d} Klicks/90d)"
+    
+    @staticmethod
+    def normalize_query(query_text: str) -> str:
+        """Normalisiert Query-Text (entspricht Lower(Trim()) in der Kompaktierung)"""
+        return (query_text or '').strip().lower()[:500]
+    
+    @classmethod
+    def window_field(cls, days: int) -> str:
+        """Kleinstes Zeitfenster das `days` abdeckt (sonst Gesamtzähler)"""
+        for window_days, field_name in sorted(cls.WINDOWS.items()):
+            if days <= window_days:
+                return field_name
+        return 'clicks_total'
+    
+    @classmethod
+    def record_click(cls, query_text: str, profile_id: int, position: int = 0, relevance: float = 0.0):
+        """
+        Zählt einen neuen Klick atomar hoch (UPDATE mit F-Ausdrücken, sonst INSERT)
+        """
+        from django.db import IntegrityError, transaction
+        from django.db.models import F
+        
+        normalized = cls.normalize_query(query_text)
+        if not normalized:
+            return
+        
+        increments = {
+            'clicks_7d': F('clicks_7d') + 1,
+            'clicks_30d': F('clicks_30d') + 1,
+            'clicks_90d': F('clicks_90d') + 1,
+            'clicks_total': F('clicks_total') + 1,
+            'position_sum': F('position_sum') + int(position or 0),
+            'relevance_sum': F('relevance_sum') + float(relevance or 0.0),
+            'last_clicked_at': timezone.now(),
+        }
+        rows = cls.objects.filter(normalized_query=normalized, profile_id=profile_id)
+        
+        if rows.update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    normalized_query=normalized,
+                    profile_id=profile_id,
+                    clicks_7d=1,
+                    clicks_30d=1,
+                    clicks_90d=1,
+                    clicks_total=1,
+                    position_sum=int(position or 0),
+                    relevance_sum=float(relevance or 0.0),
+                    last_clicked_at=timezone.now(),
+                )
+        except IntegrityError:
+            # Paralleler Klick hat die Zeile gerade angelegt
+            rows.update(**increments)
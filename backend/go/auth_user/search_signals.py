@@ -0,0 +1,18 @@
+"""
+Signals für Such-Wörterbücher
+Invalidiert den prozess-lokalen Synonym-/Zuordnungs-Cache bei jeder Änderung
+(synonym_management, profile_mapping_management, Admin, Management Commands)
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .search_models import SearchSynonym, SearchProfileMapping
+from .search_dictionaries import invalidate_search_dictionaries
+
+
+@receiver(post_save, sender=SearchSynonym)
+@receiver(post_delete, sender=SearchSynonym)
+@receiver(post_save, sender=SearchProfileMapping)
+@receiver(post_delete, sender=SearchProfileMapping)
+def invalidate_dictionaries_on_change(sender, instance, **kwargs):
+    """Synonym oder Zuordnung geändert → alle Worker laden die Wörterbücher neu"""
+    invalidate_search_dictionaries()
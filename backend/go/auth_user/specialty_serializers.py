@@ -8,6 +8,7 @@ from .profile_models import (
 )
 from django.contrib.auth import get_user_model
 from .hr_assignment_serializer import UserMiniSerializer
+from .permission_service import PermissionService
 
 User = get_user_model()
 
@@ -134,8 +135,9 @@ class DepartmentMemberDetailSerializer(serializers.ModelSerializer):
         
         # Update Specialties falls übergeben
         if specialty_ids is not None:
-            # Deaktiviere alle bestehenden
+            # Deaktiviere alle bestehenden (QuerySet.update() → Permission-Snapshot manuell invalidieren)
             instance.specialty_assignments.update(is_active=False)
+            PermissionService.clear_cache(instance.user_id)
             
             # Erstelle/Aktiviere neue
             for specialty in specialty_ids:
@@ -131,3 +131,46 @@ def sync_vacation_data_for_year(year: int):
             
     logger.info(f"✅ {users_updated} Benutzer auf Jahr {year} aktualisiert")
     return {'users_updated': users_updated, 'year': year}
+
+
+@shared_task
+def compact_search_click_stats():
+    """
+    Kompaktiert die vorberechnete Klick-Statistik der Suche
+    
+    Wird täglich ausgeführt: rollierende Zeitfenster-Zähler werden aus den
+    Roh-Klicks neu berechnet, veraltete Einträge gelöscht.
+    """
+    from .learning_service import compact_click_stats
+    
+    return compact_click_stats()
+
+
+@shared_task
+def update_workorder_badges(creator_deltas):
+    """
+    Passt die Arbeitsschein-Badges nach Statuswechseln an (in/aus 'submitted')
+    
+    creator_deltas: [[created_by_id, delta]] einer Transaktion. Nur betroffene
+    User mit vorhandenem Zähler; geänderte Badges werden gepusht.
+    """
+    from .badge_helpers import apply_workorder_badge_update
+    
+    updated = apply_workorder_badge_update(creator_deltas)
+    return {'users_updated': updated}
+
+
+@shared_task
+def reconcile_badge_counters():
+    """
+    Gleicht die Badge-Zähler im Cache gegen die Datenbank ab
+    
+    Wird periodisch ausgeführt und korrigiert Drift (z.B. durch
+    QuerySet.update() ohne Signals) - pro Lauf eine rotierende Teilmenge.
+    """
+    from .badge_helpers import reconcile_badge_counters as reconcile
+    
+    result = reconcile()
+    if result['corrected']:
+        logger.info(f"🔧 Badge-Abgleich: {result['corrected']} von {result['checked']} Usern korrigiert")
+    return result
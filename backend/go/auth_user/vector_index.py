@@ -0,0 +1,484 @@
+"""
+Vektor-Index für die semantische Profil-Suche
+
+Zwei Backends mit gleicher Schnittstelle (upsert, bulk_upsert, remove, search):
+- ProfileVectorIndex: hält alle Profil-Embeddings als vor-normalisierte
+  float32-Matrix im Prozess (Matrix-Vektor-Produkt + Top-K)
+- PgVectorIndex: pgvector-Spalte mit HNSW/IVFFlat-Index, Top-K läuft in
+  Postgres zusammen mit den Filtern is_searchable/user__is_active
+
+pgvector ist optional - ohne Extension bzw. ohne Tabelle (siehe
+`manage.py migrate_embeddings_to_pgvector`) wird der NumPy-Index genutzt.
+"""
+import json
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# Redis-Key für die Index-Generation (Invalidierung über alle Worker)
+INDEX_VERSION_CACHE_KEY = 'profile_vector_index_version'
+
+# Tabelle für das pgvector-Backend (wird vom Management Command angelegt)
+PGVECTOR_TABLE = 'auth_user_profile_embedding'
+
+
+def parse_embedding(raw) -> Optional[List[float]]:
+    """
+    Normalisiert den Inhalt von UserProfile.embedding_vector
+
+    Das Feld enthält je nach Schreibweg eine Liste oder einen JSON-String.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(raw, (list, tuple)) or not raw:
+        return None
+    return raw
+
+
+def _get_global_version() -> int:
+    """Liest die aktuelle Index-Generation aus dem Cache"""
+    try:
+        return cache.get(INDEX_VERSION_CACHE_KEY) or 0
+    except Exception as e:
+        logger.warning(f"Vektor-Index Version nicht lesbar: {e}")
+        return 0
+
+
+def bump_index_version() -> int:
+    """Erhöht die Index-Generation → alle Worker bauen ihren Index neu auf"""
+    try:
+        return cache.incr(INDEX_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(INDEX_VERSION_CACHE_KEY, 1, None)
+        return 1
+    except Exception as e:
+        logger.warning(f"Vektor-Index Version nicht erhöht: {e}")
+        return 0
+
+
+class ProfileVectorIndex:
+    """
+    Prozess-lokaler Index aller suchbaren Profil-Embeddings
+
+    - matrix: (n, dim) float32, jede Zeile L2-normalisiert
+    - ids: (n,) Profil-IDs passend zu den Zeilen
+    - version: Generation aus Redis, mit der der Index gebaut wurde
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._ids = None
+        self._positions: Dict[int, int] = {}
+        self._version = None
+        self._dim = None
+
+    # ------------------------------------------------------------------
+    # Aufbau
+    # ------------------------------------------------------------------
+
+    def _load_rows(self) -> List[Tuple[int, List[float]]]:
+        from .profile_models import UserProfile
+
+        rows = UserProfile.objects.filter(
+            is_searchable=True,
+            user__is_active=True,
+            embedding_vector__isnull=False
+        ).values_list('pk', 'embedding_vector')
+
+        parsed = []
+        for profile_id, raw in rows.iterator(chunk_size=2000):
+            vector = parse_embedding(raw)
+            if vector:
+                parsed.append((profile_id, vector))
+        return parsed
+
+    def build(self):
+        """Baut den Index komplett aus der Datenbank neu auf"""
+        version = _get_global_version()
+        rows = self._load_rows()
+
+        with self._lock:
+            if not rows:
+                self._matrix = np.zeros((0, 0), dtype=np.float32) if HAS_NUMPY else []
+                self._ids = np.zeros(0, dtype=np.int64) if HAS_NUMPY else []
+                self._positions = {}
+                self._dim = None
+                self._version = version
+                return
+
+            # Dimension des ersten Vektors ist maßgeblich (Provider-Wechsel → alte Vektoren ignorieren)
+            dim = len(rows[0][1])
+            rows = [(pid, vec) for pid, vec in rows if len(vec) == dim]
+
+            ids = [pid for pid, _ in rows]
+            if HAS_NUMPY:
+                matrix = np.asarray([vec for _, vec in rows], dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                self._matrix = matrix / norms
+                self._ids = np.asarray(ids, dtype=np.int64)
+            else:
+                self._matrix = [self._normalize(vec) for _, vec in rows]
+                self._ids = ids
+
+            self._positions = {pid: pos for pos, pid in enumerate(ids)}
+            self._dim = dim
+            self._version = version
+
+        logger.info(f"✅ Profil-Vektor-Index aufgebaut: {len(ids)} Profile, {dim} dims (v{version})")
+
+    def ensure_fresh(self):
+        """Baut den Index neu auf falls er fehlt oder ein anderer Worker ihn invalidiert hat"""
+        if self._version is None or self._version != _get_global_version():
+            self.build()
+
+    def invalidate(self):
+        """Verwirft den lokalen Index (nächste Suche baut neu auf)"""
+        with self._lock:
+            self._version = None
+
+    # ------------------------------------------------------------------
+    # Inkrementelle Updates
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(vector):
+        if HAS_NUMPY:
+            arr = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(arr)
+            return arr / norm if norm else arr
+        norm = sum(v * v for v in vector) ** 0.5
+        return [v / norm for v in vector] if norm else list(vector)
+
+    def _advance_version(self):
+        """
+        Erhöht die globale Generation nach einer lokalen Änderung
+
+        Hat zwischenzeitlich ein anderer Worker geändert, fehlt uns dessen
+        Änderung → lokalen Index verwerfen statt die neue Version zu übernehmen.
+        """
+        previous = self._version
+        new_version = bump_index_version()
+        self._version = new_version if new_version == (previous or 0) + 1 else None
+
+    def upsert(self, profile_id: int, vector: List[float]):
+        """
+        Fügt einen Vektor hinzu oder ersetzt ihn (nach generate_profile_embedding_task)
+
+        Der lokale Index wird direkt aktualisiert, die anderen Worker über
+        die Generation in Redis invalidiert.
+        """
+        with self._lock:
+            if self._version is not None and self._dim in (None, len(vector)):
+                normalized = self._normalize(vector)
+                pos = self._positions.get(profile_id)
+
+                if HAS_NUMPY:
+                    if self._dim is None:
+                        self._matrix = normalized.reshape(1, -1)
+                        self._ids = np.asarray([profile_id], dtype=np.int64)
+                        self._positions = {profile_id: 0}
+                        self._dim = len(vector)
+                    elif pos is not None:
+                        self._matrix[pos] = normalized
+                    else:
+                        self._matrix = np.vstack([self._matrix, normalized])
+                        self._ids = np.append(self._ids, np.int64(profile_id))
+                        self._positions[profile_id] = len(self._ids) - 1
+                else:
+                    if pos is not None:
+                        self._matrix[pos] = normalized
+                    else:
+                        self._matrix.append(normalized)
+                        self._ids.append(profile_id)
+                        self._positions[profile_id] = len(self._ids) - 1
+                    self._dim = self._dim or len(vector)
+
+                self._advance_version()
+            else:
+                # Kein lokaler Index oder Dimension geändert → komplett neu aufbauen
+                self._version = None
+                bump_index_version()
+
+    def bulk_upsert(self, rows: Iterable[Tuple[int, List[float]]]):
+        """Viele Vektoren geändert (Re-Embed) → Index in allen Workern neu aufbauen"""
+        self.invalidate()
+        bump_index_version()
+
+    def remove(self, profile_id: int):
+        """Entfernt ein Profil (z.B. nicht mehr suchbar oder User deaktiviert)"""
+        with self._lock:
+            pos = self._positions.pop(profile_id, None)
+            if pos is not None and self._version is not None:
+                if HAS_NUMPY:
+                    self._matrix = np.delete(self._matrix, pos, axis=0)
+                    self._ids = np.delete(self._ids, pos)
+                else:
+                    del self._matrix[pos]
+                    del self._ids[pos]
+                self._positions = {int(pid): i for i, pid in enumerate(self._ids)}
+                self._advance_version()
+            elif self._version is None:
+                # Lokal nicht aufgebaut → andere Worker könnten das Profil noch halten
+                bump_index_version()
+
+    # ------------------------------------------------------------------
+    # Suche
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._positions)
+
+    def search(self, query_vector: List[float], top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Liefert die Top-K Profile nach Cosine Similarity
+
+        Args:
+            query_vector: Query-Embedding
+            top_k: Anzahl der Kandidaten (None = alle)
+
+        Returns:
+            List[Tuple[int, float]]: (profile_id, similarity), absteigend sortiert
+        """
+        if not query_vector:
+            return []
+
+        self.ensure_fresh()
+
+        with self._lock:
+            matrix, ids, dim = self._matrix, self._ids, self._dim
+
+        if not dim or len(query_vector) != dim:
+            return []
+
+        query = self._normalize(query_vector)
+
+        if not HAS_NUMPY:
+            scores = [
+                (pid, float(sum(a * b for a, b in zip(query, vec))))
+                for pid, vec in zip(ids, matrix)
+            ]
+            scores.sort(key=lambda x: x[1], reverse=True)
+            return scores[:top_k] if top_k else scores
+
+        similarities = matrix @ query
+        n = similarities.shape[0]
+
+        if top_k and top_k < n:
+            top = np.argpartition(-similarities, top_k - 1)[:top_k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-similarities[top])]
+
+        return [(int(ids[i]), float(similarities[i])) for i in top]
+
+
+def to_pgvector(vector: List[float]) -> str:
+    """Vektor als pgvector-Literal ('[0.1,0.2,...]')"""
+    return '[' + ','.join(repr(float(v)) for v in vector) + ']'
+
+
+def pgvector_table_dimension() -> Optional[int]:
+    """
+    Dimension der pgvector-Spalte oder None wenn das Backend nicht eingerichtet ist
+
+    Voraussetzung: Postgres, Extension `vector` und Tabelle PGVECTOR_TABLE.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT a.atttypmod
+                FROM pg_attribute a
+                WHERE a.attrelid = to_regclass(%s) AND a.attname = 'embedding'
+                """,
+                [PGVECTOR_TABLE]
+            )
+            row = cursor.fetchone()
+    except DatabaseError as e:
+        logger.warning(f"pgvector-Prüfung fehlgeschlagen: {e}")
+        return None
+    return row[0] if row and row[0] > 0 else None
+
+
+class PgVectorIndex:
+    """
+    Profil-Vektor-Index in Postgres (pgvector)
+
+    Die Vektoren liegen in PGVECTOR_TABLE (profile_id → vector(dim)) mit
+    HNSW- oder IVFFlat-Index für Cosine-Distanz. Die Suche filtert direkt in
+    SQL auf suchbare Profile aktiver User - es werden nur Top-K Zeilen übertragen.
+    Bei Datenbankfehlern fällt die Suche auf den NumPy-Index zurück.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _fallback(self) -> ProfileVectorIndex:
+        return _get_numpy_index()
+
+    def ensure_fresh(self):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def upsert(self, profile_id: int, vector: List[float]):
+        """Fügt einen Vektor hinzu oder ersetzt ihn"""
+        self.bulk_upsert([(profile_id, vector)])
+
+    def bulk_upsert(self, rows: Iterable[Tuple[int, List[float]]]):
+        """Schreibt viele Vektoren per executemany (ON CONFLICT → Update)"""
+        params = []
+        for profile_id, vector in rows:
+            if len(vector) != self.dim:
+                logger.warning(
+                    f"⚠️ pgvector: Profil {profile_id} hat {len(vector)} statt {self.dim} dims "
+                    f"- migrate_embeddings_to_pgvector --recreate ausführen"
+                )
+                continue
+            params.append([profile_id, to_pgvector(vector)])
+        if not params:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {PGVECTOR_TABLE} (profile_id, embedding)
+                VALUES (%s, %s::vector)
+                ON CONFLICT (profile_id) DO UPDATE SET embedding = EXCLUDED.embedding
+                """,
+                params
+            )
+        # NumPy-Fallback der Worker aktuell halten (wird nur bei Bedarf neu gebaut)
+        bump_index_version()
+
+    def remove(self, profile_id: int):
+        """Entfernt ein Profil aus der Tabelle"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {PGVECTOR_TABLE} WHERE profile_id = %s", [profile_id])
+        bump_index_version()
+
+    def __len__(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {PGVECTOR_TABLE}")
+            return cursor.fetchone()[0]
+
+    def search(self, query_vector: List[float], top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Liefert die Top-K Profile nach Cosine Similarity (ANN in Postgres)
+
+        Args:
+            query_vector: Query-Embedding
+            top_k: Anzahl der Kandidaten (None = alle)
+
+        Returns:
+            List[Tuple[int, float]]: (profile_id, similarity), absteigend sortiert
+        """
+        if not query_vector:
+            return []
+        if len(query_vector) != self.dim:
+            return self._fallback().search(query_vector, top_k)
+
+        from .profile_models import UserProfile
+
+        profile_table = UserProfile._meta.db_table
+        profile_pk = UserProfile._meta.pk.column
+        user_meta = UserProfile._meta.get_field('user').related_model._meta
+        literal = to_pgvector(query_vector)
+        limit = top_k or 1000000
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                # HNSW liefert maximal ef_search Treffer, IVFFlat durchsucht nur `probes` Listen
+                ef_search = max(limit if top_k else 1000, 40)
+                cursor.execute(
+                    "SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+                    [str(min(ef_search, 1000)), str(getattr(settings, 'EMBEDDING_CONFIG', {}).get('ivfflat_probes', 10))]
+                )
+                cursor.execute(
+                    f"""
+                    SELECT e.profile_id, 1 - (e.embedding <=> %s::vector) AS similarity
+                    FROM {PGVECTOR_TABLE} e
+                    JOIN {profile_table} p ON p.{profile_pk} = e.profile_id
+                    JOIN {user_meta.db_table} u ON u.{user_meta.pk.column} = p.{profile_pk}
+                    WHERE p.is_searchable AND u.is_active
+                    ORDER BY e.embedding <=> %s::vector
+                    LIMIT %s
+                    """,
+                    [literal, literal, limit]
+                )
+                return [(profile_id, float(similarity)) for profile_id, similarity in cursor.fetchall()]
+        except DatabaseError as e:
+            logger.warning(f"⚠️ pgvector-Suche fehlgeschlagen, nutze NumPy-Index: {e}")
+            return self._fallback().search(query_vector, top_k)
+
+
+_profile_vector_index = None
+_index_lock = threading.Lock()
+_pgvector_state = {'checked_version': None, 'index': None}
+
+
+def _get_numpy_index() -> ProfileVectorIndex:
+    """Gibt die prozess-weite Instanz des NumPy-Index zurück"""
+    global _profile_vector_index
+    if _profile_vector_index is None:
+        with _index_lock:
+            if _profile_vector_index is None:
+                _profile_vector_index = ProfileVectorIndex()
+    return _profile_vector_index
+
+
+def _get_pgvector_index() -> Optional[PgVectorIndex]:
+    """
+    pgvector-Backend falls eingerichtet
+
+    Geprüft wird einmal pro Index-Generation - das Management Command erhöht
+    sie nach der Migration, dadurch wechseln alle Worker ohne Neustart.
+    """
+    version = _get_global_version()
+    if _pgvector_state['checked_version'] != version:
+        dim = pgvector_table_dimension()
+        _pgvector_state['index'] = PgVectorIndex(dim) if dim else None
+        _pgvector_state['checked_version'] = version
+    return _pgvector_state['index']
+
+
+def get_profile_vector_index():
+    """
+    Gibt das aktive Vektor-Index-Backend zurück
+
+    EMBEDDING_CONFIG['vector_backend']:
+    - 'auto' (Default): pgvector falls eingerichtet, sonst NumPy
+    - 'pgvector': wie 'auto', aber mit Warnung wenn pgvector fehlt
+    - 'numpy': immer der In-Memory Index
+    """
+    backend = getattr(settings, 'EMBEDDING_CONFIG', {}).get('vector_backend', 'auto')
+    if backend in ('auto', 'pgvector'):
+        index = _get_pgvector_index()
+        if index is not None:
+            return index
+        if backend == 'pgvector':
+            logger.warning("⚠️ pgvector nicht eingerichtet - nutze NumPy-Index")
+    return _get_numpy_index()
@@ -36,11 +36,6 @@ app.conf.beat_schedule = {
         'schedule': 604800.0,  # Wöchentlich (Sonntag)
         'options': {'queue': 'blink'}
     },
-    'ensure-next-year-holidays': {
-        'task': 'absences.tasks.ensure_next_year_holidays',
-        'schedule': 86400.0,  # Täglich (prüft ob Dezember und erstellt für nächstes Jahr)
-        'options': {'queue': 'absences'}
-    },
     'update-vacation-year': {
         'task': 'auth_user.tasks.update_vacation_year',
         'schedule': 86400.0,  # Täglich (führt nur am 1. Januar aus)
@@ -51,11 +46,31 @@ app.conf.beat_schedule = {
         'schedule': 2592000.0,  # Monatlich (30 Tage)
         'options': {'queue': 'default'}
     },
+    'compact-search-click-stats': {
+        'task': 'auth_user.tasks.compact_search_click_stats',
+        'schedule': 86400.0,  # Täglich
+        'options': {'queue': 'default'}
+    },
+    'reconcile-badge-counters': {
+        'task': 'auth_user.tasks.reconcile_badge_counters',
+        'schedule': 900.0,  # Alle 15 Minuten
+        'options': {'queue': 'default'}
+    },
     'reset-monthly-checklist': {
         'task': 'workorders.tasks.reset_monthly_checklist',
         'schedule': 2592000.0,  # Monatlich (30 Tage) - am 1. des Monats
         'options': {'queue': 'default'}
     },
+    'cleanup-merged-pdfs': {
+        'task': 'workorders.tasks.cleanup_merged_pdfs',
+        'schedule': 86400.0,  # Täglich
+        'options': {'queue': 'default'}
+    },
+    'cleanup-pdf-splits': {
+        'task': 'workorders.tasks.cleanup_pdf_splits',
+        'schedule': 86400.0,  # Täglich
+        'options': {'queue': 'default'}
+    },
     # 🆕 Phase 2: Urlaubssaldo-Cronjobs
     'calculate-carryover-vacation': {
         'task': 'absences.tasks.calculate_carryover_vacation',
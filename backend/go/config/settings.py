@@ -98,6 +98,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'auth_user.permission_context.PermissionContextMiddleware',  # Permission-Kontext pro Request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -384,6 +385,14 @@ EMBEDDING_CONFIG = {
     # Für OpenAI (online, kostenpflichtig)
     # OPENAI_API_KEY muss in Umgebung gesetzt sein
     'openai_model': config('OPENAI_EMBEDDING_MODEL', default='text-embedding-3-small'),
+    
+    # Vektor-Index: 'auto' (pgvector falls eingerichtet, sonst NumPy), 'pgvector' oder 'numpy'
+    # pgvector einrichten: python manage.py migrate_embeddings_to_pgvector
+    'vector_backend': config('EMBEDDING_VECTOR_BACKEND', default='auto'),
+    
+    # Query-Embedding-Cache (LRU pro Prozess + Redis für alle Worker)
+    'query_cache_size': config('EMBEDDING_QUERY_CACHE_SIZE', default=1024, cast=int),
+    'query_cache_timeout': config('EMBEDDING_QUERY_CACHE_TIMEOUT', default=7 * 24 * 3600, cast=int),
 }
 
 # LOGGING für Embedding-Service
@@ -5,3 +5,7 @@ class WorkordersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workorders'
     verbose_name = 'Arbeitsscheine'
+    
+    def ready(self):
+        """Import signals when the app is ready"""
+        import workorders.signals  # noqa
@@ -0,0 +1,231 @@
+"""
+Import der Hakliste (RecurringWorkOrderChecklist) aus Excel/CSV
+
+- map_import_rows: Spalten-Mapping + Pflichtfeld-Prüfung spaltenweise mit
+  pandas statt df.iterrows()
+- upsert_checklist_items: Usernamen in einer Query auflösen, dann chunkweise
+  bulk_create(update_conflicts=True) auf (object_number, project_number)
+
+Große Imports laufen (auf Wunsch) im Celery-Task import_checklist_items,
+Fortschritt im Cache (IMPORT_STATUS_CACHE_KEY) und per WebSocket.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Einträge pro bulk_create / Transaktion
+IMPORT_CHUNK_SIZE = 500
+
+# Ab so vielen Einträgen läuft import_save (auf Wunsch) im Hintergrund
+IMPORT_ASYNC_THRESHOLD = 1000
+
+# Status eines Hintergrund-Imports: {'status', 'processed', 'total', 'user_id', 'created', 'updated', 'errors'}
+IMPORT_STATUS_CACHE_KEY = 'workorder_checklist_import_{}'
+IMPORT_STATUS_TIMEOUT = 24 * 3600
+
+REQUIRED_IMPORT_FIELDS = {
+    'object_number': 'O-Nummer',
+    'project_number': 'P-Nummer',
+    'object_description': 'Objektbeschreibung',
+}
+
+# Felder, die beim Import immer übernommen werden
+IMPORT_TEXT_FIELDS = ['object_description', 'debitor_number', 'notes', 'sr_invoice_number']
+
+
+def map_import_rows(df, column_mapping, global_valid_from=''):
+    """
+    Wendet das Column-Mapping auf den DataFrame an und prüft Pflichtfelder
+
+    Returns:
+        dict: {'valid': [...], 'invalid': [...], 'total': n} - Einträge wie
+        bisher mit row_number, original_data, Feldwerten und ggf. missing_fields
+    """
+    import pandas as pd
+
+    # Gemappte Spalten einmalig als bereinigte Strings (NaN → '')
+    columns = {}
+    mapping = {}
+    for field_key, column_name in column_mapping.items():
+        if not column_name or column_name not in df.columns:
+            continue
+        if column_name not in columns:
+            series = df[column_name]
+            columns[column_name] = series.astype(object).where(series.notna(), '').astype(str).str.strip()
+        mapping[field_key] = column_name
+
+    mapped = pd.DataFrame(
+        {field_key: columns[column_name] for field_key, column_name in mapping.items()},
+        index=df.index
+    )
+
+    # Globales Startdatum anwenden, wenn nicht in Spalte vorhanden
+    if global_valid_from:
+        if 'valid_from' in mapped:
+            mapped['valid_from'] = mapped['valid_from'].mask(mapped['valid_from'] == '', global_valid_from)
+        else:
+            mapped['valid_from'] = global_valid_from
+
+    # Fehlende Pflichtfelder je Zeile (valid_from ist optional)
+    missing = pd.Series([[] for _ in range(len(df))], index=df.index, dtype=object)
+    for field_key, label in REQUIRED_IMPORT_FIELDS.items():
+        if field_key in mapped:
+            empty = mapped[field_key] == ''
+        else:
+            empty = pd.Series(True, index=df.index)
+        missing[empty] = missing[empty].apply(lambda fields, label=label: fields + [label])
+
+    original = pd.DataFrame(columns, index=df.index).to_dict('records')
+    records = mapped.to_dict('records') if len(mapped.columns) else [{} for _ in range(len(df))]
+
+    results = {'valid': [], 'invalid': [], 'total': len(df)}
+    for index, original_data, values, missing_fields in zip(df.index, original, records, missing):
+        item_data = {'row_number': index + 1, 'original_data': original_data, **values}
+        if missing_fields:
+            item_data['missing_fields'] = missing_fields
+            results['invalid'].append(item_data)
+        else:
+            results['valid'].append(item_data)
+    return results
+
+
+def resolve_usernames(items):
+    """Service-Manager/Faktur-MA aller Einträge in einer Query → {username: user}"""
+    usernames = set()
+    for item in items:
+        for key in ('service_manager_username', 'billing_user_username'):
+            if item.get(key):
+                usernames.add(item[key])
+    if not usernames:
+        return {}
+    User = get_user_model()
+    return {user.username: user for user in User.objects.filter(username__in=usernames)}
+
+
+def _upsert_chunk(chunk, users, user, now):
+    """
+    Schreibt einen Chunk per bulk_create(update_conflicts=True)
+
+    Returns:
+        tuple: (created, updated)
+    """
+    from .models import RecurringWorkOrderChecklist
+
+    keys = [(item['object_number'], item['project_number']) for item in chunk]
+    existing = set(
+        RecurringWorkOrderChecklist.objects.filter(
+            object_number__in={key[0] for key in keys},
+            project_number__in={key[1] for key in keys}
+        ).values_list('object_number', 'project_number')
+    )
+
+    # Gleicher Schlüssel mehrfach im Chunk: letzte Zeile gewinnt, ein zuvor
+    # gesetzter Service Manager bleibt wie beim zeilenweisen Speichern erhalten
+    rows = {}
+    created = updated = 0
+    for key, item in zip(keys, chunk):
+        if key in existing or key in rows:
+            updated += 1
+        else:
+            created += 1
+        service_manager = users.get(item.get('service_manager_username') or '')
+        if service_manager is None and key in rows:
+            service_manager = rows[key][1]
+        rows[key] = (item, service_manager)
+
+    current_month = now.strftime('%Y-%m')
+    with_manager, without_manager = [], []
+    for key, (item, service_manager) in rows.items():
+        obj = RecurringWorkOrderChecklist(
+            object_number=key[0],
+            project_number=key[1],
+            service_manager=service_manager,
+            # Fallback: Wenn kein billing_user, nutze importierenden User
+            assigned_billing_user=users.get(item.get('billing_user_username') or '') or user,
+            last_checked_by=user if key in existing else None,
+            created_by=user,
+            current_month=current_month,
+            **{field: item.get(field, '') for field in IMPORT_TEXT_FIELDS}
+        )
+        (with_manager if service_manager else without_manager).append(obj)
+
+    update_fields = IMPORT_TEXT_FIELDS + ['assigned_billing_user', 'last_checked_by', 'updated_at']
+    for objs, fields in (
+        (with_manager, update_fields + ['service_manager']),
+        (without_manager, update_fields),
+    ):
+        if objs:
+            RecurringWorkOrderChecklist.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['object_number', 'project_number'],
+                update_fields=fields
+            )
+    return created, updated
+
+
+def upsert_checklist_items(items, user=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Speichert validierte Import-Einträge (neu anlegen oder aktualisieren)
+
+    Schlägt ein Chunk fehl, wird er zeilenweise wiederholt, damit nur die
+    fehlerhaften Zeilen in errors landen.
+
+    Args:
+        items: Einträge aus map_import_rows (bzw. vom Frontend nachbearbeitet)
+        user: Importierender User (created_by, Fallback Faktur-MA)
+        progress: Optional callback(processed, total)
+
+    Returns:
+        dict: {'created', 'updated', 'errors'}
+    """
+    users = resolve_usernames(items)
+    now = timezone.now()
+    created = updated = 0
+    errors = []
+
+    rows = []
+    for item in items:
+        if not item.get('object_number') or not item.get('project_number'):
+            errors.append({
+                'row': item.get('row_number'),
+                'error': 'O-Nummer und P-Nummer erforderlich'
+            })
+        else:
+            rows.append(item)
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                chunk_created, chunk_updated = _upsert_chunk(chunk, users, user, now)
+        except Exception as e:
+            logger.warning(f"⚠️ Haklisten-Import: Chunk ab Zeile {start + 1} fehlgeschlagen ({e}), speichere zeilenweise")
+            chunk_created = chunk_updated = 0
+            for item in chunk:
+                try:
+                    with transaction.atomic():
+                        row_created, row_updated = _upsert_chunk([item], users, user, now)
+                    chunk_created += row_created
+                    chunk_updated += row_updated
+                except Exception as row_error:
+                    errors.append({'row': item.get('row_number'), 'error': str(row_error)})
+        created += chunk_created
+        updated += chunk_updated
+        if progress:
+            progress(min(start + chunk_size, len(rows)), len(rows))
+
+    return {'created': created, 'updated': updated, 'errors': errors}
+
+
+def get_import_status(job_id):
+    return cache.get(IMPORT_STATUS_CACHE_KEY.format(job_id))
+
+
+def set_import_status(job_id, **status):
+    cache.set(IMPORT_STATUS_CACHE_KEY.format(job_id), status, IMPORT_STATUS_TIMEOUT)
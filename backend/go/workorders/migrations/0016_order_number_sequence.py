@@ -0,0 +1,24 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0015_alter_workorderhistory_work_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Jahr')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Letzte vergebene Nummer')),
+            ],
+            options={
+                'verbose_name': 'Auftragsnummern-Sequenz',
+                'verbose_name_plural': 'Auftragsnummern-Sequenzen',
+            },
+        ),
+    ]
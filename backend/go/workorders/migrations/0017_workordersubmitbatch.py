@@ -0,0 +1,38 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:55
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0016_order_number_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkOrderSubmitBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('processing', 'In Verarbeitung'), ('completed', 'Abgeschlossen'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=20, verbose_name='Status')),
+                ('items', models.JSONField(default=list, verbose_name='Dateien')),
+                ('total_files', models.PositiveIntegerField(default=0, verbose_name='Anzahl Dateien')),
+                ('processed_files', models.PositiveIntegerField(default=0, verbose_name='Verarbeitet')),
+                ('created_orders', models.JSONField(default=list, verbose_name='Erstellte Arbeitsscheine')),
+                ('errors', models.JSONField(default=list, verbose_name='Fehler')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Abgeschlossen am')),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='workorders.workorderclient', verbose_name='Kunde')),
+                ('submitted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workorder_submit_batches', to=settings.AUTH_USER_MODEL, verbose_name='Eingereicht von')),
+            ],
+            options={
+                'verbose_name': 'Scan-Upload-Batch',
+                'verbose_name_plural': 'Scan-Upload-Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.9 on 2026-10-17 03:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0017_workordersubmitbatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['object_number', 'project_number', 'leistungsmonat'], name='workorders__object__a50bb9_idx'),
+        ),
+    ]
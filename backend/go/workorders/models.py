@@ -1,4 +1,6 @@
-from django.db import models
+import uuid
+
+from django.db import IntegrityError, connection, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -105,18 +107,9 @@ class WorkOrderTemplate(models.Model):
     
     def create_work_order(self, start_date, end_date, project_number=''):
         """Erstelle einen Arbeitsschein aus dieser Vorlage"""
-        from django.utils import timezone
-        
-        # Generiere Auftragsnummer
-        year = timezone.now().year
-        count = WorkOrder.objects.filter(
-            order_number__startswith=f'AS-{year}'
-        ).count() + 1
-        order_number = f'AS-{year}-{count:04d}'
-        
+        # Auftragsnummer vergibt WorkOrder.save() über die Jahres-Sequenz
         work_order = WorkOrder.objects.create(
             template=self,
-            order_number=order_number,
             project_number=project_number,
             client=self.client,
             work_object=self.work_object,
@@ -134,6 +127,93 @@ class WorkOrderTemplate(models.Model):
         return work_order
 
 
+class OrderNumberSequence(models.Model):
+    """
+    Zähler für Auftragsnummern pro Jahr (AS-YYYY-NNNN)
+    
+    Die Zeile wird per UPDATE gesperrt und hochgezählt - parallele Uploads
+    bekommen so nie dieselbe Nummer. Läuft die Reservierung in derselben
+    Transaktion wie das Anlegen der Arbeitsscheine, gibt ein Rollback die
+    Nummern wieder frei (lückenlos).
+    """
+    year = models.PositiveIntegerField('Jahr', primary_key=True)
+    last_value = models.PositiveIntegerField('Letzte vergebene Nummer', default=0)
+    
+    class Meta:
+        verbose_name = 'Auftragsnummern-Sequenz'
+        verbose_name_plural = 'Auftragsnummern-Sequenzen'
+    
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+    
+    @staticmethod
+    def format_number(year, value):
+        return f'AS-{year}-{value:04d}'
+    
+    @classmethod
+    def reserve(cls, count=1, year=None):
+        """
+        Reserviert einen Block von `count` aufeinanderfolgenden Nummern
+        
+        Ein UPDATE ... RETURNING (ein Roundtrip) sperrt die Jahres-Zeile bis
+        zum Ende der umgebenden Transaktion.
+        
+        Returns:
+            list: Auftragsnummern, z.B. ['AS-2026-0013', 'AS-2026-0014']
+        """
+        if count < 1:
+            return []
+        if year is None:
+            year = timezone.now().year
+        
+        cls._ensure_year(year)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET last_value = last_value + %s "
+                f"WHERE year = %s RETURNING last_value",
+                [count, year]
+            )
+            last_value = cursor.fetchone()[0]
+        
+        first = last_value - count + 1
+        return [cls.format_number(year, value) for value in range(first, last_value + 1)]
+    
+    @classmethod
+    def release(cls, count, year=None):
+        """
+        Gibt die letzten `count` Nummern eines Blocks zurück
+        
+        Nur innerhalb der Transaktion der Reservierung aufrufen - solange
+        hält sie die Zeilensperre, niemand sonst kann dahinter vergeben haben.
+        """
+        if count < 1:
+            return
+        if year is None:
+            year = timezone.now().year
+        cls.objects.filter(year=year).update(last_value=models.F('last_value') - count)
+    
+    @classmethod
+    def _ensure_year(cls, year):
+        """Legt die Jahres-Zeile an, Startwert = höchste vorhandene Nummer des Jahres"""
+        if cls.objects.filter(year=year).exists():
+            return
+        
+        prefix = f'AS-{year}-'
+        highest = 0
+        for order_number in WorkOrder.objects.filter(
+            order_number__startswith=prefix
+        ).values_list('order_number', flat=True).iterator():
+            suffix = order_number[len(prefix):]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(year=year, last_value=highest)
+        except IntegrityError:
+            pass  # Paralleler Request hat die Zeile gerade angelegt
+
 
 class WorkOrder(models.Model):
     """Arbeitsschein"""
@@ -321,6 +401,7 @@ class WorkOrder(models.Model):
             models.Index(fields=['client', 'start_date']),
             models.Index(fields=['status']),
             models.Index(fields=['is_cancelled', '-created_at']),  # NEU
+            models.Index(fields=['object_number', 'project_number', 'leistungsmonat']),  # Haklisten-Abgleich
         ]
         permissions = [
             ("cancel_workorder", "Can cancel workorder"),
@@ -344,12 +425,26 @@ class WorkOrder(models.Model):
     
     def save(self, *args, **kwargs):
         # Auto-generate order number if not set
+        # Nummer + Insert in einer Transaktion → bei Fehler wird die Nummer wieder frei
         if not self.order_number:
-            self.order_number = self.generate_order_number()
+            with transaction.atomic():
+                self.order_number = self.generate_order_number()
+                try:
+                    return self.save(*args, **kwargs)
+                except Exception:
+                    self.order_number = ''
+                    raise
         
+        self.apply_save_defaults()
+        super().save(*args, **kwargs)
+    
+    def apply_save_defaults(self):
+        """
+        Setzt abgeleitete Felder wie save() - auch für bulk_create nutzen,
+        das save() umgeht (Auftragsnummer dort vorab per Sequenz-Block vergeben)
+        """
         # Generate signature token if not exists
         if not self.signature_token:
-            import uuid
             self.signature_token = str(uuid.uuid4())
         
         # Auto-set month from start_date
@@ -361,21 +456,27 @@ class WorkOrder(models.Model):
         # Set completed_at when status changes to completed/signed
         if self.status in ['completed', 'signed'] and not self.completed_at:
             self.completed_at = timezone.now()
-        
-        super().save(*args, **kwargs)
     
     @staticmethod
-    def generate_order_number():
-        """Generate unique order number"""
-        from django.utils import timezone
-        year = timezone.now().year
+    def compute_content_hash(object_number, project_number):
+        """
+        Content-Hash aus O-Nr und P-Nr für die Duplikat-Erkennung beim Scan-Upload
         
-        # Optimiert: Verwende nur count() statt die letzte Order zu holen
-        count = WorkOrder.objects.filter(
-            order_number__startswith=f'AS-{year}'
-        ).count() + 1
+        Normalisiert die Werte: entfernt führende 0, "O-", "P-", Leerzeichen
+        """
+        import hashlib
+        import re
+        o_normalized = re.sub(r'^[O0-]+', '', (object_number or '').upper().strip())
+        p_normalized = re.sub(r'^[P0-]+', '', (project_number or '').upper().strip())
         
-        return f'AS-{year}-{count:04d}'
+        # Hash-Input: O+P (ohne führende Nullen), erste 12 Zeichen
+        hash_input = f"{o_normalized}_{p_normalized}"
+        return hashlib.md5(hash_input.encode()).hexdigest()[:12]
+    
+    @staticmethod
+    def generate_order_number():
+        """Generate unique order number (Jahres-Sequenz, siehe OrderNumberSequence)"""
+        return OrderNumberSequence.reserve(1)[0]
     
     def get_signature_url(self, request=None):
         """Get public URL for customer signature"""
@@ -435,14 +536,20 @@ Ihr Bogdol-Team
         self.signature_link_sent_at = timezone.now()
         self.save()
     
-    def get_responsible_billing_user(self):
+    def get_responsible_billing_user(self, prefetched=None):
         """
         Ermittelt den zuständigen Faktura-Mitarbeiter.
         Berücksichtigt automatisch Vertretung bei Abwesenheit.
+        
+        Args:
+            prefetched: Optional WorkOrderListPrefetch (Listen-Serialisierung ohne Queries)
         """
-        if not self.submitted_by:
+        if not self.submitted_by_id:
             return None
         
+        if prefetched is not None:
+            return prefetched.billing_users.get(self.submitted_by_id)
+        
         # Hole zugewiesenen Faktura-Mitarbeiter aus FakturaAssignment
         from auth_user.profile_models import FakturaAssignment
         
@@ -475,7 +582,7 @@ Ihr Bogdol-Team
         # Sonst den normalen zuständigen Mitarbeiter
         return billing_user
     
-    def can_mark_billed(self, user):
+    def can_mark_billed(self, user, prefetched=None):
         """
         Prüft ob ein User den Arbeitsschein als abgerechnet markieren darf.
         Erlaubt: Zugewiesener Faktura-Mitarbeiter ODER Vertretung ODER Admin/Superuser
@@ -487,14 +594,14 @@ Ihr Bogdol-Team
         if user.is_staff or user.is_superuser:
             return True
         
-        responsible = self.get_responsible_billing_user()
+        responsible = self.get_responsible_billing_user(prefetched)
         if not responsible:
             return False
         
         # Zugewiesener oder Vertretung
         return user.id == responsible.id
     
-    def can_cancel(self, user):
+    def can_cancel(self, user, prefetched=None):
         """
         Prüft ob ein User den Arbeitsschein stornieren darf.
         Verwendet Permission-System mit Scope-Logik.
@@ -506,10 +613,14 @@ Ihr Bogdol-Team
         if user.is_staff or user.is_superuser:
             return True
         
-        # Nutze Permission-Service mit Scope
-        from auth_user.permission_service import PermissionService
+        # Nutze Permission-Service mit Scope (im Request pro User geteilt)
+        from auth_user.permission_context import get_permission_context
         
-        perm_service = PermissionService.for_user(user)
+        if prefetched is not None and prefetched.user == user:
+            context = prefetched.permission_context
+        else:
+            context = get_permission_context(user)
+        perm_service = context.scope_service
         
         # Hat der User überhaupt die Permission?
         if not perm_service.has_permission('can_cancel_workorder'):
@@ -522,28 +633,17 @@ Ihr Bogdol-Team
             return True
         elif scope == 'DEPARTMENT':
             # Prüfe ob Arbeitsschein zur Abteilung des Users gehört
-            user_dept_ids = user.user_departments.values_list('department_id', flat=True)
-            if self.department_id and self.department_id in user_dept_ids:
+            if self.department_id and self.department_id in context.department_ids:
                 return True
             # Prüfe auch FakturaAssignment
-            from auth_user.profile_models import FakturaAssignment
-            if FakturaAssignment.objects.filter(
-                faktura_processor=user,
-                service_manager=self.created_by,
-                is_active=True
-            ).exists():
+            if self.created_by_id in context.faktura_employee_ids:
                 return True
         elif scope == 'OWN':
             # Nur eigene Arbeitsscheine
-            if self.created_by and user.id == self.created_by.id:
+            if self.created_by_id and user.id == self.created_by_id:
                 return True
             # Prüfe auch FakturaAssignment (zugewiesene Service-Manager)
-            from auth_user.profile_models import FakturaAssignment
-            if FakturaAssignment.objects.filter(
-                faktura_processor=user,
-                employee=self.created_by,
-                is_active=True
-            ).exists():
+            if self.created_by_id in context.faktura_employee_ids:
                 return True
         
         return False
@@ -662,7 +762,16 @@ Ihr Bogdol-Team
         self.pdf_downloaded_by = user
         self.save(update_fields=['pdf_downloaded', 'pdf_downloaded_at', 'pdf_downloaded_by'])
     
-    def match_checklist_item(self):
+    @staticmethod
+    def mark_pdfs_downloaded(queryset, user):
+        """Bulk-Variante von mark_pdf_downloaded (ein UPDATE) → Anzahl"""
+        return queryset.update(
+            pdf_downloaded=True,
+            pdf_downloaded_at=timezone.now(),
+            pdf_downloaded_by=user
+        )
+    
+    def match_checklist_item(self, prefetched=None):
         """
         Versucht den Arbeitsschein mit einem Haklisten-Eintrag abzugleichen.
         Gibt den passenden Eintrag zurück oder None.
@@ -670,6 +779,9 @@ Ihr Bogdol-Team
         if not self.object_number or not self.project_number:
             return None
         
+        if prefetched is not None:
+            return prefetched.checklist_items.get((self.object_number, self.project_number))
+        
         try:
             checklist_item = RecurringWorkOrderChecklist.objects.get(
                 object_number=self.object_number,
@@ -688,6 +800,84 @@ Ihr Bogdol-Team
             ).order_by('-created_at').first()
 
 
+class WorkOrderListPrefetch:
+    """
+    Vorab aufgelöste Daten für eine Seite Arbeitsscheine
+    
+    Statt pro Zeile Haklisten-Abgleich, FakturaAssignment + Absence und
+    Scope-Prüfung abzufragen, wird alles mit wenigen Bulk-Queries geladen:
+    - Haklisten-Einträge nach (object_number, project_number)
+    - aktive Faktura-Zuweisungen der Einreicher
+    - heutige genehmigte Abwesenheiten der Faktura-MAs (inkl. Vertretung)
+    - Permission-Kontext des Users (Storno-Scope, Abteilungen, Zuweisungen)
+    
+    Wird den Model-Methoden als `prefetched` übergeben.
+    """
+    
+    def __init__(self, workorders, user=None):
+        self.user = user
+        self.checklist_items = self._load_checklist_items(workorders)
+        self.billing_users = self._load_billing_users(workorders)
+        self._permission_context = None
+    
+    @property
+    def permission_context(self):
+        """Permission-Kontext des Users (lazy, im Request geteilt)"""
+        if self._permission_context is None:
+            from auth_user.permission_context import get_permission_context
+            self._permission_context = get_permission_context(self.user)
+        return self._permission_context
+    
+    @staticmethod
+    def _load_checklist_items(workorders):
+        """{(object_number, project_number): neuester aktiver Haklisten-Eintrag}"""
+        return RecurringWorkOrderChecklist.match_many(
+            (wo.object_number, wo.project_number) for wo in workorders
+        )
+    
+    @staticmethod
+    def _load_billing_users(workorders):
+        """{submitted_by_id: zuständiger Faktura-MA bzw. dessen Vertretung}"""
+        submitter_ids = {wo.submitted_by_id for wo in workorders if wo.submitted_by_id}
+        if not submitter_ids:
+            return {}
+        
+        from auth_user.profile_models import FakturaAssignment
+        from absences.models import Absence
+        
+        # Erste aktive Zuweisung pro Einreicher (wie .first() ohne Ordering → pk)
+        processors = {}
+        assignments = FakturaAssignment.objects.filter(
+            employee_id__in=submitter_ids,
+            is_active=True
+        ).select_related('faktura_processor').order_by('pk')
+        for assignment in assignments:
+            processors.setdefault(assignment.employee_id, assignment.faktura_processor)
+        
+        if not processors:
+            return {}
+        
+        # Heutige genehmigte Abwesenheiten der Faktura-MAs (Default-Ordering wie .first())
+        today = timezone.now().date()
+        absences = {}
+        for absence in Absence.objects.filter(
+            user_id__in={processor.id for processor in processors.values()},
+            start_date__lte=today,
+            end_date__gte=today,
+            status='approved'
+        ).select_related('representative'):
+            absences.setdefault(absence.user_id, absence)
+        
+        billing_users = {}
+        for submitter_id, processor in processors.items():
+            absence = absences.get(processor.id)
+            # Falls abwesend UND Vertretung vorhanden → Vertretung
+            billing_users[submitter_id] = (
+                absence.representative if absence and absence.representative else processor
+            )
+        return billing_users
+
+
 class RecurringWorkOrderChecklist(models.Model):
     """
     Hakliste für wiederkehrende Arbeitsscheine.
@@ -820,6 +1010,34 @@ class RecurringWorkOrderChecklist(models.Model):
         self.last_checked_by = user
         self.save()
     
+    @classmethod
+    def match_many(cls, keys):
+        """
+        Bulk-Variante von WorkOrder.match_checklist_item()
+        
+        Args:
+            keys: Iterable von (object_number, project_number)
+        
+        Returns:
+            dict: {(object_number, project_number): neuester aktiver Eintrag}
+        """
+        keys = {(o, p) for o, p in keys if o and p}
+        if not keys:
+            return {}
+        
+        candidates = cls.objects.filter(
+            object_number__in={o for o, _ in keys},
+            project_number__in={p for _, p in keys},
+            is_active=True
+        ).select_related('service_manager', 'assigned_billing_user').order_by('created_at')
+        
+        # Aufsteigend sortiert → bei Mehrfachtreffern gewinnt der neueste
+        return {
+            (item.object_number, item.project_number): item
+            for item in candidates
+            if (item.object_number, item.project_number) in keys
+        }
+    
     @classmethod
     def get_items_for_sr_number(cls, sr_number, month=None):
         """Gibt alle Haklisten-Einträge für eine SR-Nummer zurück"""
@@ -832,3 +1050,56 @@ class RecurringWorkOrderChecklist(models.Model):
             is_active=True,
             current_month=month
         )
+
+
+class WorkOrderSubmitBatch(models.Model):
+    """
+    Gestaffelter Scan-Upload (bulk_submit im async-Modus)
+    
+    Die Dateien liegen bereits im Storage (workorders/scans/), die
+    Verarbeitung übernimmt der Celery-Task process_bulk_submit_batch und
+    meldet den Fortschritt pro Datei über den Notifications-WebSocket.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Wartend'),
+        ('processing', 'In Verarbeitung'),
+        ('completed', 'Abgeschlossen'),
+        ('failed', 'Fehlgeschlagen'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submitted_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='workorder_submit_batches',
+        verbose_name='Eingereicht von'
+    )
+    client = models.ForeignKey(
+        WorkOrderClient,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Kunde'
+    )
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    # [{'filename', 'path', 'size', 'object_number', 'project_number',
+    #   'leistungsmonat', 'leistungsmonat_confidence'}]
+    items = models.JSONField('Dateien', default=list)
+    total_files = models.PositiveIntegerField('Anzahl Dateien', default=0)
+    processed_files = models.PositiveIntegerField('Verarbeitet', default=0)
+    
+    # Gleiche Struktur wie die synchrone bulk_submit-Antwort
+    created_orders = models.JSONField('Erstellte Arbeitsscheine', default=list)
+    errors = models.JSONField('Fehler', default=list)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField('Abgeschlossen am', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Scan-Upload-Batch'
+        verbose_name_plural = 'Scan-Upload-Batches'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Batch {self.id} ({self.processed_files}/{self.total_files}, {self.status})"
@@ -0,0 +1,162 @@
+"""
+PDF-Merge für Sammelrechnungen (SR)
+
+Das Ergebnis wird über eine SpooledTemporaryFile (ab MERGE_SPOOL_MAX_MEMORY
+auf Platte) in den Storage geschrieben und von dort als FileResponse
+gestreamt - der zusammengeführte Inhalt liegt nie komplett als bytes im
+Request-Prozess.
+
+Merges werden unter einem Schlüssel aus den sortierten Arbeitsschein-IDs und
+den mtimes der Scans abgelegt: gleiche Auswahl + unveränderte Dateien → Treffer.
+Große Auswahlen können im Celery-Task merge_workorder_pdfs laufen.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+MERGED_PDF_DIR = 'workorders/merged/'
+
+# Bis zu dieser Größe bleibt das Merge-Ergebnis im Speicher, danach Temp-Datei
+MERGE_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# Ab so vielen Scans läuft der Merge (auf Wunsch) im Hintergrund
+PDF_MERGE_ASYNC_THRESHOLD = 50
+
+# Gecachte Merges werden nach einem Tag aufgeräumt (cleanup_merged_pdfs)
+MERGED_PDF_MAX_AGE = 24 * 3600
+
+# Status eines Hintergrund-Merges: {'status', 'workorder_ids', 'requesters', 'name', 'error'}
+# requesters: {user_id: filename} - alle User, die diese Auswahl angefordert haben
+MERGE_STATUS_CACHE_KEY = 'workorder_pdf_merge_{}'
+MERGE_STATUS_TIMEOUT = MERGED_PDF_MAX_AGE
+
+
+def collect_documents(workorders):
+    """
+    Sammelt die Scan-Dateien in Reihenfolge des QuerySets
+
+    Returns:
+        list: [(workorder_id, path, mtime_ns)] - fehlende Dateien werden übersprungen
+    """
+    documents = []
+    for workorder_id, name in workorders.exclude(
+        scanned_document=''
+    ).exclude(scanned_document__isnull=True).values_list('id', 'scanned_document'):
+        path = default_storage.path(name)
+        try:
+            documents.append((workorder_id, path, os.stat(path).st_mtime_ns))
+        except OSError:
+            logger.warning(f"⚠️ Scan für Arbeitsschein {workorder_id} fehlt: {name}")
+    return documents
+
+
+def merge_key(documents):
+    """Cache-Schlüssel aus sortierten Arbeitsschein-IDs und Datei-mtimes"""
+    parts = sorted(f'{workorder_id}:{mtime}' for workorder_id, _, mtime in documents)
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def merged_pdf_name(key):
+    return f'{MERGED_PDF_DIR}{key}.pdf'
+
+
+def get_cached_merge(key):
+    """Storage-Name des fertigen Merges oder None"""
+    name = merged_pdf_name(key)
+    return name if default_storage.exists(name) else None
+
+
+def build_merged_pdf(documents, key):
+    """
+    Führt die Scans zusammen und legt das Ergebnis im Storage ab
+
+    Returns:
+        str: Storage-Name des Merges
+    """
+    from PyPDF2 import PdfMerger
+
+    merger = PdfMerger()
+    with tempfile.SpooledTemporaryFile(max_size=MERGE_SPOOL_MAX_MEMORY) as spool:
+        try:
+            for _, path, _ in documents:
+                merger.append(path)
+            merger.write(spool)
+        finally:
+            merger.close()
+
+        # Paralleler Request war schneller
+        existing = get_cached_merge(key)
+        if existing:
+            return existing
+
+        spool.seek(0)
+        return default_storage.save(merged_pdf_name(key), File(spool, name=f'{key}.pdf'))
+
+
+def get_or_build_merged_pdf(documents):
+    """Merge aus dem Cache oder neu bauen → (key, Storage-Name)"""
+    key = merge_key(documents)
+    name = get_cached_merge(key)
+    if name is None:
+        start = time.perf_counter()
+        name = build_merged_pdf(documents, key)
+        logger.info(
+            f"📄 {len(documents)} Scans zusammengeführt in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+    return key, name
+
+
+def get_merge_status(key):
+    return cache.get(MERGE_STATUS_CACHE_KEY.format(key))
+
+
+def set_merge_status(key, **status):
+    cache.set(MERGE_STATUS_CACHE_KEY.format(key), status, MERGE_STATUS_TIMEOUT)
+
+
+def update_merge_status(key, **changes):
+    """
+    Liest den Status neu und überschreibt nur `changes` - Requester, die sich
+    während des Merges eingetragen haben, bleiben erhalten
+
+    Returns:
+        dict: der neue Status
+    """
+    merge_status = {**(get_merge_status(key) or {}), **changes}
+    set_merge_status(key, **merge_status)
+    return merge_status
+
+
+def add_merge_requester(key, user_id, filename):
+    """Trägt einen weiteren User für einen laufenden Merge ein"""
+    requesters = dict((get_merge_status(key) or {}).get('requesters') or {})
+    requesters[user_id] = filename
+    update_merge_status(key, requesters=requesters)
+
+
+def cleanup_merged_pdfs(max_age=MERGED_PDF_MAX_AGE):
+    """Löscht gecachte Merges, die älter als max_age Sekunden sind → Anzahl"""
+    try:
+        _, filenames = default_storage.listdir(MERGED_PDF_DIR)
+    except FileNotFoundError:
+        return 0
+
+    cutoff = time.time() - max_age
+    deleted = 0
+    for filename in filenames:
+        name = f'{MERGED_PDF_DIR}{filename}'
+        try:
+            if os.path.getmtime(default_storage.path(name)) < cutoff:
+                default_storage.delete(name)
+                deleted += 1
+        except OSError:
+            continue
+    return deleted
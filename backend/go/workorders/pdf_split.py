@@ -0,0 +1,180 @@
+"""
+PDF-Split für mehrseitige Scans
+
+Seiten werden inhaltsadressiert abgelegt: temp_pdf_splits/<sha256>/page_<n>.pdf.
+Dieselbe Datei erneut hochgeladen → vorhandene Seiten werden wiederverwendet.
+Ein Split gilt erst als fertig, wenn manifest.json geschrieben ist; große
+Dokumente teilt der Celery-Task split_workorder_pdf mit Fortschrittsmeldung.
+Verzeichnisse ohne Zugriff seit SPLIT_MAX_AGE räumt cleanup_pdf_splits auf.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+SPLIT_DIR = 'temp_pdf_splits/'
+SPLIT_MANIFEST = 'manifest.json'
+SPLIT_SOURCE = 'source.pdf'
+
+# Ab so vielen Seiten läuft der Split (auf Wunsch) im Hintergrund
+SPLIT_ASYNC_PAGE_THRESHOLD = 20
+
+# Split-Verzeichnisse ohne Zugriff werden nach einem Tag entfernt
+SPLIT_MAX_AGE = 24 * 3600
+
+# Status eines Hintergrund-Splits: {'status', 'processed', 'page_count', 'user_id', 'error'}
+SPLIT_STATUS_CACHE_KEY = 'workorder_pdf_split_{}'
+SPLIT_STATUS_TIMEOUT = SPLIT_MAX_AGE
+
+
+def hash_upload(uploaded_file):
+    """SHA-256 des Uploads (chunkweise), Dateizeiger danach wieder am Anfang"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _split_name(digest, filename):
+    return f'{SPLIT_DIR}{digest}/{filename}'
+
+
+def get_split_result(digest):
+    """
+    Fertiger Split aus dem Cache-Verzeichnis oder None
+
+    Ein Treffer frischt die mtime des Manifests auf, damit genutzte
+    Splits nicht vom Cleanup entfernt werden.
+    """
+    manifest_name = _split_name(digest, SPLIT_MANIFEST)
+    if not default_storage.exists(manifest_name):
+        return None
+
+    with default_storage.open(manifest_name, 'rb') as manifest:
+        page_count = json.load(manifest)['page_count']
+
+    try:
+        os.utime(default_storage.path(manifest_name))
+    except (OSError, NotImplementedError):
+        pass
+
+    pages = []
+    for page_number in range(1, page_count + 1):
+        filename = f'page_{page_number}.pdf'
+        pages.append({
+            'page_number': page_number,
+            'url': default_storage.url(_split_name(digest, filename)),
+            'filename': filename
+        })
+    return {'split_id': digest, 'page_count': page_count, 'pages': pages}
+
+
+def split_pdf(source, digest, progress=None):
+    """
+    Teilt die PDF in Einzelseiten und schreibt zum Schluss das Manifest
+
+    Args:
+        source: Dateiobjekt oder Pfad der PDF
+        digest: Content-Hash (Verzeichnisname)
+        progress: Optional callback(processed, page_count)
+
+    Returns:
+        dict: wie get_split_result()
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    reader = PdfReader(source)
+    page_count = len(reader.pages)
+
+    for page_index in range(page_count):
+        writer = PdfWriter()
+        writer.add_page(reader.pages[page_index])
+
+        output_buffer = io.BytesIO()
+        writer.write(output_buffer)
+
+        # Feste Namen pro Hash → Überschreiben statt Umbenennen durch den Storage
+        name = _split_name(digest, f'page_{page_index + 1}.pdf')
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(output_buffer.getvalue()))
+
+        if progress:
+            progress(page_index + 1, page_count)
+
+    manifest_name = _split_name(digest, SPLIT_MANIFEST)
+    if default_storage.exists(manifest_name):
+        default_storage.delete(manifest_name)
+    default_storage.save(manifest_name, ContentFile(json.dumps({'page_count': page_count}).encode()))
+
+    return get_split_result(digest)
+
+
+def split_source_name(digest):
+    """Storage-Name des Uploads für den Hintergrund-Split"""
+    return _split_name(digest, SPLIT_SOURCE)
+
+
+def store_source(uploaded_file, digest):
+    """Legt den Upload für den Hintergrund-Split ab → Storage-Name"""
+    name = split_source_name(digest)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, uploaded_file)
+    return name
+
+
+def get_split_status(digest):
+    return cache.get(SPLIT_STATUS_CACHE_KEY.format(digest))
+
+
+def set_split_status(digest, **status):
+    cache.set(SPLIT_STATUS_CACHE_KEY.format(digest), status, SPLIT_STATUS_TIMEOUT)
+
+
+def cleanup_pdf_splits(max_age=SPLIT_MAX_AGE):
+    """
+    Entfernt Split-Verzeichnisse, deren neueste Datei älter als max_age ist
+
+    Erfasst auch die alten Verzeichnisse pro User (temp_pdf_splits/<user_id>/).
+
+    Returns:
+        int: Anzahl entfernter Verzeichnisse
+    """
+    try:
+        directories, _ = default_storage.listdir(SPLIT_DIR)
+    except FileNotFoundError:
+        return 0
+
+    cutoff = time.time() - max_age
+    removed = 0
+    for directory in directories:
+        prefix = f'{SPLIT_DIR}{directory}/'
+        _, filenames = default_storage.listdir(prefix)
+        try:
+            newest = max(
+                (os.path.getmtime(default_storage.path(prefix + filename)) for filename in filenames),
+                default=0
+            )
+        except OSError:
+            continue
+        if newest >= cutoff:
+            continue
+
+        for filename in filenames:
+            default_storage.delete(prefix + filename)
+        try:
+            os.rmdir(default_storage.path(prefix))
+        except OSError:
+            pass
+        removed += 1
+
+    return removed
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import models
 from .models import (
     WorkOrderClient, WorkObject, WorkOrder, WorkOrderTemplate,
-    RecurringWorkOrderChecklist
+    RecurringWorkOrderChecklist, WorkOrderListPrefetch
 )
 from .history_models import WorkOrderHistory
 from auth_user.profile_models import WorkorderAssignment, Specialty
@@ -93,6 +94,26 @@ class CreateFromTemplateSerializer(serializers.Serializer):
         return data
 
 
+class WorkOrderListSerializer(serializers.ListSerializer):
+    """
+    Listen-Serialisierung für Arbeitsscheine
+    
+    Löst Haklisten-Abgleich, Faktura-Zuständigkeit und Storno-Scope für die
+    ganze Seite mit wenigen Bulk-Queries auf und reicht sie über den
+    Serializer-Context ('workorder_prefetch') an die einzelnen Zeilen weiter.
+    """
+    
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        workorders = list(iterable)
+        
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        self.context['workorder_prefetch'] = WorkOrderListPrefetch(workorders, user)
+        
+        return super().to_representation(workorders)
+
+
 class WorkOrderSerializer(serializers.ModelSerializer):
     """Serializer für Arbeitsscheine"""
     client_name = serializers.CharField(source='client.name', read_only=True)
@@ -125,7 +146,7 @@ class WorkOrderSerializer(serializers.ModelSerializer):
     
     def get_checklist_match(self, obj):
         """Gibt den passenden Haklisten-Eintrag zurück"""
-        match = obj.match_checklist_item()
+        match = obj.match_checklist_item(self.context.get('workorder_prefetch'))
         if match:
             return {
                 'id': match.id,
@@ -145,7 +166,7 @@ class WorkOrderSerializer(serializers.ModelSerializer):
     
     def get_responsible_billing_user(self, obj):
         """Gibt den zuständigen Faktura-Mitarbeiter zurück (inkl. Vertretung)"""
-        responsible = obj.get_responsible_billing_user()
+        responsible = obj.get_responsible_billing_user(self.context.get('workorder_prefetch'))
         if responsible:
             return UserMiniSerializer(responsible).data
         return None
@@ -154,18 +175,19 @@ class WorkOrderSerializer(serializers.ModelSerializer):
         """Prüft ob der aktuelle User den Schein abrechnen darf"""
         request = self.context.get('request')
         if request and request.user:
-            return obj.can_mark_billed(request.user)
+            return obj.can_mark_billed(request.user, self.context.get('workorder_prefetch'))
         return False
     
     def get_can_cancel(self, obj):
         """Prüft ob der aktuelle User den Schein stornieren darf"""
         request = self.context.get('request')
         if request and request.user:
-            return obj.can_cancel(request.user)
+            return obj.can_cancel(request.user, self.context.get('workorder_prefetch'))
         return False
     
     class Meta:
         model = WorkOrder
+        list_serializer_class = WorkOrderListSerializer
         fields = [
             'id', 'order_number', 'object_number', 'project_number', 'template',
             'client', 'client_name', 'client_details',
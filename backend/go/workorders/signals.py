@@ -0,0 +1,52 @@
+"""
+Signals für Arbeitsscheine
+Badge-Zähler (eingereichte Arbeitsscheine) bei Statuswechsel anpassen
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import WorkOrder
+
+BADGE_STATUS = 'submitted'
+
+
+@receiver(pre_save, sender=WorkOrder)
+def remember_workorder_status(sender, instance, update_fields=None, **kwargs):
+    """Merkt sich den gespeicherten Status für den Badge-Abgleich"""
+    instance._badge_previous_status = None
+    if instance.pk is None:
+        return
+    
+    if update_fields is not None and 'status' not in update_fields:
+        # Status wird nicht gespeichert → unverändert, keine Query nötig
+        instance._badge_previous_status = instance.status
+        return
+    
+    instance._badge_previous_status = WorkOrder.objects.filter(pk=instance.pk).values_list(
+        'status', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=WorkOrder)
+def update_badges_on_status_change(sender, instance, created, **kwargs):
+    """Wechsel in/aus 'submitted' → Arbeitsschein-Badges anpassen"""
+    from auth_user.badge_helpers import queue_workorder_badge_update
+    
+    was_submitted = not created and getattr(instance, '_badge_previous_status', None) == BADGE_STATUS
+    is_submitted = instance.status == BADGE_STATUS
+    if was_submitted == is_submitted:
+        return
+    
+    if is_submitted:
+        queue_workorder_badge_update(entered=[instance])
+    else:
+        queue_workorder_badge_update(left=[instance])
+
+
+@receiver(post_delete, sender=WorkOrder)
+def update_badges_on_delete(sender, instance, **kwargs):
+    """Gelöschter eingereichter Arbeitsschein → Badges anpassen (Ersteller ist bekannt)"""
+    if instance.status != BADGE_STATUS:
+        return
+    
+    from auth_user.badge_helpers import queue_workorder_badge_update
+    queue_workorder_badge_update(left=[instance])
@@ -1,11 +1,22 @@
 from celery import shared_task
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 from datetime import datetime, date
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _valid_checklist_q(today):
+    """Gültigkeitszeitraum der Haklisten-Einträge als Q (leere Grenzen = offen)"""
+    return (
+        (Q(valid_from__isnull=True) | Q(valid_from__lte=today)) &
+        (Q(valid_until__isnull=True) | Q(valid_until__gte=today))
+    )
+
+
 @shared_task
 def reset_monthly_checklist():
     """
@@ -15,48 +26,47 @@ def reset_monthly_checklist():
     - Aktualisiert current_month auf den neuen Monat
     - Fügt neue gültige Einträge hinzu (die im Gültigkeitszeitraum liegen)
     - Entfernt Einträge die nicht mehr gültig sind
+    
+    Mengenbasiert: je ein UPDATE für Monatswechsel und Deaktivierung.
     """
     from .models import RecurringWorkOrderChecklist
     
-    current_month = timezone.now().strftime('%Y-%m')
+    start = time.perf_counter()
+    now = timezone.now()
+    current_month = now.strftime('%Y-%m')
     today = date.today()
     
     logger.info(f"Starte monatliches Zurücksetzen der Hakliste für {current_month}")
     
-    # Hole alle aktiven Einträge
-    all_items = RecurringWorkOrderChecklist.objects.filter(is_active=True)
+    active_items = RecurringWorkOrderChecklist.objects.filter(is_active=True)
+    valid = _valid_checklist_q(today)
     
-    reset_count = 0
-    added_count = 0
-    removed_count = 0
-    
-    # Prüfe welche Einträge gültig sind für diesen Monat
-    for item in all_items:
-        # Prüfe Gültigkeitszeitraum
-        is_valid = True
-        if item.valid_from and item.valid_from > today:
-            is_valid = False
-        if item.valid_until and item.valid_until < today:
-            is_valid = False
+    with transaction.atomic():
+        # Gültige Einträge auf den neuen Monat setzen
+        reset_count = active_items.filter(valid).exclude(
+            current_month=current_month
+        ).update(
+            current_month=current_month,
+            checked_this_month=False,
+            updated_at=now
+        )
         
-        if is_valid:
-            # Eintrag ist gültig - aktualisiere für neuen Monat
-            if item.current_month != current_month:
-                item.current_month = current_month
-                item.checked_this_month = False
-                item.save()
-                reset_count += 1
-        else:
-            # Eintrag nicht mehr gültig - entferne aus aktueller Hakliste
-            if item.current_month == current_month or not item.current_month:
-                # Deaktiviere statt zu löschen (für Historie)
-                item.is_active = False
-                item.save()
-                removed_count += 1
+        # Nicht mehr gültige Einträge deaktivieren statt löschen (für Historie);
+        # leerer current_month wird wie beim save() auf den aktuellen Monat gesetzt
+        removed_count = active_items.exclude(valid).filter(
+            Q(current_month=current_month) | Q(current_month='')
+        ).update(
+            is_active=False,
+            current_month=current_month,
+            updated_at=now
+        )
+    
+    added_count = 0
+    duration_ms = round((time.perf_counter() - start) * 1000)
     
     logger.info(
         f"Haklisten-Reset abgeschlossen: {reset_count} zurückgesetzt, "
-        f"{added_count} hinzugefügt, {removed_count} entfernt"
+        f"{added_count} hinzugefügt, {removed_count} entfernt ({duration_ms} ms)"
     )
     
     return {
@@ -64,7 +74,8 @@ def reset_monthly_checklist():
         'reset_count': reset_count,
         'added_count': added_count,
         'removed_count': removed_count,
-        'month': current_month
+        'month': current_month,
+        'duration_ms': duration_ms
     }
 
 
@@ -75,69 +86,60 @@ def sync_checklist_items():
     - Kopiert gültige Stammdaten in den aktuellen Monat
     - Prüft automatisch ob passende Arbeitsscheine existieren
     - Hakt automatisch ab wenn Arbeitsscheine gefunden werden
+    
+    Mengenbasiert: Monatswechsel per UPDATE, Abgleich per Exists-Subquery
+    gegen WorkOrder (object_number, project_number, leistungsmonat).
     """
     from .models import RecurringWorkOrderChecklist, WorkOrder
     
-    current_month = timezone.now().strftime('%Y-%m')
+    start = time.perf_counter()
+    now = timezone.now()
+    current_month = now.strftime('%Y-%m')
     today = date.today()
-    current_year = today.year
-    current_month_num = today.month
     
     logger.info(f"Starte Haklisten-Synchronisation für {current_month}")
     
-    # Hole alle aktiven Stammdaten die gültig sind
     active_items = RecurringWorkOrderChecklist.objects.filter(is_active=True)
+    valid = _valid_checklist_q(today)
     
-    updated_count = 0
-    auto_checked_count = 0
-    skipped_count = 0
-    
-    for item in active_items:
-        # Prüfe Gültigkeitszeitraum
-        is_valid = True
-        if item.valid_from and item.valid_from > today:
-            is_valid = False
-        if item.valid_until and item.valid_until < today:
-            is_valid = False
-        
-        if not is_valid:
-            skipped_count += 1
-            continue
+    # Eingereichte oder abgerechnete Arbeitsscheine des Leistungsmonats
+    matching_workorders = WorkOrder.objects.filter(
+        object_number=OuterRef('object_number'),
+        project_number=OuterRef('project_number'),
+        leistungsmonat=current_month,
+        status__in=['submitted', 'billed']
+    )
+    
+    with transaction.atomic():
+        skipped_count = active_items.exclude(valid).count()
         
-        # Aktualisiere current_month wenn nicht gesetzt oder veraltet
-        needs_update = False
-        if item.current_month != current_month:
-            item.current_month = current_month
-            item.checked_this_month = False
-            needs_update = True
-            updated_count += 1
+        # current_month aktualisieren wenn nicht gesetzt oder veraltet
+        updated_count = active_items.filter(valid).exclude(
+            current_month=current_month
+        ).update(
+            current_month=current_month,
+            checked_this_month=False,
+            updated_at=now
+        )
         
         # Automatischer Abgleich mit WorkOrders
-        if not item.checked_this_month:
-            # Match gegen leistungsmonat (Format: YYYY-MM)
-            matching_workorders = WorkOrder.objects.filter(
-                object_number=item.object_number,
-                project_number=item.project_number,
-                leistungsmonat=current_month,  # Match gegen current_month statt start_date
-                status__in=['submitted', 'billed']  # Eingereichte oder abgerechnete
-            )
-            
-            if matching_workorders.exists():
-                item.checked_this_month = True
-                item.last_checked_at = timezone.now()
-                needs_update = True
-                auto_checked_count += 1
-                logger.info(
-                    f"Automatisch abgehakt: {item.object_number}/{item.project_number} "
-                    f"({matching_workorders.count()} abgerechnete Arbeitsscheine gefunden)"
-                )
-        
-        if needs_update:
-            item.save()
+        auto_checked_count = active_items.filter(
+            valid,
+            checked_this_month=False
+        ).filter(
+            Exists(matching_workorders)
+        ).update(
+            checked_this_month=True,
+            last_checked_at=now,
+            updated_at=now
+        )
+    
+    duration_ms = round((time.perf_counter() - start) * 1000)
     
     logger.info(
         f"Synchronisation abgeschlossen: {updated_count} aktualisiert, "
-        f"{auto_checked_count} automatisch abgehakt, {skipped_count} übersprungen"
+        f"{auto_checked_count} automatisch abgehakt, {skipped_count} übersprungen "
+        f"({duration_ms} ms)"
     )
     
     return {
@@ -145,7 +147,8 @@ def sync_checklist_items():
         'updated_count': updated_count,
         'auto_checked_count': auto_checked_count,
         'skipped_count': skipped_count,
-        'month': current_month
+        'month': current_month,
+        'duration_ms': duration_ms
     }
 
 
@@ -171,3 +174,468 @@ def cleanup_old_checklist_items():
         'status': 'success',
         'deleted': updated_count
     }
+
+
+# ============================================================================
+# SCAN-UPLOAD (bulk_submit im async-Modus)
+# ============================================================================
+
+# Dateien pro Transaktion (ein Nummernblock + je ein bulk_create für Orders/History)
+BULK_SUBMIT_CHUNK_SIZE = 50
+
+
+def send_workorder_event(user_id, event_type, payload):
+    """Sendet ein Arbeitsschein-Event (Batch, PDF-Merge) über den Notifications-WebSocket des Users"""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'notifications_{user_id}',
+            {'type': event_type, 'payload': payload}
+        )
+    except Exception as e:
+        logger.error(f"❌ Fehler beim Senden von {event_type}: {e}")
+
+
+def _create_scan_orders(batch, items, year, lookups):
+    """
+    Legt Arbeitsscheine + History für eingereichte Scans per bulk_create an
+    
+    Muss in einer Transaktion laufen: der Nummernblock bleibt bis zum Commit
+    reserviert, ein Rollback gibt ihn wieder frei.
+    
+    Returns:
+        list: Einträge für created_orders (Reihenfolge wie items)
+    """
+    from .history_models import WorkOrderHistory
+    from .models import OrderNumberSequence, WorkOrder
+    
+    now = timezone.now()
+    today = now.date()
+    user = batch.submitted_by
+    order_numbers = OrderNumberSequence.reserve(len(items), year=year)
+    
+    orders = []
+    for item, order_number in zip(items, order_numbers):
+        order = WorkOrder(
+            order_number=order_number,
+            object_number=item['object_number'],
+            project_number=item['project_number'],
+            content_hash=item['content_hash'],
+            leistungsmonat=item.get('leistungsmonat'),
+            leistungsmonat_ocr_confidence=item.get('leistungsmonat_confidence'),
+            status='submitted',
+            scanned_document=item['path'],
+            submitted_at=now,
+            submitted_by=user,
+            client_id=batch.client_id,
+            start_date=today,
+            end_date=today,
+            work_days=1,
+            work_type='Scan-Upload',
+            work_description='Gescannter Arbeitsschein',
+            created_by=user
+        )
+        # Duplikat-Markierung wie check_for_duplicates() (ohne zweites save)
+        duplicates = lookups['duplicates'].get((item['object_number'], item['project_number']))
+        if duplicates:
+            order.is_duplicate = True
+            order.duplicate_of_id = duplicates['original_id']
+            order.duplicate_checked_at = now
+        order.apply_save_defaults()
+        orders.append(order)
+    
+    WorkOrder.objects.bulk_create(orders)
+    
+    results = []
+    histories = []
+    for item, order in zip(items, orders):
+        key = (item['object_number'], item['project_number'])
+        checklist_match = lookups['checklist'].get(key)
+        duplicates = lookups['duplicates'].get(key)
+        
+        histories.append(WorkOrderHistory(
+            work_order=order,
+            action='submitted',
+            performed_by=user,
+            new_status='submitted',
+            notes=f"Arbeitsschein via Scan eingereicht ({item['filename']})",
+            metadata={
+                'filename': item['filename'],
+                'size': item['size'],
+                'is_duplicate': order.is_duplicate,
+                'checklist_matched': checklist_match is not None,
+                'batch_id': str(batch.id)
+            }
+        ))
+        results.append({
+            'id': order.id,
+            'order_number': order.order_number,
+            'filename': item['filename'],
+            'optimized_filename': order.get_optimized_filename(),
+            'duplicate_info': {
+                'is_duplicate': True,
+                'count': duplicates['count'],
+                'original': duplicates['latest_order_number']
+            } if duplicates else None,
+            'checklist_info': {
+                'matched': True,
+                'sr_number': checklist_match.sr_invoice_number,
+                'notes': checklist_match.notes
+            } if checklist_match else None
+        })
+    
+    WorkOrderHistory.objects.bulk_create(histories)
+    
+    # bulk_create löst keine Signals aus → Badge-Zähler direkt anpassen
+    from auth_user.badge_helpers import queue_workorder_badge_update
+    queue_workorder_badge_update(entered=orders)
+    return results
+
+
+def _load_bulk_submit_lookups(items, today):
+    """
+    Lädt alle Vergleichsdaten eines Batches mit drei Queries
+    
+    - existierende Content-Hashes (neuester Arbeitsschein pro Hash)
+    - Haklisten-Einträge nach (O-Nr, P-Nr)
+    - Duplikate im Sinne von check_for_duplicates() (gleiche O/P-Nr, heutiger Zeitraum)
+    """
+    from .models import RecurringWorkOrderChecklist, WorkOrder
+    
+    keys = {(item['object_number'], item['project_number']) for item in items}
+    
+    hashes = {}
+    for content_hash, order_number in WorkOrder.objects.filter(
+        content_hash__in={item['content_hash'] for item in items}
+    ).order_by('created_at').values_list('content_hash', 'order_number'):
+        hashes[content_hash] = order_number
+    
+    duplicates = {}
+    valid_keys = {(o, p) for o, p in keys if o and p}
+    if valid_keys:
+        for order_id, o, p, order_number in WorkOrder.objects.filter(
+            object_number__in={o for o, _ in valid_keys},
+            project_number__in={p for _, p in valid_keys},
+            start_date=today,
+            end_date=today
+        ).order_by('created_at').values_list('id', 'object_number', 'project_number', 'order_number'):
+            if (o, p) not in valid_keys:
+                continue
+            entry = duplicates.setdefault((o, p), {'original_id': order_id, 'count': 0})
+            entry['count'] += 1
+            entry['latest_order_number'] = order_number
+    
+    return {
+        'hashes': hashes,
+        'checklist': RecurringWorkOrderChecklist.match_many(keys),
+        'duplicates': duplicates,
+    }
+
+
+@shared_task
+def process_bulk_submit_batch(batch_id):
+    """
+    Verarbeitet einen gestaffelten Scan-Upload
+    
+    - Vergleichsdaten (Hashes, Hakliste, Duplikate) werden einmal vorab geladen
+    - je BULK_SUBMIT_CHUNK_SIZE Dateien: ein Nummernblock, bulk_create für
+      Arbeitsscheine und History
+    - Fortschritt pro Datei über den Notifications-WebSocket
+      ('bulk_submit_progress', zum Schluss 'bulk_submit_completed')
+    """
+    from django.core.files.storage import default_storage
+    from .models import WorkOrder, WorkOrderSubmitBatch
+    
+    try:
+        batch = WorkOrderSubmitBatch.objects.select_related('submitted_by').get(pk=batch_id)
+    except WorkOrderSubmitBatch.DoesNotExist:
+        logger.warning(f"⚠️ Scan-Batch {batch_id} nicht gefunden")
+        return {'status': 'not_found'}
+    
+    # Doppelte Zustellung des Tasks → nur einmal verarbeiten
+    updated = WorkOrderSubmitBatch.objects.filter(pk=batch.pk, status='pending').update(status='processing')
+    if not updated:
+        return {'status': 'skipped', 'batch_status': batch.status}
+    
+    logger.info(f"📦 Verarbeite Scan-Batch {batch.id}: {batch.total_files} Dateien")
+    
+    year = timezone.now().year
+    items = batch.items
+    for item in items:
+        item['content_hash'] = WorkOrder.compute_content_hash(item['object_number'], item['project_number'])
+    
+    created_orders = []
+    errors = []
+    
+    def report(item, status, **extra):
+        send_workorder_event(batch.submitted_by_id, 'bulk_submit_progress', {
+            'batch_id': str(batch.id),
+            'filename': item['filename'],
+            'status': status,
+            'processed': len(created_orders) + len(errors),
+            'total': batch.total_files,
+            **extra
+        })
+    
+    try:
+        lookups = _load_bulk_submit_lookups(items, timezone.now().date())
+        
+        for start in range(0, len(items), BULK_SUBMIT_CHUNK_SIZE):
+            chunk = items[start:start + BULK_SUBMIT_CHUNK_SIZE]
+            
+            # Exakte Duplikate (Hash existiert bereits, auch innerhalb des Batches)
+            accepted = []
+            for item in chunk:
+                if item['content_hash'] in lookups['hashes']:
+                    # None = gleiche O/P-Nr bereits weiter vorne in diesem Block
+                    existing_order = lookups['hashes'][item['content_hash']]
+                    errors.append({
+                        'file': item['filename'],
+                        'error': f"Exaktes Duplikat erkannt: Identischer Arbeitsschein existiert bereits (AS-Nr: {existing_order or 'im selben Upload'}, Hash: {item['content_hash']})",
+                        'existing_order': existing_order,
+                        'content_hash': item['content_hash']
+                    })
+                    default_storage.delete(item['path'])
+                    report(item, 'duplicate', existing_order=existing_order)
+                    continue
+                lookups['hashes'][item['content_hash']] = None
+                accepted.append(item)
+            
+            if not accepted:
+                continue
+            
+            try:
+                with transaction.atomic():
+                    results = _create_scan_orders(batch, accepted, year, lookups)
+                outcomes = list(zip(accepted, results))
+            except Exception as e:
+                # Fehler im Block → einzeln wiederholen, um die fehlerhafte Datei zu isolieren
+                logger.warning(f"⚠️ Scan-Batch {batch.id}: Block fehlgeschlagen ({e}), verarbeite einzeln")
+                outcomes = []
+                for item in accepted:
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((item, _create_scan_orders(batch, [item], year, lookups)[0]))
+                    except Exception as item_error:
+                        outcomes.append((item, item_error))
+            
+            for item, result in outcomes:
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Scan {item['filename']} fehlgeschlagen: {result}")
+                    lookups['hashes'].pop(item['content_hash'], None)
+                    errors.append({'filename': item['filename'], 'error': str(result)})
+                    default_storage.delete(item['path'])
+                    report(item, 'error', error=str(result))
+                else:
+                    lookups['hashes'][item['content_hash']] = result['order_number']
+                    created_orders.append(result)
+                    report(item, 'created', order_number=result['order_number'])
+            
+            WorkOrderSubmitBatch.objects.filter(pk=batch.pk).update(
+                processed_files=len(created_orders) + len(errors)
+            )
+        
+        batch_status = 'completed'
+    except Exception as e:
+        logger.error(f"❌ Scan-Batch {batch.id} abgebrochen: {e}")
+        errors.append({'error': str(e)})
+        batch_status = 'failed'
+    
+    WorkOrderSubmitBatch.objects.filter(pk=batch.pk).update(
+        status=batch_status,
+        processed_files=len(created_orders) + len(errors),
+        created_orders=created_orders,
+        errors=errors,
+        finished_at=timezone.now()
+    )
+    
+    send_workorder_event(batch.submitted_by_id, 'bulk_submit_completed', {
+        'batch_id': str(batch.id),
+        'status': batch_status,
+        'message': f'{len(created_orders)} Arbeitsscheine zur Abrechnung eingereicht',
+        'created_count': len(created_orders),
+        'error_count': len(errors)
+    })
+    
+    logger.info(f"✅ Scan-Batch {batch.id}: {len(created_orders)} erstellt, {len(errors)} Fehler")
+    
+    return {
+        'status': batch_status,
+        'created': len(created_orders),
+        'errors': len(errors)
+    }
+
+
+# ============================================================================
+# PDF-MERGE (Sammelrechnungen)
+# ============================================================================
+
+@shared_task
+def merge_workorder_pdfs(key, workorder_ids):
+    """
+    Führt die Scans einer großen SR-Auswahl im Hintergrund zusammen
+    
+    Status liegt im Cache (pdf_merge.MERGE_STATUS_CACHE_KEY); bei Erfolg
+    bekommt jeder anfragende User ein 'pdf_merge_ready' über den
+    Notifications-WebSocket.
+    """
+    from .models import WorkOrder
+    from .pdf_merge import collect_documents, get_or_build_merged_pdf, update_merge_status
+    
+    try:
+        documents = collect_documents(WorkOrder.objects.filter(id__in=workorder_ids))
+        if not documents:
+            raise ValueError('Keine PDFs zum Zusammenführen gefunden')
+        # Dateien zwischenzeitlich geändert → Ergebnis trotzdem unter dem angefragten Key
+        _, name = get_or_build_merged_pdf(documents)
+        # Status neu lesen: während des Merges eingetragene Requester mit benachrichtigen
+        status = update_merge_status(key, status='ready', name=name)
+    except Exception as e:
+        logger.error(f"❌ PDF-Merge {key[:12]} fehlgeschlagen: {e}")
+        status = update_merge_status(key, status='failed', error=str(e))
+        for user_id in status.get('requesters') or {}:
+            send_workorder_event(user_id, 'pdf_merge_ready', {
+                'merge_key': key, 'status': 'failed', 'error': str(e)
+            })
+        return {'status': 'failed', 'error': str(e)}
+    
+    for user_id, filename in (status.get('requesters') or {}).items():
+        send_workorder_event(user_id, 'pdf_merge_ready', {
+            'merge_key': key,
+            'status': 'ready',
+            'filename': filename,
+            'count': len(documents)
+        })
+    
+    return {'status': 'ready', 'count': len(documents)}
+
+
+@shared_task
+def cleanup_merged_pdfs():
+    """Entfernt gecachte SR-Merges, die älter als ein Tag sind"""
+    from .pdf_merge import cleanup_merged_pdfs as cleanup
+    
+    deleted = cleanup()
+    logger.info(f"🧹 {deleted} gecachte PDF-Merges entfernt")
+    return {'status': 'success', 'deleted': deleted}
+
+
+# ============================================================================
+# PDF-SPLIT
+# ============================================================================
+
+# Fortschritt nur alle N Seiten per WebSocket melden
+SPLIT_PROGRESS_EVERY = 5
+
+
+@shared_task
+def split_workorder_pdf(digest):
+    """
+    Teilt eine große hochgeladene PDF (temp_pdf_splits/<digest>/source.pdf)
+    
+    Fortschritt steht im Cache (pdf_split.SPLIT_STATUS_CACHE_KEY) und geht
+    als 'pdf_split_progress' über den Notifications-WebSocket; das Ergebnis
+    kommt als 'pdf_split_ready' bzw. über split_pdf_status/<digest>.
+    """
+    from django.core.files.storage import default_storage
+    from .pdf_split import get_split_status, set_split_status, split_pdf, split_source_name
+    
+    status = get_split_status(digest) or {}
+    user_id = status.get('user_id')
+    source_name = split_source_name(digest)
+    
+    def progress(processed, page_count):
+        set_split_status(digest, **{**status, 'status': 'processing', 'processed': processed, 'page_count': page_count})
+        if user_id and (processed % SPLIT_PROGRESS_EVERY == 0 or processed == page_count):
+            send_workorder_event(user_id, 'pdf_split_progress', {
+                'split_id': digest, 'processed': processed, 'page_count': page_count
+            })
+    
+    try:
+        with default_storage.open(source_name, 'rb') as source:
+            result = split_pdf(source, digest, progress=progress)
+        default_storage.delete(source_name)
+    except Exception as e:
+        logger.error(f"❌ PDF-Split {digest[:12]} fehlgeschlagen: {e}")
+        set_split_status(digest, **{**status, 'status': 'failed', 'error': str(e)})
+        if user_id:
+            send_workorder_event(user_id, 'pdf_split_ready', {
+                'split_id': digest, 'status': 'failed', 'error': str(e)
+            })
+        return {'status': 'failed', 'error': str(e)}
+    
+    set_split_status(digest, **{**status, 'status': 'ready', 'processed': result['page_count'], 'page_count': result['page_count']})
+    if user_id:
+        send_workorder_event(user_id, 'pdf_split_ready', {'status': 'ready', **result})
+    
+    return {'status': 'ready', 'page_count': result['page_count']}
+
+
+@shared_task
+def cleanup_pdf_splits():
+    """Entfernt Split-Verzeichnisse, die seit einem Tag nicht genutzt wurden"""
+    from .pdf_split import cleanup_pdf_splits as cleanup
+    
+    removed = cleanup()
+    logger.info(f"🧹 {removed} PDF-Split-Verzeichnisse entfernt")
+    return {'status': 'success', 'removed': removed}
+
+
+# ============================================================================
+# HAKLISTEN-IMPORT
+# ============================================================================
+
+@shared_task
+def import_checklist_items(job_id, items):
+    """
+    Speichert einen großen Haklisten-Import im Hintergrund
+    
+    Fortschritt pro Chunk im Cache (checklist_import.IMPORT_STATUS_CACHE_KEY)
+    und als 'checklist_import_progress' über den Notifications-WebSocket;
+    zum Schluss 'checklist_import_completed'.
+    """
+    from django.contrib.auth import get_user_model
+    from .checklist_import import get_import_status, set_import_status, upsert_checklist_items
+    
+    status = get_import_status(job_id) or {}
+    user_id = status.get('user_id')
+    user = get_user_model().objects.filter(id=user_id).first() if user_id else None
+    start = time.perf_counter()
+    
+    def progress(processed, total):
+        set_import_status(job_id, **{**status, 'status': 'processing', 'processed': processed, 'total': total})
+        if user_id:
+            send_workorder_event(user_id, 'checklist_import_progress', {
+                'job_id': job_id, 'processed': processed, 'total': total
+            })
+    
+    try:
+        result = upsert_checklist_items(items, user=user, progress=progress)
+    except Exception as e:
+        logger.error(f"❌ Haklisten-Import {job_id} fehlgeschlagen: {e}")
+        set_import_status(job_id, **{**status, 'status': 'failed', 'error': str(e)})
+        if user_id:
+            send_workorder_event(user_id, 'checklist_import_completed', {
+                'job_id': job_id, 'status': 'failed', 'error': str(e)
+            })
+        return {'status': 'failed', 'error': str(e)}
+    
+    duration_ms = round((time.perf_counter() - start) * 1000)
+    logger.info(
+        f"Haklisten-Import {job_id}: {result['created']} angelegt, {result['updated']} aktualisiert, "
+        f"{len(result['errors'])} Fehler ({duration_ms} ms)"
+    )
+    
+    set_import_status(job_id, **{**status, 'status': 'completed', 'processed': len(items), **result})
+    if user_id:
+        send_workorder_event(user_id, 'checklist_import_completed', {
+            'job_id': job_id, 'status': 'completed', **result
+        })
+    
+    return {'status': 'completed', 'created': result['created'], 'updated': result['updated'], 'duration_ms': duration_ms}
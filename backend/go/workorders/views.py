@@ -4,13 +4,13 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from django_filters import CharFilter, MultipleChoiceFilter
+from django.db import transaction
 from django.utils import timezone
-import hashlib
-import re
+import logging
 
 from .models import (
     WorkOrderClient, WorkObject, WorkOrder, WorkOrderTemplate,
-    RecurringWorkOrderChecklist
+    RecurringWorkOrderChecklist, OrderNumberSequence, WorkOrderSubmitBatch
 )
 from .history_models import WorkOrderHistory
 from .serializers import (
@@ -23,6 +23,8 @@ from .serializers import (
 from .permissions import CanManageWorkorderAssignments
 from auth_user.profile_models import WorkorderAssignment
 
+logger = logging.getLogger(__name__)
+
 
 class WorkOrderFilter(FilterSet):
     """Custom FilterSet für WorkOrders mit Multi-Status Support"""
@@ -154,16 +156,16 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         
         user = self.request.user
         
-        # Superuser/Staff sehen immer alles
-        if user.is_superuser or user.is_staff:
-            return WorkOrder.objects.select_related(
-                'client', 'work_object', 'assigned_to', 'created_by'
-            ).all()
-        
+        # Alle FKs, die der WorkOrderSerializer pro Zeile ausgibt
         base_queryset = WorkOrder.objects.select_related(
-            'client', 'work_object', 'assigned_to', 'created_by'
+            'client', 'work_object', 'assigned_to', 'created_by',
+            'submitted_by', 'reviewed_by', 'pdf_downloaded_by', 'duplicate_of'
         ).all()
         
+        # Superuser/Staff sehen immer alles
+        if user.is_superuser or user.is_staff:
+            return base_queryset
+        
         # Check if user wants to see all items (via query parameter)
         show_all = self.request.query_params.get('show_all', 'false').lower() == 'true'
         
@@ -175,7 +177,8 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         # Ansonsten: Scope-basierte Filterung
         return ScopeQuerySetMixin.filter_workorders_by_scope(
             base_queryset,
-            user
+            user,
+            perm_service
         )
     
     def destroy(self, request, *args, **kwargs):
@@ -277,10 +280,7 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
             )
         
         # Generiere Content-Hash (gleicher Algorithmus wie in bulk_submit)
-        o_normalized = re.sub(r'^[O0-]+', '', object_number.upper().strip())
-        p_normalized = re.sub(r'^[P0-]+', '', project_number.upper().strip())
-        hash_input = f"{o_normalized}_{p_normalized}"
-        content_hash = hashlib.md5(hash_input.encode()).hexdigest()[:12]
+        content_hash = WorkOrder.compute_content_hash(object_number, project_number)
         
         # Prüfe ob Duplikat existiert
         duplicate = WorkOrder.objects.filter(content_hash=content_hash).first()
@@ -304,10 +304,12 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         """
         Bulk-Upload von gescannten Arbeitsscheinen.
         Jede Datei wird ein separater WorkOrder-Eintrag mit Status 'submitted'.
-        """
-        print(f"DEBUG: request.FILES = {request.FILES}")
-        print(f"DEBUG: request.data = {request.data}")
         
+        Mit async=true werden die Dateien nur gespeichert und sofort eine
+        batch_id zurückgegeben (202); die Verarbeitung läuft im Celery-Task
+        process_bulk_submit_batch, Fortschritt kommt über den
+        Notifications-WebSocket bzw. bulk_submit_status.
+        """
         files = request.FILES.getlist('scanned_documents')
         
         # Hole individuelle O/P-Nummern und Leistungsmonate für jeden Scan
@@ -336,142 +338,92 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Hole individuelle O/P-Nummern und Leistungsmonat für jeden Scan
+        candidates = [
+            {
+                'file': file,
+                'object_number': object_numbers.get(idx, ''),
+                'project_number': project_numbers.get(idx, ''),
+                'leistungsmonat': leistungsmonate.get(idx, None),
+                'leistungsmonat_confidence': leistungsmonat_confidences.get(idx, None),
+            }
+            for idx, file in enumerate(files)
+        ]
+        
+        if str(request.data.get('async', '')).lower() in ('true', '1'):
+            return self._stage_bulk_submit(request, candidates)
+        
         created_orders = []
         errors = []
         
-        for idx, file in enumerate(files, 1):
-            try:
-                print(f"DEBUG: Processing file {idx}: {file.name}")
-                
-                # Hole individuelle O/P-Nummern und Leistungsmonat für diesen Scan
-                object_number = object_numbers.get(idx - 1, '')
-                project_number = project_numbers.get(idx - 1, '')
-                leistungsmonat = leistungsmonate.get(idx - 1, None)
-                leistungsmonat_confidence = leistungsmonat_confidences.get(idx - 1, None)
-                
-                # Generiere Content-Hash aus O-Nr, P-Nr (für Duplikat-Erkennung)
-                # Normalisiere die Werte: entferne führende 0, "O-", "P-", Leerzeichen
-                o_normalized = re.sub(r'^[O0-]+', '', object_number.upper().strip())
-                p_normalized = re.sub(r'^[P0-]+', '', project_number.upper().strip())
-                
-                # Hash-Input: O+P (ohne führende Nullen)
-                hash_input = f"{o_normalized}_{p_normalized}"
-                content_hash = hashlib.md5(hash_input.encode()).hexdigest()[:12]  # Erste 12 Zeichen
+        # Phase 1: Content-Hashes bilden und Duplikate gegen DB + Batch prüfen (1 Query)
+        for candidate in candidates:
+            candidate['content_hash'] = WorkOrder.compute_content_hash(
+                candidate['object_number'], candidate['project_number']
+            )
+        
+        # Neuester Arbeitsschein pro Hash (wie .first() mit Ordering -created_at)
+        existing_by_hash = {
+            order.content_hash: order.order_number
+            for order in WorkOrder.objects.filter(
+                content_hash__in={c['content_hash'] for c in candidates}
+            ).only('content_hash', 'order_number').order_by('created_at')
+        }
+        
+        accepted = []
+        for candidate in candidates:
+            content_hash = candidate['content_hash']
+            existing_order = existing_by_hash.get(content_hash)
+            if existing_order:
+                errors.append({
+                    'file': candidate['file'].name,
+                    'error': f'Exaktes Duplikat erkannt: Identischer Arbeitsschein existiert bereits (AS-Nr: {existing_order}, Hash: {content_hash})',
+                    'existing_order': existing_order,
+                    'content_hash': content_hash
+                })
+                continue  # Überspringe diesen Scan
+            accepted.append(candidate)
+        
+        # Phase 2: Nummernblock für den ganzen Batch reservieren (1 Roundtrip) und anlegen.
+        # Die Sequenz-Zeile bleibt bis zum Commit gesperrt; nicht verbrauchte Nummern
+        # (fehlgeschlagene Dateien) werden am Ende zurückgegeben → lückenlos.
+        year = timezone.now().year
+        with transaction.atomic():
+            order_numbers = OrderNumberSequence.reserve(len(accepted), year=year)
+            used = 0
+            
+            for candidate in accepted:
+                file = candidate['file']
+                content_hash = candidate['content_hash']
                 
-                print(f"DEBUG: Hash-Input='{hash_input}' -> Hash='{content_hash}'")
+                # Batch-internes Duplikat (gleiche O/P-Nummer zweimal hochgeladen)
+                batch_duplicate = existing_by_hash.get(content_hash)
+                if batch_duplicate:
+                    errors.append({
+                        'file': file.name,
+                        'error': f'Exaktes Duplikat erkannt: Identischer Arbeitsschein existiert bereits (AS-Nr: {batch_duplicate}, Hash: {content_hash})',
+                        'existing_order': batch_duplicate,
+                        'content_hash': content_hash
+                    })
+                    continue
                 
-                # Duplikatsprüfung: Prüfe ob Arbeitsschein mit identischem Hash bereits existiert
-                if content_hash:
-                    duplicate = WorkOrder.objects.filter(content_hash=content_hash).first()
+                try:
+                    with transaction.atomic():
+                        order_info = self._create_submitted_work_order(
+                            request, candidate, order_numbers[used]
+                        )
+                    used += 1
+                    existing_by_hash[content_hash] = order_info['order_number']
+                    created_orders.append(order_info)
                     
-                    if duplicate:
-                        error_msg = f'Exaktes Duplikat erkannt: Identischer Arbeitsschein existiert bereits (AS-Nr: {duplicate.order_number}, Hash: {content_hash})'
-                        print(f"DEBUG: {error_msg}")
-                        errors.append({
-                            'file': file.name,
-                            'error': error_msg,
-                            'existing_order': duplicate.order_number,
-                            'content_hash': content_hash
-                        })
-                        continue  # Überspringe diesen Scan
-                
-                # Generiere eindeutige Order Number
-                year = timezone.now().year
-                # Hole die höchste existierende Nummer für dieses Jahr
-                last_order = WorkOrder.objects.filter(
-                    order_number__startswith=f'AS-{year}'
-                ).order_by('-order_number').first()
-                
-                if last_order:
-                    # Extrahiere die Nummer aus dem letzten order_number (z.B. "AS-2026-0012" -> 12)
-                    last_num = int(last_order.order_number.split('-')[-1])
-                    count = last_num + 1
-                else:
-                    count = 1
-                
-                order_number = f'AS-{year}-{count:04d}'
-                
-                print(f"DEBUG: Creating WorkOrder {order_number} with O:{object_number}, P:{project_number}, Hash:{content_hash}")
-                
-                # Erstelle WorkOrder mit minimalen Daten
-                work_order = WorkOrder.objects.create(
-                    order_number=order_number,
-                    object_number=object_number,
-                    project_number=project_number,
-                    content_hash=content_hash,  # Hash speichern
-                    leistungsmonat=leistungsmonat,  # OCR-extrahierter Leistungsmonat
-                    leistungsmonat_ocr_confidence=leistungsmonat_confidence,  # OCR-Konfidenz
-                    status='submitted',
-                    scanned_document=file,
-                    submitted_at=timezone.now(),
-                    submitted_by=request.user,
-                    # Dummy-Werte (können später ergänzt werden)
-                    client_id=request.data.get('client_id') if request.data.get('client_id') else None,
-                    start_date=timezone.now().date(),
-                    end_date=timezone.now().date(),
-                    work_days=1,
-                    work_type=f'Scan-Upload',
-                    work_description='Gescannter Arbeitsschein',
-                    created_by=request.user
-                )
-                
-                print(f"DEBUG: WorkOrder created: {work_order.id}")
-                
-                # Duplikat-Check durchführen
-                duplicates = work_order.check_for_duplicates()
-                duplicate_info = None
-                if duplicates:
-                    duplicate_info = {
-                        'is_duplicate': True,
-                        'count': len(duplicates),
-                        'original': duplicates[0].order_number
-                    }
-                
-                # Haklisten-Abgleich
-                checklist_match = work_order.match_checklist_item()
-                checklist_info = None
-                if checklist_match:
-                    checklist_info = {
-                        'matched': True,
-                        'sr_number': checklist_match.sr_number,
-                        'notes': checklist_match.notes
-                    }
-                
-                # History-Eintrag
-                from .history_models import WorkOrderHistory
-                WorkOrderHistory.objects.create(
-                    work_order=work_order,
-                    action='submitted',
-                    performed_by=request.user,
-                    new_status='submitted',
-                    notes=f'Arbeitsschein via Scan eingereicht ({file.name})',
-                    metadata={
-                        'filename': file.name, 
-                        'size': file.size,
-                        'is_duplicate': work_order.is_duplicate,
-                        'checklist_matched': checklist_match is not None
-                    }
-                )
-                
-                print(f"DEBUG: History created for {work_order.id}")
-                
-                created_orders.append({
-                    'id': work_order.id,
-                    'order_number': work_order.order_number,
-                    'filename': file.name,
-                    'optimized_filename': work_order.get_optimized_filename(),
-                    'duplicate_info': duplicate_info,
-                    'checklist_info': checklist_info
-                })
-                
-            except Exception as e:
-                print(f"DEBUG: Error processing file {file.name}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                errors.append({
-                    'filename': file.name,
-                    'error': str(e)
-                })
+                except Exception as e:
+                    logger.exception(f"❌ Scan {file.name} fehlgeschlagen: {e}")
+                    errors.append({
+                        'filename': file.name,
+                        'error': str(e)
+                    })
+            
+            OrderNumberSequence.release(len(order_numbers) - used, year=year)
         
         return Response({
             'message': f'{len(created_orders)} Arbeitsscheine zur Abrechnung eingereicht',
@@ -479,6 +431,151 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
             'errors': errors
         }, status=status.HTTP_201_CREATED if created_orders else status.HTTP_400_BAD_REQUEST)
     
+    def _stage_bulk_submit(self, request, candidates):
+        """
+        Gestaffelter Upload: Dateien speichern, Batch anlegen, Task einreihen
+        
+        Die Dateien landen direkt am endgültigen Ort (upload_to von
+        scanned_document) und werden vom Task nur noch referenziert.
+        """
+        from django.core.files.storage import default_storage
+        from .tasks import process_bulk_submit_batch
+        
+        upload_field = WorkOrder._meta.get_field('scanned_document')
+        
+        items = []
+        for candidate in candidates:
+            file = candidate['file']
+            items.append({
+                'filename': file.name,
+                'path': default_storage.save(upload_field.generate_filename(None, file.name), file),
+                'size': file.size,
+                'object_number': candidate['object_number'],
+                'project_number': candidate['project_number'],
+                'leistungsmonat': candidate['leistungsmonat'],
+                'leistungsmonat_confidence': candidate['leistungsmonat_confidence'],
+            })
+        
+        client_id = request.data.get('client_id')
+        batch = WorkOrderSubmitBatch.objects.create(
+            submitted_by=request.user,
+            client=WorkOrderClient.objects.filter(pk=client_id).first() if client_id else None,
+            items=items,
+            total_files=len(items)
+        )
+        
+        transaction.on_commit(lambda: process_bulk_submit_batch.delay(str(batch.id)))
+        logger.info(f"📦 Scan-Batch {batch.id} angelegt ({len(items)} Dateien)")
+        
+        return Response({
+            'message': f'{len(items)} Arbeitsscheine werden verarbeitet',
+            'batch_id': str(batch.id),
+            'status': batch.status,
+            'total_files': batch.total_files
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'bulk_submit_status/(?P<batch_id>[0-9a-f-]+)')
+    def bulk_submit_status(self, request, batch_id=None):
+        """Status/Ergebnis eines gestaffelten Scan-Uploads (Polling-Fallback zum WebSocket)"""
+        batches = WorkOrderSubmitBatch.objects.all()
+        if not (request.user.is_staff or request.user.is_superuser):
+            batches = batches.filter(submitted_by=request.user)
+        
+        batch = batches.filter(pk=batch_id).first()
+        if not batch:
+            return Response({'error': 'Batch nicht gefunden'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'batch_id': str(batch.id),
+            'status': batch.status,
+            'total_files': batch.total_files,
+            'processed_files': batch.processed_files,
+            'created_orders': batch.created_orders,
+            'errors': batch.errors,
+            'created_at': batch.created_at,
+            'finished_at': batch.finished_at
+        })
+    
+    def _create_submitted_work_order(self, request, candidate, order_number):
+        """
+        Legt einen eingereichten Scan-Arbeitsschein inkl. Duplikat-/Haklisten-Check + History an
+        
+        Returns:
+            dict: Eintrag für 'created_orders' der bulk_submit-Antwort
+        """
+        file = candidate['file']
+        object_number = candidate['object_number']
+        project_number = candidate['project_number']
+        content_hash = candidate['content_hash']
+        
+        logger.debug(f"Erstelle WorkOrder {order_number} (O:{object_number}, P:{project_number}, Hash:{content_hash})")
+        
+        # Erstelle WorkOrder mit minimalen Daten
+        work_order = WorkOrder.objects.create(
+            order_number=order_number,
+            object_number=object_number,
+            project_number=project_number,
+            content_hash=content_hash,  # Hash speichern
+            leistungsmonat=candidate['leistungsmonat'],  # OCR-extrahierter Leistungsmonat
+            leistungsmonat_ocr_confidence=candidate['leistungsmonat_confidence'],  # OCR-Konfidenz
+            status='submitted',
+            scanned_document=file,
+            submitted_at=timezone.now(),
+            submitted_by=request.user,
+            # Dummy-Werte (können später ergänzt werden)
+            client_id=request.data.get('client_id') if request.data.get('client_id') else None,
+            start_date=timezone.now().date(),
+            end_date=timezone.now().date(),
+            work_days=1,
+            work_type=f'Scan-Upload',
+            work_description='Gescannter Arbeitsschein',
+            created_by=request.user
+        )
+        
+        # Duplikat-Check durchführen
+        duplicates = work_order.check_for_duplicates()
+        duplicate_info = None
+        if duplicates:
+            duplicate_info = {
+                'is_duplicate': True,
+                'count': len(duplicates),
+                'original': duplicates[0].order_number
+            }
+        
+        # Haklisten-Abgleich
+        checklist_match = work_order.match_checklist_item()
+        checklist_info = None
+        if checklist_match:
+            checklist_info = {
+                'matched': True,
+                'sr_number': checklist_match.sr_invoice_number,
+                'notes': checklist_match.notes
+            }
+        
+        # History-Eintrag
+        WorkOrderHistory.objects.create(
+            work_order=work_order,
+            action='submitted',
+            performed_by=request.user,
+            new_status='submitted',
+            notes=f'Arbeitsschein via Scan eingereicht ({file.name})',
+            metadata={
+                'filename': file.name, 
+                'size': file.size,
+                'is_duplicate': work_order.is_duplicate,
+                'checklist_matched': checklist_match is not None
+            }
+        )
+        
+        return {
+            'id': work_order.id,
+            'order_number': work_order.order_number,
+            'filename': file.name,
+            'optimized_filename': work_order.get_optimized_filename(),
+            'duplicate_info': duplicate_info,
+            'checklist_info': checklist_info
+        }
+    
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """Einzelnen Arbeitsschein zur Abrechnung einreichen"""
@@ -674,12 +771,10 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        workorders = WorkOrder.objects.filter(id__in=workorder_ids)
-        updated_count = 0
-        
-        for wo in workorders:
-            wo.mark_pdf_downloaded(request.user)
-            updated_count += 1
+        updated_count = WorkOrder.mark_pdfs_downloaded(
+            WorkOrder.objects.filter(id__in=workorder_ids),
+            request.user
+        )
         
         return Response({
             'message': f'{updated_count} Arbeitsscheine als heruntergeladen markiert',
@@ -690,12 +785,19 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
     def merge_pdfs(self, request):
         """
         Erstellt eine zusammengefasste PDF für SR-Rechnungen.
-        Body: { "workorder_ids": [1, 2, 3], "sr_number": "SR-123" }
+        Body: { "workorder_ids": [1, 2, 3], "sr_number": "SR-123", "async": false }
+        
+        Das Ergebnis wird gestreamt (FileResponse) und pro Auswahl + Datei-Stand
+        gecacht. Mit async=true laufen große Auswahlen (ab
+        PDF_MERGE_ASYNC_THRESHOLD Scans) im Hintergrund: Antwort 202 mit
+        merge_key, Download über merge_pdfs_download/<merge_key>.
         """
-        from django.http import HttpResponse
-        from PyPDF2 import PdfMerger
         from auth_user.permission_service import PermissionService
-        import io
+        from .pdf_merge import (
+            PDF_MERGE_ASYNC_THRESHOLD, add_merge_requester, collect_documents, get_cached_merge,
+            get_merge_status, get_or_build_merged_pdf, merge_key, set_merge_status
+        )
+        from .tasks import merge_workorder_pdfs
         
         perm_service = PermissionService.for_user(request.user)
         if not perm_service.has_permission('can_download_workorder_pdf'):
@@ -716,38 +818,82 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         workorders = WorkOrder.objects.filter(id__in=workorder_ids)
         
         # Sammle alle PDF-Dateien
-        pdf_files = []
-        for wo in workorders:
-            if wo.scanned_document:
-                pdf_files.append(wo.scanned_document.path)
+        documents = collect_documents(workorders)
         
-        if not pdf_files:
+        if not documents:
             return Response(
                 {'error': 'Keine PDFs zum Zusammenführen gefunden'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Merge PDFs
-        merger = PdfMerger()
-        for pdf_path in pdf_files:
-            merger.append(pdf_path)
-        
-        # Erstelle Response mit merged PDF
-        output = io.BytesIO()
-        merger.write(output)
-        merger.close()
-        output.seek(0)
-        
-        # Markiere alle als heruntergeladen
-        for wo in workorders:
-            wo.mark_pdf_downloaded(request.user)
-        
         filename = f"{sr_number}_Sammelrechnung.pdf" if sr_number else "Zusammengefasst.pdf"
+        key = merge_key(documents)
+        
+        run_async = str(request.data.get('async', '')).lower() in ('true', '1')
+        if run_async and len(documents) >= PDF_MERGE_ASYNC_THRESHOLD and not get_cached_merge(key):
+            current = get_merge_status(key)
+            if current and current.get('status') == 'processing':
+                # Gleiche Auswahl läuft bereits (anderer User) → mit eintragen
+                add_merge_requester(key, request.user.id, filename)
+            else:
+                set_merge_status(
+                    key,
+                    status='processing',
+                    workorder_ids=[workorder_id for workorder_id, _, _ in documents],
+                    requesters={request.user.id: filename}
+                )
+                merge_workorder_pdfs.delay(key, [workorder_id for workorder_id, _, _ in documents])
+            
+            return Response({
+                'message': f'{len(documents)} PDFs werden zusammengeführt',
+                'merge_key': key,
+                'status': 'processing'
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        _, name = get_or_build_merged_pdf(documents)
+        return self._merged_pdf_response(request, name, workorders, filename)
+    
+    @action(detail=False, methods=['get'], url_path=r'merge_pdfs_download/(?P<merge_key>[0-9a-f]{64})')
+    def merge_pdfs_download(self, request, merge_key=None):
+        """Download eines Hintergrund-Merges (202 solange er noch läuft)"""
+        from django.core.files.storage import default_storage
+        from .pdf_merge import get_merge_status
+        
+        merge_status = get_merge_status(merge_key)
+        requesters = (merge_status or {}).get('requesters') or {}
+        if not merge_status or (
+            request.user.id not in requesters
+            and not (request.user.is_staff or request.user.is_superuser)
+        ):
+            return Response({'error': 'Merge nicht gefunden'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if merge_status['status'] == 'failed':
+            return Response(
+                {'error': merge_status.get('error', 'Zusammenführen fehlgeschlagen'), 'status': 'failed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        response = HttpResponse(output.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if merge_status['status'] != 'ready' or not default_storage.exists(merge_status['name']):
+            return Response({'merge_key': merge_key, 'status': 'processing'}, status=status.HTTP_202_ACCEPTED)
         
-        return response
+        workorders = WorkOrder.objects.filter(id__in=merge_status['workorder_ids'])
+        filename = requesters.get(request.user.id) or 'Zusammengefasst.pdf'
+        return self._merged_pdf_response(request, merge_status['name'], workorders, filename)
+    
+    def _merged_pdf_response(self, request, name, workorders, filename):
+        """Streamt den Merge aus dem Storage und markiert alle Scheine als heruntergeladen"""
+        from django.core.files.storage import default_storage
+        from django.http import FileResponse
+        
+        # Markiere alle als heruntergeladen (ein UPDATE)
+        WorkOrder.mark_pdfs_downloaded(workorders, request.user)
+        
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf'
+        )
     
     @action(detail=False, methods=['post'])
     def bulk_mark_billed(self, request):
@@ -797,13 +943,20 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
     def split_pdf(self, request):
         """
         Teilt eine mehrseitige PDF in einzelne Seiten auf.
-        Body: multipart/form-data mit 'pdf' File
+        Body: multipart/form-data mit 'pdf' File (optional 'async': true)
         Returns: { "pages": [{"page_number": 1, "url": "..."}, ...] }
+        
+        Seiten werden pro Content-Hash abgelegt und bei erneutem Upload
+        wiederverwendet. Mit async=true werden große Dokumente (ab
+        SPLIT_ASYNC_PAGE_THRESHOLD Seiten) im Hintergrund geteilt: Antwort 202
+        mit split_id, Ergebnis über split_pdf_status/<split_id>.
         """
-        from PyPDF2 import PdfReader, PdfWriter
-        from django.core.files.base import ContentFile
-        import io
-        import os
+        from PyPDF2 import PdfReader
+        from .pdf_split import (
+            SPLIT_ASYNC_PAGE_THRESHOLD, get_split_result, get_split_status,
+            hash_upload, set_split_status, split_pdf, store_source
+        )
+        from .tasks import split_workorder_pdf
         
         pdf_file = request.FILES.get('pdf')
         
@@ -814,52 +967,46 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            reader = PdfReader(pdf_file)
-            page_count = len(reader.pages)
-            
-            if page_count <= 1:
-                return Response(
-                    {'error': 'PDF hat nur eine Seite'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            pages_data = []
+            digest = hash_upload(pdf_file)
             
-            # Erstelle temporäres Verzeichnis für aufgeteilte Seiten
-            from django.conf import settings
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_pdf_splits', str(request.user.id))
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # Teile PDF in einzelne Seiten
-            for page_num in range(page_count):
-                writer = PdfWriter()
-                writer.add_page(reader.pages[page_num])
-                
-                # Speichere Seite als separate PDF
-                output_buffer = io.BytesIO()
-                writer.write(output_buffer)
-                output_buffer.seek(0)
-                
-                # Erstelle temporäre Datei
-                filename = f'page_{page_num + 1}_{int(timezone.now().timestamp())}.pdf'
-                filepath = os.path.join(temp_dir, filename)
+            # Gleiche Datei bereits geteilt → Seiten wiederverwenden
+            result = get_split_result(digest)
+            if result is None:
+                page_count = len(PdfReader(pdf_file).pages)
+                pdf_file.seek(0)
                 
-                with open(filepath, 'wb') as f:
-                    f.write(output_buffer.getvalue())
+                if page_count <= 1:
+                    return Response(
+                        {'error': 'PDF hat nur eine Seite'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 
-                # Erstelle URL für Frontend
-                url = f'/media/temp_pdf_splits/{request.user.id}/{filename}'
+                run_async = str(request.data.get('async', '')).lower() in ('true', '1')
+                if run_async and page_count >= SPLIT_ASYNC_PAGE_THRESHOLD:
+                    current = get_split_status(digest)
+                    if not current or current.get('status') == 'failed':
+                        store_source(pdf_file, digest)
+                        set_split_status(
+                            digest,
+                            status='processing',
+                            processed=0,
+                            page_count=page_count,
+                            user_id=request.user.id
+                        )
+                        split_workorder_pdf.delay(digest)
+                    
+                    return Response({
+                        'message': f'PDF mit {page_count} Seiten wird aufgeteilt',
+                        'split_id': digest,
+                        'page_count': page_count,
+                        'status': 'processing'
+                    }, status=status.HTTP_202_ACCEPTED)
                 
-                pages_data.append({
-                    'page_number': page_num + 1,
-                    'url': url,
-                    'filename': filename
-                })
+                result = split_pdf(pdf_file, digest)
             
             return Response({
-                'message': f'PDF in {page_count} Seiten aufgeteilt',
-                'page_count': page_count,
-                'pages': pages_data
+                'message': f"PDF in {result['page_count']} Seiten aufgeteilt",
+                **result
             })
             
         except Exception as e:
@@ -867,6 +1014,27 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
                 {'error': f'Fehler beim Splitten der PDF: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['get'], url_path=r'split_pdf_status/(?P<split_id>[0-9a-f]{64})')
+    def split_pdf_status(self, request, split_id=None):
+        """Fortschritt bzw. Ergebnis eines Hintergrund-Splits"""
+        from .pdf_split import get_split_result, get_split_status
+        
+        result = get_split_result(split_id)
+        if result is not None:
+            return Response({'status': 'ready', **result})
+        
+        split_status = get_split_status(split_id)
+        if not split_status:
+            return Response({'error': 'Split nicht gefunden'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'split_id': split_id,
+            'status': split_status['status'],
+            'processed': split_status.get('processed', 0),
+            'page_count': split_status.get('page_count'),
+            'error': split_status.get('error')
+        })
 
 
 class RecurringWorkOrderChecklistViewSet(viewsets.ModelViewSet):
@@ -1203,7 +1371,7 @@ class RecurringWorkOrderChecklistViewSet(viewsets.ModelViewSet):
         """
         import pandas as pd
         import io
-        from datetime import datetime
+        from .checklist_import import map_import_rows
         
         if 'file' not in request.FILES:
             return Response(
@@ -1243,50 +1411,8 @@ class RecurringWorkOrderChecklistViewSet(viewsets.ModelViewSet):
             else:
                 df = pd.read_csv(io.BytesIO(file.read()))
             
-            # Validiere und bereite Daten vor
-            import_results = {
-                'valid': [],
-                'invalid': [],
-                'total': len(df)
-            }
-            
-            for index, row in df.iterrows():
-                item_data = {
-                    'row_number': index + 1,
-                    'original_data': {}
-                }
-                
-                # Mappe Spalten
-                for field_key, column_name in column_mapping.items():
-                    if column_name and column_name in df.columns:
-                        value = row[column_name]
-                        # Konvertiere NaN zu leerem String
-                        if pd.isna(value):
-                            value = ''
-                        else:
-                            value = str(value).strip()
-                        item_data['original_data'][column_name] = value
-                        item_data[field_key] = value
-                
-                # Globales Startdatum anwenden, wenn nicht in Spalte vorhanden
-                if global_valid_from and not item_data.get('valid_from'):
-                    item_data['valid_from'] = global_valid_from
-                
-                # Validiere Pflichtfelder (valid_from ist jetzt optional)
-                missing_fields = []
-                if not item_data.get('object_number'):
-                    missing_fields.append('O-Nummer')
-                if not item_data.get('project_number'):
-                    missing_fields.append('P-Nummer')
-                if not item_data.get('object_description'):
-                    missing_fields.append('Objektbeschreibung')
-                # Startdatum ist optional - kann leer bleiben oder im Validierungsschritt ergänzt werden
-                
-                if missing_fields:
-                    item_data['missing_fields'] = missing_fields
-                    import_results['invalid'].append(item_data)
-                else:
-                    import_results['valid'].append(item_data)
+            # Validiere und bereite Daten vor (spaltenweise statt iterrows)
+            import_results = map_import_rows(df, column_mapping, global_valid_from)
             
             return Response({
                 'success': True,
@@ -1309,7 +1435,16 @@ class RecurringWorkOrderChecklistViewSet(viewsets.ModelViewSet):
             )
         """
         Speichert die validierten Import-Daten in die Datenbank.
+        
+        Upsert chunkweise per bulk_create auf (object_number, project_number).
+        Mit async=true laufen große Imports (ab IMPORT_ASYNC_THRESHOLD Einträgen)
+        im Hintergrund: Antwort 202 mit job_id, Fortschritt über
+        import_status/<job_id> bzw. den Notifications-WebSocket.
         """
+        import uuid
+        from .checklist_import import IMPORT_ASYNC_THRESHOLD, set_import_status, upsert_checklist_items
+        from .tasks import import_checklist_items
+        
         items_data = request.data.get('items', [])
         
         if not items_data:
@@ -1318,79 +1453,44 @@ class RecurringWorkOrderChecklistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        created_items = []
-        updated_items = []
-        errors = []
+        run_async = str(request.data.get('async', '')).lower() in ('true', '1')
+        if run_async and len(items_data) >= IMPORT_ASYNC_THRESHOLD:
+            job_id = uuid.uuid4().hex
+            set_import_status(
+                job_id,
+                status='processing',
+                processed=0,
+                total=len(items_data),
+                user_id=request.user.id
+            )
+            transaction.on_commit(lambda: import_checklist_items.delay(job_id, items_data))
+            
+            return Response({
+                'message': f'Import von {len(items_data)} Einträgen gestartet',
+                'job_id': job_id,
+                'total': len(items_data),
+                'status': 'processing'
+            }, status=status.HTTP_202_ACCEPTED)
         
-        for item_data in items_data:
-            try:
-                # Resolve Service Manager & Billing User by username
-                service_manager = None
-                billing_user = None
-                
-                if item_data.get('service_manager_username'):
-                    try:
-                        service_manager = User.objects.get(username=item_data['service_manager_username'])
-                    except User.DoesNotExist:
-                        pass  # Ignoriere ungültige Usernames
-                
-                if item_data.get('billing_user_username'):
-                    try:
-                        billing_user = User.objects.get(username=item_data['billing_user_username'])
-                    except User.DoesNotExist:
-                        pass
-                
-                # Fallback: Wenn kein billing_user, nutze aktuellen User
-                if not billing_user and request.user:
-                    billing_user = request.user
-                
-                # Prüfe ob Eintrag bereits existiert
-                existing = RecurringWorkOrderChecklist.objects.filter(
-                    object_number=item_data['object_number'],
-                    project_number=item_data['project_number']
-                ).first()
-                
-                if existing:
-                    # Update
-                    existing.object_description = item_data.get('object_description', '')
-                    existing.debitor_number = item_data.get('debitor_number', '')
-                    existing.notes = item_data.get('notes', '')
-                    existing.sr_invoice_number = item_data.get('sr_invoice_number', '')
-                    if service_manager:
-                        existing.service_manager = service_manager
-                    if billing_user:
-                        existing.assigned_billing_user = billing_user
-                    if request.user:
-                        existing.last_checked_by = request.user
-                    existing.save()
-                    updated_items.append(existing.id)
-                else:
-                    # Create
-                    new_item = RecurringWorkOrderChecklist.objects.create(
-                        object_number=item_data['object_number'],
-                        project_number=item_data['project_number'],
-                        object_description=item_data.get('object_description', ''),
-                        debitor_number=item_data.get('debitor_number', ''),
-                        notes=item_data.get('notes', ''),
-                        sr_invoice_number=item_data.get('sr_invoice_number', ''),
-                        service_manager=service_manager,
-                        assigned_billing_user=billing_user,
-                        created_by=request.user if request.user else None
-                    )
-                    created_items.append(new_item.id)
-                    
-            except Exception as e:
-                errors.append({
-                    'row': item_data.get('row_number'),
-                    'error': str(e)
-                })
+        result = upsert_checklist_items(items_data, user=request.user)
         
         return Response({
             'success': True,
-            'created': len(created_items),
-            'updated': len(updated_items),
-            'errors': errors
+            **result
         })
+    
+    @action(detail=False, methods=['get'], url_path=r'import_status/(?P<job_id>[0-9a-f]{32})')
+    def import_status(self, request, job_id=None):
+        """Fortschritt eines Hintergrund-Imports"""
+        from .checklist_import import get_import_status
+        
+        import_status = get_import_status(job_id)
+        if not import_status or import_status.get('user_id') != request.user.id:
+            return Response({'error': 'Import nicht gefunden'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'job_id': job_id, **{
+            key: value for key, value in import_status.items() if key != 'user_id'
+        }})
 
 class WorkorderAssignmentViewSet(viewsets.ModelViewSet):
     """